@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Benchmark for CloudStackNodeDriver.list_nodes against a synthetic
+# inventory served by an in-process fake API. It compares the current
+# implementation (forwarding rules are retrieved once) with the previous
+# one which retrieved all the rules once per public address.
+#
+# Usage: python contrib/benchmark_cloudstack_list_nodes.py [--vms=1000]
+#                                                          [--latency=0]
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import urlparse
+from libcloud.compute.drivers.cloudstack import CloudStackNodeDriver
+from libcloud.compute.drivers.cloudstack import CloudStackForwardingRule
+
+try:
+    parse_qsl = urlparse.parse_qsl
+except AttributeError:
+    import cgi
+    parse_qsl = cgi.parse_qsl
+
+
+def generate_inventory(vm_count, rules_per_vm):
+    vms = []
+    addresses = []
+    rules = []
+
+    for index in range(vm_count):
+        vm_id = 1000 + index
+        address_id = 50000 + index
+        address = '10.%s.%s.%s' % ((index >> 16) & 255, (index >> 8) & 255,
+                                   index & 255)
+
+        vms.append({'id': vm_id, 'displayname': 'vm-%s' % (index),
+                    'state': 'Running', 'zoneid': 1,
+                    'nic': [{'ipaddress': '192.168.0.1'}]})
+        addresses.append({'id': address_id, 'ipaddress': address,
+                          'virtualmachineid': vm_id})
+
+        for port in range(rules_per_vm):
+            rules.append({'id': len(rules) + 1, 'protocol': 'tcp',
+                          'ipaddressid': address_id, 'ipaddress': address,
+                          'startport': 22 + port, 'endport': 22 + port})
+
+    return {'listVirtualMachines': ('virtualmachine', vms),
+            'listPublicIpAddresses': ('publicipaddress', addresses),
+            'listIpForwardingRules': ('ipforwardingrule', rules)}
+
+
+class FakeResponse(object):
+    version = 11
+    reason = 'OK'
+
+    def __init__(self, body):
+        self.status = httplib.OK
+        self.body = body
+        self.headers = {'content-type': 'application/json'}
+
+    def read(self, *args, **kwargs):
+        body, self.body = self.body, ''
+        return body
+
+    def getheader(self, name, *args, **kwargs):
+        return self.headers.get(name, *args, **kwargs)
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+
+class FakeCloudStackHttp(object):
+    inventory = {}
+    latency = 0
+    requests = 0
+
+    def __init__(self, host, port, *args, **kwargs):
+        self.host = host
+        self.port = port
+        self.response = None
+
+    def request(self, method, url, body=None, headers=None, raw=False):
+        FakeCloudStackHttp.requests += 1
+        time.sleep(self.latency)
+
+        query = dict(parse_qsl(urlparse.urlparse(url).query))
+        command = query['command']
+        key, items = self.inventory[command]
+
+        if 'page' in query:
+            page_size = int(query['pagesize'])
+            start = (int(query['page']) - 1) * page_size
+            values = items[start:start + page_size]
+        else:
+            values = items
+
+        result = {command.lower() + 'response': {'count': len(items),
+                                                 key: values}}
+        self.response = FakeResponse(json.dumps(result))
+
+    def getresponse(self):
+        return self.response
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def legacy_list_nodes(driver):
+    # Forwarding rule lookup as performed by the previous implementation
+    nodes = driver.list_nodes()
+
+    for node in nodes:
+        rules = []
+
+        for addr in node.extra['ip_addresses']:
+            result = driver._sync_request('listIpForwardingRules')
+            for r in result.get('ipforwardingrule', []):
+                rules.append(CloudStackForwardingRule(node, r['id'], addr,
+                                                      r['protocol'].upper(),
+                                                      r['startport'],
+                                                      r['endport']))
+
+        node.extra['ip_forwarding_rules'] = rules
+
+    return nodes
+
+
+def run(name, func, driver):
+    FakeCloudStackHttp.requests = 0
+    start = time.time()
+    nodes = func(driver)
+    elapsed = time.time() - start
+
+    print('%-10s %6s nodes %6s requests %8.2f s' %
+          (name, len(nodes), FakeCloudStackHttp.requests, elapsed))
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--vms', type='int', default=1000,
+                      help='Number of virtual machines (default: 1000)')
+    parser.add_option('--rules-per-vm', type='int', default=2,
+                      help='Forwarding rules per virtual machine (default: 2)')
+    parser.add_option('--latency', type='float', default=0,
+                      help='Simulated latency per request in seconds')
+    parser.add_option('--skip-legacy', action='store_true', default=False,
+                      help='Don\'t run the previous implementation')
+    options, _ = parser.parse_args()
+
+    FakeCloudStackHttp.inventory = generate_inventory(options.vms,
+                                                      options.rules_per_vm)
+    FakeCloudStackHttp.latency = options.latency
+
+    CloudStackNodeDriver.connectionCls.conn_classes = (None,
+                                                       FakeCloudStackHttp)
+    driver = CloudStackNodeDriver('key', 'secret', host='api.example.com',
+                                  path='/client/api')
+
+    run('current', lambda driver: driver.list_nodes(), driver)
+
+    if not options.skip_legacy:
+        run('legacy', legacy_list_nodes, driver)
+
+
+if __name__ == '__main__':
+    main()
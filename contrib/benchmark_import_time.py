@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Benchmark of the cold start cost of libcloud. Every statement is executed
+# in a new interpreter and the time spent importing (measured inside the
+# interpreter, so the interpreter start up is excluded) is reported.
+#
+# If --budget is given the script exits with a non-zero status when the
+# median import time of the first statement (get_driver from
+# libcloud.storage.providers) exceeds the budget, so it can be used to guard
+# the cold start cost in CI.
+#
+# Usage: python contrib/benchmark_import_time.py [--runs=20]
+#                                                [--budget=MILLISECONDS]
+
+import os
+import sys
+import subprocess
+from optparse import OptionParser
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+STATEMENTS = [
+    'from libcloud.storage.providers import get_driver',
+    'from libcloud.storage.providers import get_driver; '
+    'from libcloud.storage.types import Provider; '
+    'get_driver(Provider.S3)',
+    'from libcloud.compute.providers import get_driver; '
+    'from libcloud.compute.types import Provider; '
+    'get_driver(Provider.EC2)',
+]
+
+# Optional dependencies which shouldn't be imported by the statements above
+OPTIONAL_MODULES = ['paramiko', 'libvirt', 'xmlrpclib', 'xmlrpc.client']
+
+TEMPLATE = """
+import sys
+import time
+start = time.time()
+%s
+elapsed = time.time() - start
+loaded = [name for name in %r if name in sys.modules]
+sys.stdout.write('%%f %%s' %% (elapsed, ','.join(loaded)))
+"""
+
+
+def measure(statement, runs):
+    durations = []
+    loaded = set()
+
+    for _ in range(runs):
+        process = subprocess.Popen([sys.executable, '-c',
+                                    TEMPLATE % (statement, OPTIONAL_MODULES)],
+                                   cwd=ROOT, stdout=subprocess.PIPE)
+        stdout = process.communicate()[0].decode('utf-8')
+
+        if process.returncode != 0:
+            raise Exception('Failed to execute: %s' % (statement))
+
+        elapsed, modules = (stdout.split(' ') + [''])[:2]
+        durations.append(float(elapsed))
+        loaded.update([name for name in modules.split(',') if name])
+
+    durations.sort()
+    return durations, loaded
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--runs', type='int', default=20,
+                      help='Number of interpreters started per statement')
+    parser.add_option('--budget', type='float', default=None,
+                      help='Maximum median import time (in milliseconds) of '
+                           'the first statement')
+    options, _ = parser.parse_args()
+
+    medians = []
+
+    for statement in STATEMENTS:
+        durations, loaded = measure(statement, options.runs)
+        median = durations[len(durations) // 2]
+        medians.append(median)
+
+        print(statement)
+        print('    min %7.2f ms  median %7.2f ms  max %7.2f ms' %
+              (durations[0] * 1000, median * 1000, durations[-1] * 1000))
+
+        if loaded:
+            print('    optional dependencies imported: %s' %
+                  (', '.join(sorted(loaded))))
+
+    if options.budget is not None and medians[0] * 1000 > options.budget:
+        print('Import time budget exceeded: %.2f ms > %.2f ms' %
+              (medians[0] * 1000, options.budget))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Micro benchmark for libcloud.utils.files.read_in_chunks and
+# exhaust_iterator.
+#
+# Usage: python contrib/benchmark_read_in_chunks.py [--size=1024]
+#                                                   [--chunk-sizes=8096,...]
+
+from __future__ import with_statement
+
+import os
+import sys
+import time
+import tempfile
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libcloud.utils.py3 import b
+from libcloud.utils.files import read_in_chunks, exhaust_iterator
+
+MB = 1024 * 1024
+
+# Size of the pieces returned by the source iterator. They are intentionally
+# not a multiple of the chunk size so fill_size needs to re-assemble them.
+PIECE_SIZE = 65521
+
+
+def iterator_source(total_size, piece=None):
+    piece = piece or (b('x') * PIECE_SIZE)
+    remaining = total_size
+
+    while remaining > 0:
+        value = piece[:min(len(piece), remaining)]
+        remaining -= len(value)
+        yield value
+
+
+def run(name, func, total_size):
+    start = time.time()
+    transferred = func()
+    elapsed = max(time.time() - start, 1e-9)
+
+    assert transferred == total_size, (transferred, total_size)
+    print('%-40s %8.2f s %10.1f MB/s' % (name, elapsed,
+                                        (total_size / float(MB)) / elapsed))
+
+
+def benchmark_iterator(total_size, chunk_size, fill_size):
+    def func():
+        transferred = 0
+        for chunk in read_in_chunks(iterator_source(total_size),
+                                    chunk_size=chunk_size,
+                                    fill_size=fill_size):
+            transferred += len(chunk)
+        return transferred
+
+    run('iterator chunk=%s fill_size=%s' % (chunk_size, fill_size), func,
+        total_size)
+
+
+def benchmark_file(file_path, total_size, chunk_size):
+    def func():
+        transferred = 0
+        with open(file_path, 'rb') as file_handle:
+            for chunk in read_in_chunks(file_handle, chunk_size=chunk_size,
+                                        fill_size=True):
+                transferred += len(chunk)
+        return transferred
+
+    run('file chunk=%s fill_size=True' % (chunk_size), func, total_size)
+
+
+def benchmark_exhaust_iterator(total_size):
+    def func():
+        return len(exhaust_iterator(iterator_source(total_size)))
+
+    run('exhaust_iterator', func, total_size)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--size', type='int', default=1024,
+                      help='Amount of data to process in MB (default: 1024)')
+    parser.add_option('--chunk-sizes', default='8096,65536,1048576',
+                      help='Comma separated list of chunk sizes in bytes')
+    parser.add_option('--skip-file', action='store_true', default=False,
+                      help='Don\'t run the benchmark which reads a file')
+    options, _ = parser.parse_args()
+
+    total_size = options.size * MB
+    chunk_sizes = [int(value) for value in options.chunk_sizes.split(',')]
+
+    for chunk_size in chunk_sizes:
+        for fill_size in [False, True]:
+            benchmark_iterator(total_size, chunk_size, fill_size)
+
+    benchmark_exhaust_iterator(total_size)
+
+    if options.skip_file:
+        return
+
+    fd, file_path = tempfile.mkstemp()
+    try:
+        block = b('x') * MB
+        with os.fdopen(fd, 'wb') as file_handle:
+            for _ in range(options.size):
+                file_handle.write(block)
+
+        for chunk_size in chunk_sizes:
+            benchmark_file(file_path, total_size, chunk_size)
+    finally:
+        os.unlink(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Benchmark for StorageDriver._stream_data comparing the sequential upload
+# path with the pipelined one (StorageDriver.pipelined_upload) against a
+# local HTTP server which discards everything it receives.
+#
+# Usage: python contrib/benchmark_stream_data.py [--size=512]
+#                                                [--chunk-sizes=65536,...]
+
+import os
+import sys
+import time
+import multiprocessing
+from optparse import OptionParser
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libcloud.utils.py3 import b
+from libcloud.storage.base import StorageDriver
+
+MB = 1024 * 1024
+
+
+class SinkServer(ThreadingMixIn, HTTPServer):
+    # Kept-alive client connections must not block the shutdown
+    daemon_threads = True
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_PUT(self):
+        if self.headers.get('Transfer-Encoding', '') == 'chunked':
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                self._discard(size)
+                self.rfile.readline()
+
+                if size == 0:
+                    break
+        else:
+            self._discard(int(self.headers.get('Content-Length', 0)))
+
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _discard(self, size):
+        while size > 0:
+            size -= len(self.rfile.read(min(size, MB)))
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    # Server runs in a separate process so it doesn't compete with the
+    # uploading threads for the GIL
+    server = SinkServer(('127.0.0.1', 0), SinkHandler)
+    process = multiprocessing.Process(target=server.serve_forever)
+    process.daemon = True
+    process.start()
+    server.socket.close()
+    return process, server.server_address[1]
+
+
+def iterator_source(total_size, chunk_size):
+    # Chunks are pre-generated so the benchmark measures hashing and sending
+    chunk = b('x') * chunk_size
+    remaining = total_size
+
+    while remaining > 0:
+        value = chunk[:min(chunk_size, remaining)]
+        remaining -= len(value)
+        yield value
+
+
+def run(port, total_size, chunk_size, pipelined):
+    driver = StorageDriver('key', 'secret', secure=False, host='127.0.0.1',
+                           port=port)
+    driver.supports_chunked_encoding = True
+    driver.pipelined_upload = pipelined
+
+    start = time.time()
+    result = driver._upload_object(
+        object_name='benchmark', content_type='application/octet-stream',
+        upload_func=driver._stream_data,
+        upload_func_kwargs={'iterator': iterator_source(total_size,
+                                                        chunk_size),
+                            'chunk_size': chunk_size},
+        request_path='/benchmark', iterator=iterator_source(0, 1))
+    result['response'].response.read()
+    elapsed = max(time.time() - start, 1e-9)
+
+    assert result['bytes_transferred'] == total_size
+    print('chunk=%-9s pipelined=%-6s %8.2f s %10.1f MB/s' %
+          (chunk_size, pipelined, elapsed,
+           (total_size / float(MB)) / elapsed))
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--size', type='int', default=512,
+                      help='Amount of data to upload in MB (default: 512)')
+    parser.add_option('--chunk-sizes', default='65536,1048576,4194304',
+                      help='Comma separated list of chunk sizes in bytes')
+    options, _ = parser.parse_args()
+
+    process, port = start_server()
+    total_size = options.size * MB
+
+    try:
+        for chunk_size in [int(value) for value in
+                           options.chunk_sizes.split(',')]:
+            for pipelined in [False, True]:
+                run(port, total_size, chunk_size, pipelined)
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Benchmark of the cost of establishing verified TLS connections with
+# LibcloudHTTPSConnection against a local TLS server. It compares a new
+# SSLContext per connection (CA bundle read on every connection, which is
+# what the previous ssl.wrap_socket based implementation did) with the
+# shared SSLContext, with and without TLS session resumption.
+#
+# A self-signed certificate for localhost is generated with the openssl
+# command line tool.
+#
+# Usage: python contrib/benchmark_tls_handshake.py [--connections=200]
+#                                                  [--ca-bundle=PATH]
+
+from __future__ import with_statement
+
+import os
+import sys
+import ssl
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import libcloud.security
+import libcloud.httplib_ssl
+from libcloud.httplib_ssl import LibcloudHTTPSConnection, clear_ssl_caches
+
+
+def generate_certificate(directory):
+    cert_file = os.path.join(directory, 'cert.pem')
+    key_file = os.path.join(directory, 'key.pem')
+
+    subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                           '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                           '-keyout', key_file, '-out', cert_file],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return cert_file, key_file
+
+
+def start_server(cert_file, key_file):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(128)
+
+    def handle(sock):
+        try:
+            sslsock = context.wrap_socket(sock, server_side=True)
+            # Wait for the client to close the connection, TLS 1.3 session
+            # tickets are sent after the handshake
+            sslsock.recv(1)
+            sslsock.close()
+        except (ssl.SSLError, socket.error):
+            sock.close()
+
+    def serve():
+        while True:
+            sock, _ = listener.accept()
+            thread = threading.Thread(target=handle, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+
+    return listener.getsockname()[1]
+
+
+def connect(port, count, reuse_context, resume_sessions):
+    durations = []
+    resumed = 0
+    original_get = libcloud.httplib_ssl.get_ssl_context
+
+    if not reuse_context:
+        def get_ssl_context(ca_cert, key_file=None, cert_file=None):
+            return libcloud.httplib_ssl._create_ssl_context(ca_cert, key_file,
+                                                            cert_file)
+        libcloud.httplib_ssl.get_ssl_context = get_ssl_context
+
+    try:
+        clear_ssl_caches()
+
+        for _ in range(count):
+            if not resume_sessions:
+                libcloud.httplib_ssl._ssl_sessions.clear()
+
+            connection = LibcloudHTTPSConnection('localhost', port)
+
+            start = time.time()
+            connection.connect()
+            durations.append(time.time() - start)
+
+            resumed += connection.tls_session_reused and 1 or 0
+
+            # Read the session ticket (TLS 1.3) before closing
+            connection.sock.settimeout(0.05)
+            try:
+                connection.sock.recv(1)
+            except (ssl.SSLError, socket.error):
+                pass
+
+            connection.close()
+    finally:
+        libcloud.httplib_ssl.get_ssl_context = original_get
+
+    return durations, resumed
+
+
+def report(name, durations, resumed):
+    durations = sorted(durations)
+    average = sum(durations) / len(durations)
+    median = durations[len(durations) // 2]
+    print('%-40s avg %7.2f ms  median %7.2f ms  resumed %d/%d' %
+          (name, average * 1000, median * 1000, resumed, len(durations)))
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--connections', type='int', default=200,
+                      help='Number of connections per scenario')
+    parser.add_option('--ca-bundle', default=None,
+                      help='Append the server certificate to this CA bundle '
+                           '(e.g. the system bundle) to measure the cost of '
+                           'reading a real bundle')
+    options, _ = parser.parse_args()
+
+    if getattr(ssl, 'SSLContext', None) is None:
+        print('ssl.SSLContext is not available')
+        return 1
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        cert_file, key_file = generate_certificate(directory)
+        ca_file = cert_file
+
+        if options.ca_bundle:
+            ca_file = os.path.join(directory, 'bundle.pem')
+            with open(ca_file, 'w') as fp:
+                fp.write(open(options.ca_bundle).read())
+                fp.write(open(cert_file).read())
+
+        libcloud.security.VERIFY_SSL_CERT = True
+        libcloud.security.CA_CERTS_PATH = [ca_file]
+
+        port = start_server(cert_file, key_file)
+
+        scenarios = [
+            ('new SSLContext per connection', False, False),
+            ('shared SSLContext', True, False),
+            ('shared SSLContext + session resumption', True, True),
+        ]
+
+        for name, reuse_context, resume_sessions in scenarios:
+            durations, resumed = connect(port, options.connections,
+                                         reuse_context, resume_sessions)
+            report(name, durations, resumed)
+    finally:
+        shutil.rmtree(directory)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,11 +22,9 @@ libcloud provides a unified interface to the cloud computing resources.
 __all__ = ['__version__', 'enable_debug']
 __version__ = '0.11.1'
 
-try:
-    import paramiko
-    have_paramiko = True
-except ImportError:
-    have_paramiko = False
+# paramiko is only imported when it's used (it's slow to import)
+from libcloud.utils.misc import is_module_available
+have_paramiko = is_module_available('paramiko')
 
 
 def enable_debug(fo):
@@ -59,6 +57,13 @@ def _init_once():
         enable_debug(fo)
 
         if have_paramiko:
-            paramiko.common.logging.basicConfig(level=paramiko.common.DEBUG)
+            try:
+                import paramiko
+            except ImportError:
+                # Broken installation, it's reported once paramiko is used
+                pass
+            else:
+                paramiko.common.logging.basicConfig(
+                    level=paramiko.common.DEBUG)
 
 _init_once()
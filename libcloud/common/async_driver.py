@@ -0,0 +1,520 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+asyncio support for the drivers.
+
+L{AsyncTransport} performs the requests of a L{Connection} on an asyncio
+event loop. The request is built by the connection's own hooks
+(morph_action_hook, add_default_params, add_default_headers, encode_data,
+pre_connect_hook), sent over a non-blocking socket and the response is
+parsed by the connection's responseCls, so any provider can be driven from
+a single event loop without threads::
+
+    transport = AsyncTransport(driver.connection)
+    responses = await asyncio.gather(*[transport.request('/servers/%s' % i)
+                                       for i in ids])
+
+L{AsyncDriver} wraps a driver, its request method uses the transport and
+the other methods (e.g. list_nodes) return asyncio futures.
+
+Only the requests performed with L{AsyncTransport.request} (directly or
+through L{AsyncDriver.request}) are non-blocking I/O on the event loop.
+Provider methods are not routed through the transport: they are regular
+blocking code which AsyncDriver calls on the threads of an executor, so the
+event loop isn't blocked but every pending call holds a thread and their
+concurrency is bounded by the size of the executor.
+
+The transport is written with protocol callbacks and futures (no
+coroutine syntax) so this module can be imported on every supported Python
+version. It requires Python 3.4 or later at runtime.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import os
+import ssl
+import sys
+import time
+import types
+import socket
+import warnings
+import threading
+import functools
+
+try:
+    import asyncio
+    import concurrent.futures
+    from io import BytesIO
+except ImportError:
+    asyncio = None
+
+import libcloud.security
+from libcloud.utils.py3 import b
+from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import basestring
+from libcloud.utils.misc import lowercase_keys
+from libcloud.common.types import LibcloudError, LazyList
+from libcloud.common.instrumentation import RequestEvent, get_operation_name
+from libcloud.common.instrumentation import has_listeners
+from libcloud.common.instrumentation import emit as emit_request_event
+
+__all__ = [
+    'AsyncTransport',
+    'AsyncDriver',
+    'get_default_executor'
+]
+
+DEFAULT_MAX_WORKERS = 32
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+# (verify, ca_cert) -> SSLContext
+_ssl_contexts = {}
+_ssl_contexts_lock = threading.Lock()
+
+
+def get_default_executor():
+    """
+    Return the executor which is shared by all the L{AsyncDriver} instances
+    which have been created without an executor.
+
+    @rtype: C{concurrent.futures.ThreadPoolExecutor}
+    """
+    global _default_executor
+
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS)
+
+        return _default_executor
+
+
+def _get_event_loop(loop=None):
+    if loop is not None:
+        return loop
+
+    get_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+    return get_loop()
+
+
+def _create_future(loop):
+    create_future = getattr(loop, 'create_future', None)
+
+    if create_future is not None:
+        return create_future()
+
+    return asyncio.Future(loop=loop)
+
+
+def _get_ssl_context():
+    """
+    Return the SSLContext used by the transport (see L{libcloud.security}).
+    Hostname is verified by the context.
+    """
+    verify = libcloud.security.VERIFY_SSL_CERT
+    ca_cert = None
+
+    if verify:
+        ca_certs_available = [cert
+                              for cert in libcloud.security.CA_CERTS_PATH
+                              if os.path.exists(cert)]
+
+        if ca_certs_available:
+            ca_cert = ca_certs_available[0]
+        elif libcloud.security.VERIFY_SSL_CERT_STRICT:
+            raise RuntimeError(
+                libcloud.security.CA_CERTS_UNAVAILABLE_ERROR_MSG)
+        else:
+            warnings.warn(libcloud.security.CA_CERTS_UNAVAILABLE_WARNING_MSG)
+            verify = False
+    else:
+        warnings.warn(libcloud.security.VERIFY_SSL_DISABLED_MSG)
+
+    key = (verify, ca_cert)
+
+    with _ssl_contexts_lock:
+        context = _ssl_contexts.get(key, None)
+
+        if context is None:
+            if verify:
+                context = ssl.create_default_context(cafile=ca_cert)
+            else:
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+
+            _ssl_contexts[key] = context
+
+        return context
+
+
+class _BufferSocket(object):
+    """
+    Socket-like object which is used to parse a received response with
+    httplib.HTTPResponse.
+    """
+
+    def __init__(self, data):
+        self._file = BytesIO(data)
+
+    def makefile(self, *args, **kwargs):
+        return self._file
+
+
+if asyncio is not None:
+    _Protocol = asyncio.Protocol
+else:
+    _Protocol = object
+
+
+class _HTTPClientProtocol(_Protocol):
+    """
+    Sends a single request and resolves the response future with a
+    httplib.HTTPResponse once the server has closed the connection.
+    """
+
+    def __init__(self, request, method, response):
+        self.request = request
+        self.method = method
+        self.response = response
+
+        self.transport = None
+        self._chunks = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.write(self.request)
+
+    def data_received(self, data):
+        self._chunks.append(data)
+
+    def eof_received(self):
+        # Let the transport close the connection (connection_lost)
+        return False
+
+    def connection_lost(self, exc):
+        if self.response.done():
+            return
+
+        if exc is not None:
+            self.response.set_exception(exc)
+            return
+
+        data = b('').join(self._chunks)
+        self._chunks = []
+
+        try:
+            http_response = httplib.HTTPResponse(_BufferSocket(data),
+                                                 method=self.method)
+            http_response.begin()
+        except Exception:
+            self.response.set_exception(sys.exc_info()[1])
+        else:
+            self.response.set_result(http_response)
+
+    def abort(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+        if self.transport is not None:
+            self.transport.abort()
+
+
+class AsyncTransport(object):
+    """
+    Performs the requests of a connection on an asyncio event loop.
+
+    Requests are sent with "Connection: close" and the whole response is
+    read before it's parsed by responseCls. Retries (retry_policy) are not
+    performed, rate limits (rate_limits) are honored without blocking the
+    loop. Hooks run on the loop thread, so a connection which performs a
+    blocking request in one of its hooks (e.g. authentication) should be
+    authenticated beforehand.
+    """
+
+    def __init__(self, connection, loop=None):
+        """
+        @param connection: Connection instance whose hooks and responseCls
+                           are used.
+        @type connection: L{Connection}
+
+        @param loop: Event loop the requests are performed on (default is
+                     the running loop).
+        @type loop: C{asyncio.AbstractEventLoop}
+        """
+        if asyncio is None:
+            raise LibcloudError('asyncio is not available, AsyncTransport '
+                                'requires Python 3.4 or later',
+                                driver=getattr(connection, 'driver', None))
+
+        self.connection = connection
+        self.loop = loop
+
+    def request(self, action, params=None, data='', headers=None,
+                method='GET'):
+        """
+        Perform a request (see L{Connection.request}) and return an asyncio
+        future which resolves to an instance of the connection's
+        responseCls.
+
+        @rtype: C{asyncio.Future}
+        """
+        if params is None:
+            params = {}
+        if headers is None:
+            headers = {}
+
+        loop = _get_event_loop(self.loop)
+        future = _create_future(loop)
+        connection = self.connection
+        driver = getattr(connection, 'driver', None)
+        event = RequestEvent(driver=getattr(driver, 'name', None),
+                             host=connection.host, action=action,
+                             operation=get_operation_name(action, params),
+                             method=method, params=params)
+        start = time.time()
+
+        def finish(result=None, error=None):
+            event.timings['total'] = time.time() - start
+
+            if error is not None:
+                event.error = error
+
+                if not future.done():
+                    future.set_exception(error)
+            elif not future.done():
+                future.set_result(result)
+
+            if has_listeners():
+                emit_request_event(event)
+
+        def send():
+            try:
+                url, body, request_headers = connection._prepare_request(
+                    action=event.action, params=params, data=data,
+                    headers=headers, method=method, event=event)
+                host, port, secure = self._get_endpoint()
+                request = self._build_request(method=method, url=url,
+                                              data=body,
+                                              headers=request_headers)
+                kwargs = {}
+
+                if secure:
+                    kwargs['ssl'] = _get_ssl_context()
+                    kwargs['server_hostname'] = host
+            except Exception:
+                finish(error=sys.exc_info()[1])
+                return
+
+            response = _create_future(loop)
+            protocol = _HTTPClientProtocol(request=request, method=method,
+                                           response=response)
+            connect_start = time.time()
+            timer = None
+
+            if connection.timeout:
+                timer = loop.call_later(connection.timeout, protocol.abort,
+                                        socket.timeout('timed out'))
+
+            def connected(task):
+                event.timings['connect'] = time.time() - connect_start
+
+                if task.cancelled():
+                    protocol.abort(LibcloudError('Request was cancelled',
+                                                 driver=driver))
+                elif task.exception() is not None:
+                    protocol.abort(task.exception())
+                elif response.done():
+                    # Timed out while connecting
+                    task.result()[0].abort()
+
+            def received(response):
+                if timer is not None:
+                    timer.cancel()
+
+                if response.exception() is not None:
+                    finish(error=response.exception())
+                    return
+
+                http_response = response.result()
+                event.status = http_response.status
+                event.headers = lowercase_keys(
+                    dict(http_response.getheaders()))
+                parse_start = time.time()
+
+                try:
+                    result = connection.responseCls(response=http_response,
+                                                    connection=connection)
+                except Exception:
+                    finish(error=sys.exc_info()[1])
+                    return
+                finally:
+                    event.timings['parse'] = time.time() - parse_start
+
+                if isinstance(result.body, basestring):
+                    event.bytes_received = len(result.body)
+
+                finish(result=result)
+
+            response.add_done_callback(received)
+            task = loop.create_task(loop.create_connection(
+                lambda: protocol, host, int(port), **kwargs))
+            task.add_done_callback(connected)
+
+        try:
+            action = connection.morph_action_hook(action)
+            event.action = action
+            delay = 0
+
+            if connection.rate_limits:
+                delay = connection._reserve_rate_limit(method=method,
+                                                       action=action,
+                                                       params=params)
+                event.timings['throttle'] = delay
+        except Exception:
+            finish(error=sys.exc_info()[1])
+            return future
+
+        if delay > 0:
+            loop.call_later(delay, send)
+        else:
+            send()
+
+        return future
+
+    def _get_endpoint(self):
+        connection = self.connection
+
+        if getattr(connection, 'base_url', None):
+            host, port, secure, _ = \
+                connection._tuple_from_url(connection.base_url)
+        else:
+            host, port, secure = (connection.host, connection.port,
+                                  connection.secure)
+
+        return host, port, secure
+
+    def _build_request(self, method, url, data, headers):
+        lines = ['%s %s HTTP/1.1' % (method, url)]
+
+        for key, value in list(headers.items()):
+            if key.lower() == 'connection':
+                continue
+
+            lines.append('%s: %s' % (key, value))
+
+        lines.extend(['Connection: close', '', ''])
+        return b('\r\n'.join(lines)) + b(data or '')
+
+    def __repr__(self):
+        return '<AsyncTransport: %r>' % (self.connection)
+
+
+class AsyncDriver(object):
+    """
+    Wraps a driver so its methods return awaitable asyncio futures.
+
+    L{request} is performed by an L{AsyncTransport} on the event loop.
+    Other methods are provider code which performs blocking requests, they
+    are not routed through the transport but called on the executor threads
+    (see L{run}). Attributes which are not methods are returned unchanged.
+    Methods which return a generator or a L{LazyList} (e.g. create_nodes or
+    list_container_objects) are fully consumed on the executor thread and
+    the future resolves to a C{list}.
+    """
+
+    def __init__(self, driver, loop=None, executor=None):
+        """
+        @param driver: Driver instance.
+
+        @param loop: Event loop the futures are bound to (default is the
+                     running loop).
+        @type loop: C{asyncio.AbstractEventLoop}
+
+        @param executor: Executor which performs the blocking calls (default
+                         is an executor shared by all the wrapped drivers,
+                         see L{get_default_executor}).
+        @type executor: C{concurrent.futures.Executor}
+        """
+        if asyncio is None:
+            raise LibcloudError('asyncio is not available, AsyncDriver '
+                                'requires Python 3.4 or later',
+                                driver=driver)
+
+        self.driver = driver
+        self.loop = loop
+        self.executor = executor
+        self.transport = None
+
+        if getattr(driver, 'connection', None) is not None:
+            self.transport = AsyncTransport(driver.connection, loop=loop)
+
+    def __getattr__(self, name):
+        attr = getattr(self.driver, name)
+
+        if not callable(attr):
+            return attr
+
+        def method(*args, **kwargs):
+            return self.run(attr, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        return method
+
+    def request(self, action, params=None, data='', headers=None,
+                method='GET'):
+        """
+        Perform a request using the driver's connection on the event loop
+        (see L{AsyncTransport.request}).
+
+        @rtype: C{asyncio.Future}
+        """
+        if self.transport is None:
+            raise LibcloudError('Driver doesn\'t have a connection',
+                                driver=self.driver)
+
+        return self.transport.request(action=action, params=params,
+                                      data=data, headers=headers,
+                                      method=method)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call func on the executor and return an asyncio future which
+        resolves to its result.
+
+        @rtype: C{asyncio.Future}
+        """
+        loop = _get_event_loop(self.loop)
+        executor = self.executor or get_default_executor()
+        call = functools.partial(_call_and_consume, func, args, kwargs)
+        return loop.run_in_executor(executor, call)
+
+    def __repr__(self):
+        return '<AsyncDriver: %r>' % (self.driver)
+
+
+def _call_and_consume(func, args, kwargs):
+    result = func(*args, **kwargs)
+
+    # Iterating on the event loop thread would block it
+    if isinstance(result, (types.GeneratorType, LazyList)):
+        result = list(result)
+
+    return result
@@ -15,10 +15,13 @@
 
 import sys
 import ssl
+import copy
 import time
+import hashlib
+import socket
+import threading
 
 from xml.etree import ElementTree as ET
-from pipes import quote as pquote
 
 try:
     import simplejson as json
@@ -34,10 +37,20 @@ from libcloud.utils.py3 import urlencode
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import u
 from libcloud.utils.py3 import b
+from libcloud.utils.py3 import basestring
 
 from libcloud.utils.misc import lowercase_keys
 from libcloud.utils.compression import decompress_data
+from libcloud.utils.compression import DecompressingReader
+from libcloud.utils.xml import findall
 from libcloud.common.types import LibcloudError, MalformedResponseError
+from libcloud.common.pool import ConnectionPool
+from libcloud.common.polling import ExponentialBackoffPollingStrategy
+from libcloud.common.polling import get_default_scheduler
+from libcloud.common.instrumentation import RequestEvent, get_operation_name
+from libcloud.common.instrumentation import has_listeners
+from libcloud.common.instrumentation import emit as emit_request_event
+from libcloud.common.ratelimit import get_token_bucket
 
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
 
@@ -174,6 +187,174 @@ class XmlResponse(Response):
 
     parse_error = parse_body
 
+    def iterparse(self, xpath, namespace=None):
+        """
+        Return elements which match xpath (relative to the root element).
+
+        This response has already been parsed, see L{XmlStreamResponse} for
+        a version which parses the body incrementally.
+
+        @rtype: C{list} of C{Element}
+        """
+        return findall(element=self.object, xpath=xpath, namespace=namespace)
+
+
+class XmlStreamResponse(Response):
+    """
+    XML response whose body is parsed incrementally while it's being read
+    from the socket (see the stream argument of L{Connection.request}).
+
+    Elements are yielded by L{iterparse} as soon as they have been parsed
+    and are removed from the tree once the next one is requested, so the
+    memory usage doesn't grow with the number of elements in the response.
+    The root element (without the yielded elements) is available as the
+    object attribute while the body is being parsed.
+    """
+
+    chunk_size = 16 * 1024
+
+    def __init__(self, response, connection):
+        self.status = response.status
+        self.headers = lowercase_keys(dict(response.getheaders()))
+        self.error = response.reason
+        self.connection = connection
+        self.object = None
+
+        self._response = response
+        self._http_connection = connection.connection
+        self._pool_key = connection._pool_key
+        self._parsed = False
+
+    def iterparse(self, xpath, namespace=None):
+        """
+        Parse the body and yield elements which match xpath (relative to the
+        root element).
+
+        The body can only be parsed once. The connection is returned to the
+        pool once the whole body has been read (or closed if the generator is
+        closed before that).
+
+        @type xpath: C{str}
+        @param xpath: Path of the elements, e.g. 'imagesSet/item'.
+
+        @type namespace: C{str}
+        @param namespace: Namespace of the elements in xpath.
+
+        @return: Generator which yields C{Element} instances.
+        """
+        if self._parsed:
+            raise LibcloudError('Response body has already been parsed',
+                                driver=self.connection.driver)
+
+        self._parsed = True
+
+        if namespace:
+            target = ['{%s}%s' % (namespace, tag) for tag in xpath.split('/')]
+        else:
+            target = xpath.split('/')
+
+        # Elements which are currently open (root element excluded) and
+        # their tags
+        parents = []
+        path = []
+
+        try:
+            try:
+                for event, element in ET.iterparse(self._get_reader(),
+                                                   events=('start', 'end')):
+                    if event == 'start':
+                        if self.object is None:
+                            self.object = element
+                        else:
+                            parents.append(element)
+                            path.append(element.tag)
+                        continue
+
+                    if element is self.object:
+                        continue
+
+                    matches = path == target
+                    parents.pop()
+                    path.pop()
+
+                    if matches:
+                        yield element
+
+                        if parents:
+                            parent = parents[-1]
+                        else:
+                            parent = self.object
+
+                        element.clear()
+                        parent.remove(element)
+            except SyntaxError:
+                # ElementTree.ParseError is a subclass of SyntaxError
+                raise MalformedResponseError("Failed to parse XML",
+                                             body=str(sys.exc_info()[1]),
+                                             driver=self.connection.driver)
+        finally:
+            self._close()
+
+    def _get_reader(self):
+        encoding = self.headers.get('content-encoding', None)
+
+        if encoding in ['zlib', 'deflate']:
+            compression_type = 'zlib'
+        elif encoding in ['gzip', 'x-gzip']:
+            compression_type = 'gzip'
+        else:
+            compression_type = None
+
+        original_data = getattr(self._response, '_original_data', None)
+
+        if original_data is not None:
+            # LoggingConnection has already read the body
+            if PY3:
+                from io import BytesIO
+                fileobj = BytesIO(b(original_data))
+            else:
+                fileobj = StringIO(original_data)
+        else:
+            fileobj = self._response
+
+        return _StrippingReader(DecompressingReader(
+            fileobj=fileobj, compression_type=compression_type,
+            chunk_size=self.chunk_size))
+
+    def _close(self):
+        # Socket can only be reused once the whole body has been read
+        isclosed = getattr(self._response, 'isclosed', None)
+
+        if isclosed is None or isclosed():
+            self.connection._release_connection(self._http_connection,
+                                                pool_key=self._pool_key)
+        else:
+            self._http_connection.close()
+
+
+class _StrippingReader(object):
+    """
+    Skips the whitespace at the beginning of the body (same as the
+    body.strip() performed for the non-streamed responses).
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._started = False
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+
+        while not self._started and data:
+            data = data.lstrip()
+
+            if data:
+                self._started = True
+            else:
+                data = self.fileobj.read(size)
+
+        return data
+
 
 class RawResponse(Response):
 
@@ -279,6 +460,10 @@ class LoggingConnection():
         return (rr, rv)
 
     def _log_curl(self, method, url, body, headers):
+        # Only needed for debugging, pipes (tempfile, shutil...) is slow to
+        # import
+        from pipes import quote as pquote
+
         cmd = ["curl", "-i"]
 
         cmd.extend(["-X", pquote(method)])
@@ -348,22 +533,93 @@ class LoggingHTTPConnection(LoggingConnection, LibcloudHTTPConnection):
                                                body, headers)
 
 
+def _request_state_property(name, default=None):
+    """
+    Return a property whose value is stored in the per-thread request state
+    of a Connection instance.
+
+    @type name: C{str}
+    @param name: Attribute name.
+
+    @type default: C{callable}
+    @param default: Optional callable which returns the initial value for a
+                    thread which hasn't set the attribute yet.
+    """
+    def getter(self):
+        state = self._get_request_state()
+
+        if not hasattr(state, name):
+            value = None
+
+            if default is not None:
+                value = default()
+
+            setattr(state, name, value)
+
+        return getattr(state, name)
+
+    def setter(self, value):
+        setattr(self._get_request_state(), name, value)
+
+    return property(getter, setter)
+
+
 class Connection(object):
     """
     A Base Connection class to derive from.
+
+    A single Connection instance can be shared by multiple threads. All the
+    state which belongs to a single in-flight request (the underlying HTTP
+    connection leased from the pool, action, method and context) is stored
+    per thread.
     """
     #conn_classes = (LoggingHTTPSConnection)
     conn_classes = (LibcloudHTTPConnection, LibcloudHTTPSConnection)
 
     responseCls = Response
     rawResponseCls = RawResponse
-    connection = None
+    streamResponseCls = XmlStreamResponse
     host = '127.0.0.1'
     port = 443
     timeout = None
     secure = 1
     driver = None
-    action = None
+
+    connection = _request_state_property('connection')
+    action = _request_state_property('action')
+    method = _request_state_property('method')
+    context = _request_state_property('context', default=dict)
+
+    _pool_key = _request_state_property('pool_key')
+    _connection_kwargs = _request_state_property('connection_kwargs')
+    _connection_reused = _request_state_property('connection_reused')
+    _request_sent = _request_state_property('request_sent')
+
+    # Idle HTTP/1.1 connections are kept in this pool and reused by subsequent
+    # requests to the same (host, port, secure) endpoint. The pool is shared
+    # by all the Connection instances unless a subclass overrides it.
+    keep_alive = True
+    connection_pool = ConnectionPool()
+
+    # Policy used to retry requests which have failed because of a transient
+    # error or because the client is being throttled (see
+    # L{libcloud.common.retry.RetryPolicy}). Requests are not retried if it's
+    # None.
+    retry_policy = None
+
+    # Client side rate limits, a dictionary which maps a request class (see
+    # get_request_class, e.g. 'read' or 'write') to a (requests per second,
+    # burst size) tuple. Limits are shared by all the connections which use
+    # the same provider, credentials and region (see get_rate_limit_key).
+    # Requests of the classes which are not present are not limited.
+    rate_limits = None
+
+    # True if the API follows the HTTP method semantics (GET requests don't
+    # modify any resource, PUT and DELETE requests are idempotent). Many query
+    # style APIs (e.g. Linode) perform all the operations using GET, so by
+    # default only HEAD and OPTIONS requests are considered read-only and safe
+    # to retry.
+    follows_http_semantics = False
 
     def __init__(self, secure=True, host=None, port=None, url=None,
                  timeout=None):
@@ -394,6 +650,19 @@ class Connection(object):
     def set_context(self, context):
         self.context = context
 
+    def _get_request_state(self):
+        """
+        Return a thread local object which holds the state of the request
+        performed by the current thread.
+        """
+        state = self.__dict__.get('_request_state', None)
+
+        if state is None:
+            state = self.__dict__.setdefault('_request_state',
+                                             threading.local())
+
+        return state
+
     def _tuple_from_url(self, url):
         secure = 1
         port = None
@@ -453,7 +722,16 @@ class Connection(object):
         if self.timeout and not PY25:
             kwargs.update({'timeout': self.timeout})
 
-        connection = self.conn_classes[secure](**kwargs)
+        conn_class = self.conn_classes[secure]
+        pool_key = (conn_class, host, int(port), secure, self.timeout)
+
+        reused = False
+        if self.keep_alive:
+            connection = self.connection_pool.acquire(pool_key)
+            reused = connection is not None
+
+        if connection is None:
+            connection = conn_class(**kwargs)
         # You can uncoment this line, if you setup a reverse proxy server
         # which proxies to your endpoint, and lets you easily capture
         # connections in cleartext when you setup the proxy to do SSL
@@ -461,6 +739,23 @@ class Connection(object):
         #connection = self.conn_classes[False]("127.0.0.1", 8080)
 
         self.connection = connection
+        self._pool_key = pool_key
+        self._connection_kwargs = kwargs
+        self._connection_reused = reused
+
+    def _release_connection(self, connection, pool_key=None):
+        """
+        Return a connection whose response has been fully read to the pool.
+        """
+        if not self.keep_alive:
+            return
+
+        pool_key = pool_key or self._pool_key
+
+        if pool_key is None:
+            return
+
+        self.connection_pool.release(pool_key, connection)
 
     def _user_agent(self):
         return 'libcloud/%s (%s)%s' % (
@@ -486,7 +781,8 @@ class Connection(object):
                 data='',
                 headers=None,
                 method='GET',
-                raw=False):
+                raw=False,
+                stream=False):
         """
         Request a given `action`.
 
@@ -515,6 +811,12 @@ class Connection(object):
                      and use the rawResponseCls class. This is used with
                      storage API when uploading a file.
 
+        @type stream: C{bool}
+        @param stream: True to return a streamResponseCls instance whose body
+                       is parsed incrementally while it's being read. Only
+                       successful (200 OK) responses are streamed, other
+                       responses are handled by responseCls.
+
         @return: An instance of type I{responseCls}
         """
         if params is None:
@@ -522,8 +824,149 @@ class Connection(object):
         if headers is None:
             headers = {}
 
+        driver = getattr(self, 'driver', None)
+        event = RequestEvent(driver=getattr(driver, 'name', None),
+                             host=self.host, action=action,
+                             operation=get_operation_name(action, params),
+                             method=method, params=params)
+        start = time.time()
+        retry_policy = self.retry_policy
+
+        try:
+            if retry_policy is None or raw:
+                return self._request(action=action, params=params, data=data,
+                                     headers=headers, method=method, raw=raw,
+                                     stream=stream, event=event)
+
+            attempt = 0
+
+            while True:
+                try:
+                    # Hooks (add_default_params, pre_connect_hook...) modify
+                    # params and headers in place, e.g. to add a signature
+                    return self._request(action=action,
+                                         params=copy.copy(params),
+                                         data=data, headers=dict(headers),
+                                         method=method, raw=raw,
+                                         stream=stream, event=event)
+                except Exception:
+                    error = sys.exc_info()[1]
+                    delay = retry_policy.get_retry_delay(connection=self,
+                                                         event=event,
+                                                         error=error,
+                                                         attempt=attempt,
+                                                         start=start)
+
+                    if delay is None:
+                        raise
+
+                attempt += 1
+                event.retries += 1
+                time.sleep(delay)
+        except Exception:
+            event.error = sys.exc_info()[1]
+            raise
+        finally:
+            event.timings['total'] = time.time() - start
+
+            if has_listeners():
+                emit_request_event(event)
+
+    def _request(self, action, params, data, headers, method, raw, stream,
+                 event):
+        """
+        Perform the request (see L{request}) and record its progress in
+        event.
+        """
+        event.status = None
+        event.headers = {}
+
         action = self.morph_action_hook(action)
         self.action = action
+        event.action = action
+
+        if self.rate_limits:
+            delay = self._wait_for_rate_limit(method=method, action=action,
+                                              params=params)
+            event.timings['throttle'] = \
+                event.timings.get('throttle', 0) + delay
+
+        url, data, headers = self._prepare_request(action=action,
+                                                   params=params, data=data,
+                                                   headers=headers,
+                                                   method=method, event=event)
+
+        # Removed terrible hack...this a less-bad hack that doesn't execute a
+        # request twice, but it's still a hack.
+        self.connect()
+        event.connection_reused = self._connection_reused
+
+        if raw:
+            self._send_request(method=method, url=url, data=data,
+                               headers=headers, raw=True, event=event)
+            return self.rawResponseCls(connection=self)
+
+        try:
+            http_response = self._send_request(method=method, url=url,
+                                               data=data, headers=headers,
+                                               event=event)
+        except (socket.error, httplib.BadStatusLine,
+                httplib.ImproperConnectionState):
+            # Server has closed a kept-alive connection between our liveness
+            # check and the request. Retry once on a brand new connection,
+            # unless the request has been sent and the server might have
+            # already performed it.
+            if not self._connection_reused:
+                raise
+
+            if self._request_sent and \
+               not self.is_idempotent_request(method=method, action=action,
+                                              params=params):
+                raise
+
+            self.connection.close()
+            self.connection = self._pool_key[0](**self._connection_kwargs)
+            self._connection_reused = False
+            event.retries += 1
+            http_response = self._send_request(method=method, url=url,
+                                               data=data, headers=headers,
+                                               event=event)
+
+        connection = self.connection
+        event.status = http_response.status
+        event.headers = lowercase_keys(dict(http_response.getheaders()))
+
+        if stream and http_response.status == httplib.OK:
+            return self.streamResponseCls(response=http_response,
+                                          connection=self)
+
+        parse_start = time.time()
+
+        try:
+            response = self.responseCls(response=http_response,
+                                        connection=self)
+        finally:
+            event.timings['parse'] = time.time() - parse_start
+
+            # Socket can only be reused once the whole body has been read
+            isclosed = getattr(http_response, 'isclosed', None)
+
+            if isclosed is None or isclosed():
+                self._release_connection(connection)
+
+        if isinstance(response.body, basestring):
+            event.bytes_received = len(response.body)
+
+        return response
+
+    def _prepare_request(self, action, params, data, headers, method, event):
+        """
+        Run the request hooks (add_default_params, add_default_headers,
+        encode_data, pre_connect_hook) on an already morphed action.
+
+        @return: C{(url, data, headers)} tuple of the request which should
+                 be sent.
+        """
         self.method = method
         # Extend default parameters
         params = self.add_default_params(params)
@@ -548,18 +991,41 @@ class Connection(object):
 
         if data is not None:
             headers.update({'Content-Length': str(len(data))})
+            event.bytes_sent = len(data)
 
+        sign_start = time.time()
         params, headers = self.pre_connect_hook(params, headers)
+        event.timings['sign'] = time.time() - sign_start
 
         if params:
             url = '?'.join((action, urlencode(params)))
         else:
             url = action
 
-        # Removed terrible hack...this a less-bad hack that doesn't execute a
-        # request twice, but it's still a hack.
-        self.connect()
+        return url, data, headers
+
+    def _send_request(self, method, url, data, headers, event, raw=False):
+        """
+        Send the request over the current connection and return the response
+        (or None for raw requests). Timings are recorded in event.
+        """
+        self._request_sent = False
+
         try:
+            # Connect explicitly (httplib would connect on the first request)
+            # so the connection setup is timed separately
+            if getattr(self.connection, 'sock', None) is None:
+                connect_start = time.time()
+                self.connection.connect()
+                event.timings['connect'] = time.time() - connect_start
+
+                tls = getattr(self.connection, 'tls_handshake_time', None)
+
+                if tls is not None:
+                    event.timings['tls'] = tls
+
+            send_start = time.time()
+
             # @TODO: Should we just pass File object as body to request method
             # instead of dealing with splitting and sending the file ourselves?
             if raw:
@@ -569,21 +1035,22 @@ class Connection(object):
                     self.connection.putheader(key, str(value))
 
                 self.connection.endheaders()
-            else:
-                self.connection.request(method=method, url=url, body=data,
-                                        headers=headers)
+                event.timings['send'] = time.time() - send_start
+                return None
+
+            self.connection.request(method=method, url=url, body=data,
+                                    headers=headers)
+            self._request_sent = True
+            response_start = time.time()
+            event.timings['send'] = response_start - send_start
+
+            response = self.connection.getresponse()
+            event.timings['first_byte'] = time.time() - response_start
+            return response
         except ssl.SSLError:
             e = sys.exc_info()[1]
             raise ssl.SSLError(str(e))
 
-        if raw:
-            response = self.rawResponseCls(connection=self)
-        else:
-            response = self.responseCls(response=self.connection.getresponse(),
-                                        connection=self)
-
-        return response
-
     def morph_action_hook(self, action):
         return self.request_path + action
 
@@ -627,6 +1094,156 @@ class Connection(object):
         """
         return data
 
+    def is_transient_error(self, status, error):
+        """
+        Return True if a failed request may succeed when it's retried
+        (see L{retry_policy}).
+
+        Override in a provider's subclass to classify provider specific
+        errors.
+
+        @param status: Response status or None if no response has been
+                       received.
+        @type status: C{int}
+
+        @param error: Exception raised by the request.
+        @type error: C{Exception}
+
+        @rtype: C{bool}
+        """
+        if status is None:
+            return isinstance(error, (socket.error, httplib.BadStatusLine,
+                                      httplib.ImproperConnectionState))
+
+        return status in (httplib.INTERNAL_SERVER_ERROR, httplib.BAD_GATEWAY,
+                          httplib.SERVICE_UNAVAILABLE,
+                          httplib.GATEWAY_TIMEOUT)
+
+    def is_throttling_error(self, status, error):
+        """
+        Return True if a request has failed because the client has exceeded
+        the provider's rate limit. These requests are retried even if they
+        are not idempotent because the provider hasn't performed them.
+
+        Override in a provider's subclass to classify provider specific
+        errors.
+
+        @type status: C{int}
+        @type error: C{Exception}
+
+        @rtype: C{bool}
+        """
+        return status == 429
+
+    def is_read_only_request(self, method, action, params):
+        """
+        Return True if a request doesn't modify any resource.
+
+        Set L{follows_http_semantics} for the APIs which use the HTTP method
+        to tell read and write operations apart, override in a provider's
+        subclass for the APIs which don't.
+
+        @type method: C{str}
+        @type action: C{str}
+        @type params: C{dict}
+
+        @rtype: C{bool}
+        """
+        method = (method or 'GET').upper()
+
+        if self.follows_http_semantics and method == 'GET':
+            return True
+
+        return method in ('HEAD', 'OPTIONS')
+
+    def is_idempotent_request(self, method, action, params):
+        """
+        Return True if a request can safely be performed more than once (only
+        idempotent requests are retried after a transient error).
+
+        @type method: C{str}
+        @type action: C{str}
+        @type params: C{dict}
+
+        @rtype: C{bool}
+        """
+        if self.is_read_only_request(method=method, action=action,
+                                     params=params):
+            return True
+
+        if not self.follows_http_semantics:
+            return False
+
+        return (method or 'GET').upper() in ('PUT', 'DELETE')
+
+    def get_request_class(self, method, action, params):
+        """
+        Return the class of a request which is used to pick its rate limit
+        (see L{rate_limits}).
+
+        @rtype: C{str}
+        """
+        if self.is_read_only_request(method=method, action=action,
+                                     params=params):
+            return 'read'
+
+        return 'write'
+
+    def get_rate_limit_key(self):
+        """
+        Return the key of the rate limits this connection shares with the
+        other connections which use the same account.
+
+        @rtype: C{tuple}
+        """
+        driver = getattr(self, 'driver', None)
+        provider = getattr(driver, 'type', None) or \
+            '%s.%s' % (self.__class__.__module__, self.__class__.__name__)
+        region = getattr(driver, 'region_name', None) or self.host
+
+        # Credentials are hashed so they are not kept around in the keys
+        credentials = '%s:%s' % (getattr(self, 'user_id', None),
+                                 getattr(self, 'key', None))
+        credentials = hashlib.sha1(b(credentials)).hexdigest()
+
+        return (provider, credentials, region)
+
+    def _wait_for_rate_limit(self, method, action, params):
+        """
+        Wait until the request is allowed by the rate limit of its class.
+
+        @return: Number of seconds the request has been delayed.
+        @rtype: C{float}
+        """
+        delay = self._reserve_rate_limit(method=method, action=action,
+                                         params=params)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
+
+    def _reserve_rate_limit(self, method, action, params):
+        """
+        Take a token for the request from the rate limit of its class without
+        waiting (see L{_wait_for_rate_limit}).
+
+        @return: Number of seconds the caller has to wait before sending the
+                 request.
+        @rtype: C{float}
+        """
+        request_class = self.get_request_class(method=method, action=action,
+                                               params=params)
+        limit = self.rate_limits.get(request_class, None)
+
+        if limit is None:
+            return 0
+
+        rate, capacity = limit
+        key = self.get_rate_limit_key() + (request_class,)
+        bucket = get_token_bucket(key, rate=rate, capacity=capacity)
+        return bucket.reserve()
+
 
 class PollingConnection(Connection):
     """
@@ -635,8 +1252,16 @@ class PollingConnection(Connection):
     After initial requests, this class periodically polls for jobs status and
     waits until the job has finished.
     If job doesn't finish in timeout seconds, an Exception thrown.
+
+    By default, the delay between polls starts at poll_interval seconds and
+    is doubled after every poll up to max_poll_interval seconds. A different
+    L{libcloud.common.polling.PollingStrategy} can be used by setting
+    poll_strategy.
     """
     poll_interval = 0.5
+    max_poll_interval = 10
+    poll_strategy = None
+    poll_scheduler = None
     timeout = 200
     request_method = 'request'
 
@@ -682,23 +1307,20 @@ class PollingConnection(Connection):
         @return: An instance of type I{responseCls}
         """
 
-        request = getattr(self, self.request_method)
-        kwargs = self.get_request_kwargs(action=action, params=params,
+        poll = self._start_async_request(action=action, params=params,
                                          data=data, headers=headers,
-                                         method=method,
-                                         context=context)
-        response = request(**kwargs)
-        kwargs = self.get_poll_request_kwargs(response=response,
-                                              context=context,
-                                              request_kwargs=kwargs)
+                                         method=method, context=context)
+        strategy = self.get_poll_strategy()
 
         end = time.time() + self.timeout
+        attempt = 0
         completed = False
         while time.time() < end and not completed:
-            response = request(**kwargs)
-            completed = self.has_completed(response=response)
+            completed, response = poll()
+            attempt += 1
             if not completed:
-                time.sleep(self.poll_interval)
+                delay = strategy.next_delay(attempt, response)
+                time.sleep(max(min(delay, end - time.time()), 0))
 
         if not completed:
             raise LibcloudError('Job did not complete in %s seconds' %
@@ -706,6 +1328,64 @@ class PollingConnection(Connection):
 
         return response
 
+    def submit_async_request(self, action, params=None, data='',
+                             headers=None, method='GET', context=None):
+        """
+        Perform an 'async' request to the specified path and return a handle
+        of the job without waiting for it to complete.
+
+        The initial request is performed immediately and the job status is
+        then polled by a L{libcloud.common.polling.PollingScheduler} which
+        polls all the submitted jobs from a single thread.
+
+        Arguments are the same as for L{async_request}.
+
+        @return: Job handle. Its result() method returns the response of the
+                 last poll request once the job has completed.
+        @rtype: L{libcloud.common.polling.PollingFuture}
+        """
+        poll = self._start_async_request(action=action, params=params,
+                                         data=data, headers=headers,
+                                         method=method, context=context)
+        scheduler = self.poll_scheduler or get_default_scheduler()
+        return scheduler.submit(poll=poll, strategy=self.get_poll_strategy(),
+                                timeout=self.timeout)
+
+    def get_poll_strategy(self):
+        """
+        Return a strategy which decides when the job status is polled.
+
+        @rtype: L{libcloud.common.polling.PollingStrategy}
+        """
+        if self.poll_strategy is not None:
+            return self.poll_strategy
+
+        return ExponentialBackoffPollingStrategy(
+            initial_interval=self.poll_interval,
+            max_interval=max(self.max_poll_interval, self.poll_interval))
+
+    def _start_async_request(self, action, params, data, headers, method,
+                             context):
+        """
+        Perform the initial request and return a function which polls the
+        job status and returns a (completed, response) tuple.
+        """
+        request = getattr(self, self.request_method)
+        kwargs = self.get_request_kwargs(action=action, params=params,
+                                         data=data, headers=headers,
+                                         method=method,
+                                         context=context)
+        response = request(**kwargs)
+        kwargs = self.get_poll_request_kwargs(response=response,
+                                              context=context,
+                                              request_kwargs=kwargs)
+
+        def poll():
+            response = request(**kwargs)
+            return self.has_completed(response=response), response
+
+        return poll
+
     def get_request_kwargs(self, action, params=None, data='', headers=None,
                            method='GET', context=None):
         """
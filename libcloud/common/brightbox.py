@@ -49,6 +49,7 @@ class BrightboxConnection(ConnectionUserAndKey):
 
     host = 'api.gb1.brightbox.com'
     responseCls = BrightboxResponse
+    follows_http_semantics = True
 
     def _fetch_oauth_token(self):
         body = json.dumps({'client_id': self.user_id, 'grant_type': 'none'})
@@ -0,0 +1,257 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Expiring caches used to store the results of read-only driver calls (see
+L{libcloud.compute.base.NodeDriver.enable_cache}).
+
+Entries are grouped in namespaces (e.g. one namespace per driver and
+method) so all the entries of a namespace can be invalidated at once.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import os
+import sys
+import time
+import errno
+import hashlib
+import threading
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from libcloud.utils.py3 import b
+
+__all__ = [
+    'CacheBackend',
+    'MemoryCacheBackend',
+    'FileCacheBackend'
+]
+
+
+class CacheBackend(object):
+    """
+    Base class for the cache backends.
+    """
+
+    def get(self, namespace, key):
+        """
+        Return cached value or raise C{KeyError} if there is no (unexpired)
+        value for this key.
+
+        @type namespace: C{str}
+        @type key: C{str}
+        """
+        raise NotImplementedError('get not implemented for this backend')
+
+    def set(self, namespace, key, value, ttl):
+        """
+        Store a value for ttl seconds.
+
+        @type namespace: C{str}
+        @type key: C{str}
+
+        @param value: Value, must be picklable for the backends which store
+                      values outside of the process.
+
+        @type ttl: C{float}
+        """
+        raise NotImplementedError('set not implemented for this backend')
+
+    def clear(self, namespace=None):
+        """
+        Remove all the entries of a namespace (or all the entries if
+        namespace is None).
+
+        @type namespace: C{str}
+        """
+        raise NotImplementedError('clear not implemented for this backend')
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process cache which keeps at most max_entries entries. The least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries=1000):
+        """
+        @type max_entries: C{int}
+        """
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # (namespace, key) -> (expires, last_used, value)
+        self._entries = {}
+        self._counter = 0
+
+    def get(self, namespace, key):
+        with self._lock:
+            expires, _, value = self._entries[(namespace, key)]
+
+            if expires < time.time():
+                del self._entries[(namespace, key)]
+                raise KeyError(key)
+
+            self._counter += 1
+            self._entries[(namespace, key)] = (expires, self._counter, value)
+            return value
+
+    def set(self, namespace, key, value, ttl):
+        with self._lock:
+            self._counter += 1
+            self._entries[(namespace, key)] = (time.time() + ttl,
+                                               self._counter, value)
+
+            if len(self._entries) > self.max_entries:
+                self._evict()
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                return
+
+            for entry_key in list(self._entries.keys()):
+                if entry_key[0] == namespace:
+                    del self._entries[entry_key]
+
+    def _evict(self):
+        # Expired entries first, then the least recently used ones
+        now = time.time()
+
+        for entry_key, (expires, _, _) in list(self._entries.items()):
+            if expires < now:
+                del self._entries[entry_key]
+
+        if len(self._entries) <= self.max_entries:
+            return
+
+        by_usage = sorted(self._entries.items(),
+                          key=lambda item: item[1][1])
+
+        for entry_key, _ in by_usage[:len(self._entries) - self.max_entries]:
+            del self._entries[entry_key]
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    Cache which stores pickled entries in a directory so they can be shared
+    by multiple processes.
+
+    Every namespace is stored in its own sub-directory and every entry in its
+    own file. Files are written to a temporary file first and then renamed
+    so readers never see a partially written entry.
+    """
+
+    def __init__(self, directory):
+        """
+        @param directory: Directory where the entries are stored, it's
+                          created if it doesn't exist.
+        @type directory: C{str}
+        """
+        self.directory = directory
+
+    def get(self, namespace, key):
+        path = self._get_path(namespace, key)
+
+        try:
+            fp = open(path, 'rb')
+        except IOError:
+            raise KeyError(key)
+
+        try:
+            try:
+                expires, value = pickle.load(fp)
+            except Exception:
+                # Corrupted or incompatible entry
+                raise KeyError(key)
+        finally:
+            fp.close()
+
+        if expires < time.time():
+            self._remove(path)
+            raise KeyError(key)
+
+        return value
+
+    def set(self, namespace, key, value, ttl):
+        path = self._get_path(namespace, key)
+        directory = os.path.dirname(path)
+        self._makedirs(directory)
+
+        # tempfile is slow to import and only needed by this backend
+        import tempfile
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        fp = os.fdopen(fd, 'wb')
+
+        try:
+            pickle.dump((time.time() + ttl, value), fp,
+                        pickle.HIGHEST_PROTOCOL)
+        finally:
+            fp.close()
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Windows doesn't allow renaming over an existing file
+            self._remove(path)
+            os.rename(tmp_path, path)
+
+    def clear(self, namespace=None):
+        if namespace is None:
+            directories = self._listdir(self.directory)
+        else:
+            directories = [self._hash(namespace)]
+
+        for name in directories:
+            directory = os.path.join(self.directory, name)
+
+            for file_name in self._listdir(directory):
+                self._remove(os.path.join(directory, file_name))
+
+    def _get_path(self, namespace, key):
+        return os.path.join(self.directory, self._hash(namespace),
+                            self._hash(key))
+
+    def _hash(self, value):
+        return hashlib.sha1(b(value)).hexdigest()
+
+    def _makedirs(self, directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    def _listdir(self, directory):
+        try:
+            return os.listdir(directory)
+        except OSError:
+            return []
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            e = sys.exc_info()[1]
+
+            if e.errno != errno.ENOENT:
+                raise
@@ -35,6 +35,9 @@ class CloudStackConnection(ConnectionUserAndKey, PollingConnection):
     request_method = '_sync_request'
     timeout = 600
 
+    # Number of items requested per page by _paginated_request
+    page_size = 500
+
     ASYNC_PENDING = 0
     ASYNC_SUCCESS = 1
     ASYNC_FAILURE = 2
@@ -59,6 +62,11 @@ class CloudStackConnection(ConnectionUserAndKey, PollingConnection):
 
         return params, headers
 
+    def is_read_only_request(self, method, action, params):
+        # All the commands use GET
+        command = dict(params or {}).get('command', '')
+        return command.startswith('list') or command.startswith('query')
+
     def _async_request(self, command, **kwargs):
         context = {'command': command}
         context.update(kwargs)
@@ -103,6 +111,28 @@ class CloudStackConnection(ConnectionUserAndKey, PollingConnection):
         result = result.object[command]
         return result
 
+    def _paginated_request(self, command, key, **kwargs):
+        """This method retrieves all the items returned by a list* command
+           using page and pagesize parameters. A list of the items stored
+           under the provided key of the response is returned."""
+
+        items = []
+        page = 1
+
+        while True:
+            result = self._sync_request(command, page=page,
+                                        pagesize=self.page_size, **kwargs)
+            values = result.get(key, [])
+            items.extend(values)
+
+            count = result.get('count', None)
+
+            if len(values) < self.page_size or \
+               (count is not None and len(items) >= count):
+                return items
+
+            page += 1
+
 
 class CloudStackDriverMixIn(object):
     host = None
@@ -120,3 +150,6 @@ class CloudStackDriverMixIn(object):
 
     def _async_request(self, command, **kwargs):
         return self.connection._async_request(command, **kwargs)
+
+    def _paginated_request(self, command, key, **kwargs):
+        return self.connection._paginated_request(command, key, **kwargs)
@@ -0,0 +1,286 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Request instrumentation.
+
+Every request performed by L{libcloud.common.base.Connection.request}
+emits a L{RequestEvent} to the registered listeners once it has finished
+(successfully or not). L{LatencyAggregator} is a listener which keeps
+per-operation latency histograms in memory.
+
+Example::
+
+    aggregator = LatencyAggregator()
+    add_listener(aggregator)
+    ...
+    print(aggregator.dump())
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import threading
+
+__all__ = [
+    'RequestEvent',
+    'LatencyAggregator',
+    'add_listener',
+    'remove_listener',
+    'has_listeners',
+    'emit',
+    'get_operation_name'
+]
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener):
+    """
+    Register a callable which is called with a L{RequestEvent} after every
+    request.
+
+    Listeners are called from the thread which performed the request and
+    exceptions raised by them are ignored.
+
+    @type listener: C{callable}
+    """
+    global _listeners
+
+    with _listeners_lock:
+        # List is replaced (not modified) so emit doesn't need the lock
+        _listeners = _listeners + [listener]
+
+
+def remove_listener(listener):
+    """
+    Unregister a listener.
+
+    @type listener: C{callable}
+    """
+    global _listeners
+
+    with _listeners_lock:
+        _listeners = [value for value in _listeners if value is not listener]
+
+
+def has_listeners():
+    """
+    @rtype: C{bool}
+    """
+    return len(_listeners) > 0
+
+
+def emit(event):
+    """
+    Send an event to all the registered listeners.
+
+    @type event: L{RequestEvent}
+    """
+    for listener in _listeners:
+        try:
+            listener(event)
+        except Exception:
+            pass
+
+
+class RequestEvent(object):
+    """
+    Describes a finished request.
+
+    Timings are in seconds and stored in the timings dictionary. Only the
+    phases which have been performed are present:
+
+        - throttle: waiting for the client side rate limit (see
+          L{libcloud.common.ratelimit})
+        - sign: pre_connect_hook (request signing)
+        - connect: DNS resolution, TCP connect and TLS handshake (not present
+          if a kept-alive connection has been reused)
+        - tls: TLS handshake (only for verified HTTPS connections)
+        - send: sending the request line, headers and body
+        - first_byte: waiting for the response status line and headers
+        - parse: reading the body and parsing it using responseCls
+        - total: whole request
+    """
+
+    def __init__(self, driver, host, action, operation, method, params=None):
+        self.driver = driver
+        self.host = host
+        self.action = action
+        self.operation = operation
+        self.method = method
+        self.params = params
+
+        self.status = None
+        self.headers = {}
+        self.bytes_sent = 0
+        self.bytes_received = None
+        self.connection_reused = False
+        self.retries = 0
+        self.error = None
+        self.timings = {}
+
+    def __repr__(self):
+        return (('<RequestEvent: driver=%s, method=%s, operation=%s, '
+                 'status=%s, total=%.3f>') %
+                (self.driver, self.method, self.operation, self.status,
+                 self.timings.get('total', 0)))
+
+
+def get_operation_name(action, params):
+    """
+    Return the name of the API operation performed by a request.
+
+    Query APIs (EC2, CloudStack...) use the same path for all the operations
+    and specify the operation with a parameter.
+    """
+    if not params:
+        return action
+
+    if not isinstance(params, dict):
+        # Some drivers pass a list of (name, value) tuples
+        params = dict(params)
+
+    return params.get('Action', None) or params.get('command', None) or \
+        action
+
+
+class LatencyAggregator(object):
+    """
+    Listener which aggregates request latencies per (driver, method,
+    operation) into histograms.
+    """
+
+    # Upper bounds of the histogram buckets in seconds
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=None):
+        """
+        @param buckets: Upper bounds of the histogram buckets in seconds.
+        @type buckets: C{tuple} of C{float}
+        """
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def __call__(self, event):
+        key = (event.driver, event.method, event.operation)
+        total = event.timings.get('total', 0)
+
+        with self._lock:
+            stats = self._stats.get(key, None)
+
+            if stats is None:
+                stats = {'count': 0, 'errors': 0, 'retries': 0, 'sum': 0,
+                         'min': None, 'max': None,
+                         'buckets': [0] * (len(self.buckets) + 1)}
+                self._stats[key] = stats
+
+            stats['count'] += 1
+            stats['sum'] += total
+            stats['retries'] += event.retries
+
+            if event.error is not None or \
+               (event.status is not None and event.status >= 400):
+                stats['errors'] += 1
+
+            if stats['min'] is None or total < stats['min']:
+                stats['min'] = total
+            if stats['max'] is None or total > stats['max']:
+                stats['max'] = total
+
+            index = len(self.buckets)
+            for bucket_index, bound in enumerate(self.buckets):
+                if total <= bound:
+                    index = bucket_index
+                    break
+
+            stats['buckets'][index] += 1
+
+    def snapshot(self):
+        """
+        Return a copy of the aggregated statistics.
+
+        @return: Dictionary keyed by (driver, method, operation) tuples.
+                 Values are dictionaries with count, errors, retries, sum,
+                 min, max and buckets keys. buckets is a list of
+                 (upper bound, cumulative count) tuples, the last upper bound
+                 is None.
+        @rtype: C{dict}
+        """
+        with self._lock:
+            result = {}
+
+            for key, stats in self._stats.items():
+                stats = dict(stats)
+                bounds = list(self.buckets) + [None]
+                cumulative = 0
+                buckets = []
+
+                for bound, count in zip(bounds, stats['buckets']):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+
+                stats['buckets'] = buckets
+                result[key] = stats
+
+            return result
+
+    def reset(self):
+        """
+        Remove all the aggregated statistics.
+        """
+        with self._lock:
+            self._stats = {}
+
+    def dump(self):
+        """
+        Return the statistics in the Prometheus text exposition format.
+
+        @rtype: C{str}
+        """
+        lines = ['# TYPE libcloud_request_duration_seconds histogram']
+        errors = ['# TYPE libcloud_request_errors_total counter']
+
+        snapshot = self.snapshot()
+
+        keys = sorted(snapshot.keys(), key=lambda key: tuple(map(str, key)))
+
+        for key in keys:
+            stats = snapshot[key]
+            labels = 'driver="%s",method="%s",operation="%s"' % \
+                tuple([_escape_label(value) for value in key])
+
+            for bound, count in stats['buckets']:
+                if bound is None:
+                    bound = '+Inf'
+                lines.append('libcloud_request_duration_seconds_bucket'
+                             '{%s,le="%s"} %s' % (labels, bound, count))
+
+            lines.append('libcloud_request_duration_seconds_sum{%s} %s' %
+                         (labels, stats['sum']))
+            lines.append('libcloud_request_duration_seconds_count{%s} %s' %
+                         (labels, stats['count']))
+            errors.append('libcloud_request_errors_total{%s} %s' %
+                          (labels, stats['errors']))
+
+        return '\n'.join(lines + errors) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
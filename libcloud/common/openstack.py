@@ -19,10 +19,12 @@ Common utilities for OpenStack
 import sys
 import binascii
 import os
+import threading
 
 from libcloud.utils.py3 import httplib
 
 from libcloud.common.base import ConnectionUserAndKey, Response
+from libcloud.common.base import _request_state_property
 from libcloud.compute.types import (LibcloudError, InvalidCredsError,
                                     MalformedResponseError)
 
@@ -328,6 +330,38 @@ class OpenStackServiceCatalog(object):
                 catalog[region].append(endpoint)
 
 
+def _endpoint_property(name, index):
+    """
+    Return a property for a part of the endpoint (host, port, secure or
+    request path) requests are sent to.
+
+    The endpoint selected by the current thread (see
+    L{OpenStackBaseConnection._populate_hosts_and_request_paths}) takes
+    precedence over the value which is shared by all the threads.
+
+    @type name: C{str}
+    @param name: Attribute name.
+
+    @type index: C{int}
+    @param index: Index of the value in the endpoint tuple.
+    """
+    def getter(self):
+        endpoint = self._endpoint
+
+        if endpoint is not None:
+            return endpoint[index]
+
+        if name in self.__dict__:
+            return self.__dict__[name]
+
+        return getattr(super(OpenStackBaseConnection, self), name)
+
+    def setter(self, value):
+        self.__dict__[name] = value
+
+    return property(getter, setter)
+
+
 class OpenStackBaseConnection(ConnectionUserAndKey):
 
     """
@@ -388,6 +422,15 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
     service_type = None
     service_name = None
     service_region = None
+    follows_http_semantics = True
+
+    # Drivers can pick a different endpoint per request (e.g. CloudFiles CDN
+    # requests), so the endpoint is stored per thread
+    _endpoint = _request_state_property('endpoint')
+    host = _endpoint_property('host', 0)
+    port = _endpoint_property('port', 1)
+    secure = _endpoint_property('secure', 2)
+    request_path = _endpoint_property('request_path', 3)
 
     def __init__(self, user_id, key, secure=True,
                  host=None, port=None, timeout=None,
@@ -418,6 +461,10 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
         if not self._auth_version:
             self._auth_version = AUTH_API_VERSION
 
+        # Serializes authentication when the connection is shared by
+        # multiple threads
+        self._auth_lock = threading.Lock()
+
         super(OpenStackBaseConnection, self).__init__(
             user_id, key, secure=secure, timeout=timeout)
 
@@ -458,6 +505,14 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
     def request(self, **kwargs):
         return super(OpenStackBaseConnection, self).request(**kwargs)
 
+    def is_throttling_error(self, status, error):
+        # Rate limited requests fail with "413 overLimit"
+        if status == httplib.REQUEST_ENTITY_TOO_LARGE:
+            return True
+
+        return super(OpenStackBaseConnection, self).is_throttling_error(
+            status, error)
+
     def _populate_hosts_and_request_paths(self):
         """
         OpenStack uses a separate host for API calls which is only provided
@@ -465,35 +520,49 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
         """
 
         if not self.auth_token:
-            aurl = self.auth_url
+            self._auth_lock.acquire()
+            try:
+                # Another thread might have authenticated in the mean time
+                if not self.auth_token:
+                    self._authenticate()
+            finally:
+                self._auth_lock.release()
+
+        # Set up connection info
+        url = self._ex_force_base_url or self.get_endpoint()
+        self._endpoint = self._tuple_from_url(url)
+
+    def _authenticate(self):
+        """
+        Authenticate against the auth endpoint and populate the auth token and
+        the service catalog.
+        """
+        aurl = self.auth_url
 
-            if self._ex_force_auth_url != None:
-                aurl = self._ex_force_auth_url
+        if self._ex_force_auth_url != None:
+            aurl = self._ex_force_auth_url
 
-            if aurl == None:
-                raise LibcloudError('OpenStack instance must ' +
-                                    'have auth_url set')
+        if aurl == None:
+            raise LibcloudError('OpenStack instance must ' +
+                                'have auth_url set')
 
-            osa = OpenStackAuthConnection(self, aurl, self._auth_version,
-                                          self.user_id, self.key,
-                                          tenant_name=self._ex_tenant_name,
-                                          timeout=self.timeout)
+        osa = OpenStackAuthConnection(self, aurl, self._auth_version,
+                                      self.user_id, self.key,
+                                      tenant_name=self._ex_tenant_name,
+                                      timeout=self.timeout)
 
-            # may throw InvalidCreds, etc
-            osa.authenticate()
+        # may throw InvalidCreds, etc
+        osa.authenticate()
 
-            self.auth_token = osa.auth_token
-            self.auth_token_expires = osa.auth_token_expires
-            self.auth_user_info = osa.auth_user_info
+        # pull out and parse the service catalog
+        self.service_catalog = OpenStackServiceCatalog(osa.urls,
+                ex_force_auth_version=self._auth_version)
 
-            # pull out and parse the service catalog
-            self.service_catalog = OpenStackServiceCatalog(osa.urls,
-                    ex_force_auth_version=self._auth_version)
+        self.auth_token_expires = osa.auth_token_expires
+        self.auth_user_info = osa.auth_user_info
 
-        # Set up connection info
-        url = self._ex_force_base_url or self.get_endpoint()
-        (self.host, self.port, self.secure, self.request_path) = \
-                self._tuple_from_url(url)
+        # Set last, other threads treat a token as a finished authentication
+        self.auth_token = osa.auth_token
 
     def _add_cache_busting_to_params(self, params):
         cache_busting_number = binascii.hexlify(os.urandom(8))
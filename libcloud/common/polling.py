@@ -0,0 +1,463 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Polling strategies and a scheduler which polls the status of many pending
+jobs (see L{libcloud.common.base.PollingConnection}) from a single thread.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import time
+import heapq
+import random
+import threading
+
+from email.utils import parsedate_tz, mktime_tz
+
+from libcloud.common.types import LibcloudError
+from libcloud.utils.parallel import parallel_imap_unordered
+
+__all__ = [
+    'PollingStrategy',
+    'FixedPollingStrategy',
+    'ExponentialBackoffPollingStrategy',
+    'PollingFuture',
+    'PollingScheduler',
+    'get_default_scheduler',
+    'get_retry_after'
+]
+
+
+def get_retry_after(response):
+    """
+    Return number of seconds the server asked the client to wait using the
+    Retry-After header or None if the header is not present.
+
+    @param response: Response object returned by a poll request.
+    @type response: L{libcloud.common.base.Response}
+
+    @rtype: C{float}
+    """
+    headers = getattr(response, 'headers', None)
+
+    if not isinstance(headers, dict):
+        return None
+
+    value = headers.get('retry-after', None)
+
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    # HTTP-date
+    parsed = parsedate_tz(value)
+
+    if parsed is None:
+        return None
+
+    return max(mktime_tz(parsed) - time.time(), 0)
+
+
+class PollingStrategy(object):
+    """
+    Decides how long to wait before the next poll of a pending job.
+
+    If the server sends a Retry-After header, the delay is at least the
+    requested number of seconds (up to max_retry_after).
+    """
+
+    honor_retry_after = True
+    max_retry_after = 300
+
+    def get_delay(self, attempt):
+        """
+        Return number of seconds to wait before the next poll.
+
+        @param attempt: Number of polls which have been performed so far
+                        (starting at 1).
+        @type attempt: C{int}
+
+        @rtype: C{float}
+        """
+        raise NotImplementedError('get_delay not implemented')
+
+    def next_delay(self, attempt, response=None):
+        """
+        Return number of seconds to wait before the next poll taking the
+        Retry-After header of the last response into account.
+
+        @rtype: C{float}
+        """
+        delay = self.get_delay(attempt)
+
+        if self.honor_retry_after:
+            retry_after = get_retry_after(response)
+
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_retry_after))
+
+        return delay
+
+
+class FixedPollingStrategy(PollingStrategy):
+    """
+    Poll every interval seconds.
+    """
+
+    def __init__(self, interval):
+        """
+        @param interval: Number of seconds between polls.
+        @type interval: C{float}
+        """
+        self.interval = interval
+
+    def get_delay(self, attempt):
+        return self.interval
+
+
+class ExponentialBackoffPollingStrategy(PollingStrategy):
+    """
+    Start polling every initial_interval seconds and multiply the interval by
+    factor after every poll (up to max_interval seconds).
+
+    A random jitter of +/- jitter * interval is added to the delay so jobs
+    which have been submitted at the same time don't keep being polled at
+    the same time.
+    """
+
+    def __init__(self, initial_interval=0.5, factor=2, max_interval=30,
+                 jitter=0.1):
+        """
+        @param initial_interval: Number of seconds before the second poll.
+        @type initial_interval: C{float}
+
+        @param factor: Multiplier applied to the interval after every poll.
+        @type factor: C{float}
+
+        @param max_interval: Maximum number of seconds between polls.
+        @type max_interval: C{float}
+
+        @param jitter: Maximum jitter as a fraction of the interval.
+        @type jitter: C{float}
+        """
+        self.initial_interval = initial_interval
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+    def get_delay(self, attempt):
+        # Cap the exponent so the computation can't overflow
+        exponent = min(max(attempt - 1, 0), 64)
+        delay = min(self.initial_interval * (self.factor ** exponent),
+                    self.max_interval)
+
+        if self.jitter:
+            delay += delay * random.uniform(-self.jitter, self.jitter)
+
+        return max(delay, 0)
+
+
+class PollingFuture(object):
+    """
+    Handle of a job which is polled by a L{PollingScheduler}.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exception = None
+        self._cancelled = False
+        self._callbacks = []
+
+    def done(self):
+        """
+        Return True if the job has completed, failed or has been cancelled.
+
+        @rtype: C{bool}
+        """
+        return self._event.isSet()
+
+    def cancelled(self):
+        """
+        @rtype: C{bool}
+        """
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Stop polling the job. The job itself is not cancelled on the server.
+
+        @return: False if the job has already finished, True otherwise.
+        @rtype: C{bool}
+        """
+        with self._lock:
+            if self._event.isSet():
+                return False
+
+            self._cancelled = True
+            self._exception = LibcloudError('Job has been cancelled')
+
+        self._finish()
+        return True
+
+    def result(self, timeout=None):
+        """
+        Wait until the job has finished and return the last poll response.
+
+        @param timeout: Maximum number of seconds to wait (default is to wait
+                        until the polling timeout of the job is reached).
+        @type timeout: C{float}
+
+        @return: Response of the last poll request.
+        """
+        self._wait(timeout)
+
+        if self._exception is not None:
+            raise self._exception
+
+        return self._result
+
+    def exception(self, timeout=None):
+        """
+        Wait until the job has finished and return the exception which was
+        raised while polling it or None.
+        """
+        self._wait(timeout)
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """
+        Call callback with this future as the only argument once the job has
+        finished. If the job has already finished, the callback is called
+        immediately.
+
+        @type callback: C{callable}
+        """
+        with self._lock:
+            if not self._event.isSet():
+                self._callbacks.append(callback)
+                return
+
+        callback(self)
+
+    def _set_result(self, result):
+        with self._lock:
+            if self._event.isSet():
+                return
+
+            self._result = result
+
+        self._finish()
+
+    def _set_exception(self, exception):
+        with self._lock:
+            if self._event.isSet():
+                return
+
+            self._exception = exception
+
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+    def _wait(self, timeout):
+        self._event.wait(timeout)
+
+        if not self._event.isSet():
+            raise LibcloudError('Job did not finish in %s seconds' %
+                                (timeout))
+
+
+class _PollingJob(object):
+    def __init__(self, poll, strategy, deadline, timeout, future):
+        self.poll = poll
+        self.strategy = strategy
+        self.deadline = deadline
+        self.timeout = timeout
+        self.future = future
+        self.attempt = 0
+
+
+class PollingScheduler(object):
+    """
+    Polls the status of many pending jobs from a single background thread.
+
+    Jobs are kept in a heap ordered by the time of their next poll. All the
+    jobs which are due are polled using at most max_workers threads and are
+    then rescheduled according to their polling strategy. The background
+    thread is started when a job is submitted and exits once there are no
+    pending jobs.
+    """
+
+    def __init__(self, max_workers=4):
+        """
+        @param max_workers: Maximum number of poll requests which are
+                            performed at the same time.
+        @type max_workers: C{int}
+        """
+        self.max_workers = max_workers
+
+        self._condition = threading.Condition()
+        self._jobs = []
+        self._counter = 0
+        self._thread = None
+
+    def submit(self, poll, strategy, timeout):
+        """
+        Start polling a job.
+
+        @param poll: Function which performs a single poll request and
+                     returns a C{(completed, response)} tuple.
+        @type poll: C{callable}
+
+        @param strategy: Strategy which decides when the job is polled next.
+        @type strategy: L{PollingStrategy}
+
+        @param timeout: Number of seconds after which the job is considered
+                        failed.
+        @type timeout: C{float}
+
+        @rtype: L{PollingFuture}
+        """
+        future = PollingFuture()
+        now = time.time()
+        job = _PollingJob(poll=poll, strategy=strategy,
+                          deadline=now + timeout, timeout=timeout,
+                          future=future)
+
+        with self._condition:
+            self._push(now, job)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.setDaemon(True)
+                self._thread.start()
+
+            self._condition.notify()
+
+        return future
+
+    def pending(self):
+        """
+        Return number of jobs which are being polled.
+
+        @rtype: C{int}
+        """
+        with self._condition:
+            return len(self._jobs)
+
+    def _push(self, due, job):
+        # Counter keeps the heap ordering stable for jobs due at the same time
+        self._counter += 1
+        heapq.heappush(self._jobs, (due, self._counter, job))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due = self._pop_due_jobs()
+
+                if due is None:
+                    self._thread = None
+                    return
+
+            for _, job, _, error in parallel_imap_unordered(
+                    self._poll, due, max_workers=self.max_workers):
+                if error is not None:
+                    job.future._set_exception(error)
+
+    def _pop_due_jobs(self):
+        # Called with the condition held. Waits until at least one job is
+        # due and returns all the due jobs or None if there are no jobs.
+        while True:
+            while self._jobs and self._jobs[0][2].future.done():
+                # Cancelled job
+                heapq.heappop(self._jobs)
+
+            if not self._jobs:
+                return None
+
+            now = time.time()
+
+            if self._jobs[0][0] <= now:
+                break
+
+            self._condition.wait(self._jobs[0][0] - now)
+
+        due = []
+
+        while self._jobs and self._jobs[0][0] <= now:
+            job = heapq.heappop(self._jobs)[2]
+
+            if not job.future.done():
+                due.append(job)
+
+        return due
+
+    def _poll(self, job):
+        completed, response = job.poll()
+        job.attempt += 1
+
+        if completed:
+            job.future._set_result(response)
+            return
+
+        now = time.time()
+
+        if now >= job.deadline:
+            job.future._set_exception(
+                LibcloudError('Job did not complete in %s seconds' %
+                              (job.timeout)))
+            return
+
+        delay = job.strategy.next_delay(job.attempt, response)
+
+        with self._condition:
+            self._push(min(now + delay, job.deadline), job)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """
+    Return the L{PollingScheduler} which is shared by all the connections.
+
+    @rtype: L{PollingScheduler}
+    """
+    global _default_scheduler
+
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = PollingScheduler()
+
+        return _default_scheduler
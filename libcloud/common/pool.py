@@ -0,0 +1,185 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of reusable HTTP/1.1 keep-alive connections.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import select
+import socket
+import threading
+import time
+
+__all__ = [
+    'ConnectionPool',
+    'is_connection_dropped'
+]
+
+
+def is_connection_dropped(connection):
+    """
+    Return True if the remote end has closed the socket of an idle connection.
+
+    An idle keep-alive socket should never be readable. If it is, the server
+    has either closed it (read would return EOF) or sent unexpected data and
+    the connection can't be safely reused.
+
+    Connection objects which don't expose a socket (e.g. mock connections
+    used in the tests) can't be checked and are always considered dropped so
+    they are never reused.
+
+    @type connection: C{httplib.HTTPConnection}
+    @param connection: Connection to check.
+
+    @rtype: C{bool}
+    """
+    sock = getattr(connection, 'sock', None)
+
+    if sock is None:
+        # Not connected (yet or anymore), httplib will reconnect on the next
+        # request so there is nothing worth keeping.
+        return True
+
+    try:
+        readable, _, _ = select.select([sock], [], [], 0.0)
+    except (select.error, socket.error, ValueError, TypeError):
+        return True
+
+    return bool(readable)
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of idle connections keyed by (class, host, port, secure,
+    timeout).
+
+    Connections are handed out with L{acquire} and must be given back with
+    L{release} once the response has been fully read. Connections which have
+    been idle for longer than C{idle_timeout} seconds or whose socket has been
+    closed by the server are discarded instead of being reused.
+    """
+
+    def __init__(self, max_size=10, idle_timeout=60):
+        """
+        @type max_size: C{int}
+        @param max_size: Maximum number of idle connections kept per key.
+
+        @type idle_timeout: C{int}
+        @param idle_timeout: Number of seconds after which an idle connection
+                             is closed and evicted.
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def acquire(self, key):
+        """
+        Return an idle connection for the provided key or None if there is no
+        usable connection available.
+        """
+        now = time.time()
+
+        while True:
+            with self._lock:
+                connections = self._idle.get(key, None)
+
+                if not connections:
+                    return None
+
+                # LIFO - the most recently used socket is the least likely to
+                # have been closed by the server
+                last_used, connection = connections.pop()
+
+            if (now - last_used) > self.idle_timeout or \
+               is_connection_dropped(connection):
+                self._close(connection)
+                continue
+
+            return connection
+
+    def release(self, key, connection):
+        """
+        Return a connection to the pool so it can be reused.
+        """
+        if is_connection_dropped(connection):
+            self._close(connection)
+            return
+
+        evicted = []
+
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            connections.append((time.time(), connection))
+
+            while len(connections) > self.max_size:
+                evicted.append(connections.pop(0)[1])
+
+        for connection in evicted:
+            self._close(connection)
+
+    def evict_idle(self):
+        """
+        Close and remove all the connections which have been idle for longer
+        than idle_timeout seconds.
+        """
+        threshold = time.time() - self.idle_timeout
+        evicted = []
+
+        with self._lock:
+            for key, connections in list(self._idle.items()):
+                fresh = [item for item in connections if item[0] >= threshold]
+                evicted.extend([item[1] for item in connections
+                                if item[0] < threshold])
+
+                if fresh:
+                    self._idle[key] = fresh
+                else:
+                    del self._idle[key]
+
+        for connection in evicted:
+            self._close(connection)
+
+    def clear(self):
+        """
+        Close and remove all the idle connections.
+        """
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for connections in idle.values():
+            for _, connection in connections:
+                self._close(connection)
+
+    def size(self, key=None):
+        """
+        Return number of idle connections (for the provided key).
+        """
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, []))
+
+            return sum([len(value) for value in self._idle.values()])
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,158 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Client side rate limiting.
+
+Requests performed by L{libcloud.common.base.Connection.request} are
+throttled by token buckets when the connection has rate_limits. Buckets are
+shared by all the connections (and threads) of the process which use the
+same provider, credentials and region, so many drivers working with the
+same account stay under the provider's API rate limit together.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import time
+import threading
+
+__all__ = [
+    'TokenBucket',
+    'get_token_bucket',
+    'clear_token_buckets'
+]
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class TokenBucket(object):
+    """
+    Token bucket which is refilled with rate tokens per second and holds at
+    most capacity tokens (the size of a burst).
+
+    Tokens are reserved in the order callers ask for them, a caller which has
+    to wait sleeps without holding the lock so the bucket is drained at a
+    steady rate by any number of threads.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        @param rate: Number of tokens added per second.
+        @type rate: C{float}
+
+        @param capacity: Maximum number of tokens (default is rate, but at
+                         least 1).
+        @type capacity: C{float}
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+
+        if capacity is None:
+            capacity = max(rate, 1)
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket and return the number of seconds the
+        caller has to wait before it can use them.
+
+        @rtype: C{float}
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+            if self._tokens >= 0:
+                return 0
+
+            return -self._tokens / self.rate
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens from the bucket if they are available right now.
+
+        @rtype: C{bool}
+        """
+        with self._lock:
+            self._refill()
+
+            if self._tokens < tokens:
+                return False
+
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, waiting until they are available.
+
+        @return: Number of seconds the caller has waited.
+        @rtype: C{float}
+        """
+        delay = self.reserve(tokens)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def __repr__(self):
+        return '<TokenBucket: rate=%s, capacity=%s>' % (self.rate,
+                                                         self.capacity)
+
+
+def get_token_bucket(key, rate, capacity=None):
+    """
+    Return the bucket shared by all the callers which use this key. The
+    bucket is created with rate and capacity by the first caller.
+
+    @param key: Hashable key, e.g. (provider, credentials hash, region,
+                request class).
+
+    @rtype: L{TokenBucket}
+    """
+    bucket = _buckets.get(key, None)
+
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key, None)
+
+            if bucket is None:
+                bucket = TokenBucket(rate=rate, capacity=capacity)
+                _buckets[key] = bucket
+
+    return bucket
+
+
+def clear_token_buckets():
+    """
+    Remove all the shared buckets (they are recreated on the next request).
+    """
+    with _buckets_lock:
+        _buckets.clear()
@@ -0,0 +1,111 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retry policy used by L{libcloud.common.base.Connection.request} to retry
+requests which have failed because of a transient error.
+
+Which errors are transient, which ones signal that the client is being
+throttled and which requests are safe to repeat is decided by the
+connection (is_transient_error, is_throttling_error and
+is_idempotent_request methods), so drivers can classify provider specific
+errors.
+"""
+
+import time
+
+from libcloud.common.polling import ExponentialBackoffPollingStrategy
+
+__all__ = [
+    'RetryPolicy'
+]
+
+
+class RetryPolicy(object):
+    """
+    Retry transient errors of idempotent requests and throttling errors of
+    any request with an exponential backoff (with jitter).
+
+    The delay before a retry is at least the number of seconds requested by
+    the server using the Retry-After header. A request is not retried if the
+    retry would start after the deadline.
+    """
+
+    def __init__(self, max_retries=3, deadline=60, backoff=None):
+        """
+        @param max_retries: Maximum number of retries per request.
+        @type max_retries: C{int}
+
+        @param deadline: Number of seconds (measured from the first attempt)
+                         after which a request is not retried anymore.
+        @type deadline: C{float}
+
+        @param backoff: Strategy which computes the delay before each retry.
+        @type backoff: L{libcloud.common.polling.PollingStrategy}
+        """
+        self.max_retries = max_retries
+        self.deadline = deadline
+
+        if backoff is None:
+            backoff = ExponentialBackoffPollingStrategy(initial_interval=0.5,
+                                                        factor=2,
+                                                        max_interval=10,
+                                                        jitter=0.2)
+        self.backoff = backoff
+
+    def get_retry_delay(self, connection, event, error, attempt, start):
+        """
+        Return number of seconds to wait before the request is retried or
+        None if it shouldn't be retried.
+
+        @param connection: Connection which performed the request.
+        @type connection: L{libcloud.common.base.Connection}
+
+        @param event: Event of the failed request (status and headers of the
+                      response if a response has been received).
+        @type event: L{libcloud.common.instrumentation.RequestEvent}
+
+        @param error: Exception raised by the request.
+        @type error: C{Exception}
+
+        @param attempt: Number of retries which have already been performed.
+        @type attempt: C{int}
+
+        @param start: Time of the first attempt.
+        @type start: C{float}
+
+        @rtype: C{float}
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        status = event.status
+
+        if not connection.is_throttling_error(status=status, error=error):
+            if not connection.is_transient_error(status=status, error=error):
+                return None
+
+            if not connection.is_idempotent_request(method=event.method,
+                                                    action=event.action,
+                                                    params=event.params):
+                return None
+
+        # event.headers holds the response headers (Retry-After)
+        delay = self.backoff.next_delay(attempt + 1, event)
+
+        if time.time() + delay > start + self.deadline:
+            return None
+
+        return delay
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
+import threading
+
 __all__ = [
     "LibcloudError",
     "MalformedResponseError",
@@ -81,43 +84,178 @@ InvalidCredsException = InvalidCredsError
 
 
 class LazyList(object):
+    """
+    List-like object which loads its items page by page using the provided
+    get_more callable.
+
+    Iterating over the list yields items as soon as the page containing them
+    has been retrieved. If prefetch is enabled, the next page is retrieved in
+    a background thread while the caller is consuming the current one.
+
+    If cache is disabled, retrieved items are not stored, which means memory
+    usage is bounded by the page size, but every iteration starts from the
+    beginning and retrieves all the pages again.
+    """
+
+    def __init__(self, get_more, value_dict=None, prefetch=False, cache=True):
+        """
+        @type get_more: C{callable}
+        @param get_more: Function which is called with last_key and
+                         value_dict keyword arguments and returns a tuple
+                         of (items, last_key, exhausted).
+
+        @type value_dict: C{dict}
+        @param value_dict: Dictionary which is passed to get_more.
 
-    def __init__(self, get_more, value_dict=None):
+        @type prefetch: C{bool}
+        @param prefetch: True to retrieve the next page in the background
+                         while the current page is being consumed.
+
+        @type cache: C{bool}
+        @param cache: False to drop the items once they have been yielded.
+                      Such a list only supports iteration.
+        """
         self._data = []
         self._last_key = None
         self._exhausted = False
         self._all_loaded = False
         self._get_more = get_more
         self._value_dict = value_dict or {}
+        self._prefetch = prefetch
+        self._cache = cache
+
+        self._lock = threading.Lock()
+        self._pending = None
 
     def __iter__(self):
-        if not self._all_loaded:
-            self._load_all()
+        if not self._cache:
+            for page in self._iter_pages():
+                for item in page:
+                    yield item
+            return
+
+        index = 0
+        while True:
+            while index < len(self._data):
+                yield self._data[index]
+                index += 1
 
-        data = self._data
-        for i in data:
-            yield i
+            if self._exhausted:
+                break
+
+            self._load_next_page()
 
     def __getitem__(self, index):
-        if index >= len(self._data) and not self._all_loaded:
+        self._check_cache('indexing')
+
+        if index < 0:
             self._load_all()
 
+        while index >= len(self._data) and not self._exhausted:
+            self._load_next_page()
+
         return self._data[index]
 
     def __len__(self):
+        self._check_cache('len()')
         self._load_all()
         return len(self._data)
 
     def __repr__(self):
+        if not self._cache:
+            return object.__repr__(self)
+
         self._load_all()
         repr_string = ', ' .join([repr(item) for item in self._data])
         repr_string = '[%s]' % (repr_string)
         return repr_string
 
+    def _check_cache(self, operation):
+        if not self._cache:
+            raise TypeError('%s is not supported if cache is disabled' %
+                            (operation))
+
     def _load_all(self):
         while not self._exhausted:
-            newdata, self._last_key, self._exhausted = \
-                     self._get_more(last_key=self._last_key,
-                                    value_dict=self._value_dict)
-            self._data.extend(newdata)
+            self._load_next_page()
         self._all_loaded = True
+
+    def _load_next_page(self):
+        self._lock.acquire()
+        try:
+            if self._exhausted:
+                return
+
+            if self._pending is not None:
+                fetcher, self._pending = self._pending, None
+                newdata, last_key, exhausted = fetcher.result()
+            else:
+                newdata, last_key, exhausted = \
+                    self._get_more(last_key=self._last_key,
+                                   value_dict=self._value_dict)
+
+            self._data.extend(newdata)
+            self._last_key, self._exhausted = last_key, exhausted
+
+            if self._prefetch and not exhausted:
+                self._pending = _PageFetcher(self._get_more, last_key,
+                                             self._value_dict)
+        finally:
+            self._lock.release()
+
+    def _iter_pages(self):
+        """
+        Yield pages from the beginning without touching the stored items.
+        """
+        last_key, exhausted = None, False
+        fetcher = None
+
+        while not exhausted:
+            if fetcher is not None:
+                page, last_key, exhausted = fetcher.result()
+                fetcher = None
+            else:
+                page, last_key, exhausted = \
+                    self._get_more(last_key=last_key,
+                                   value_dict=self._value_dict)
+
+            if self._prefetch and not exhausted:
+                fetcher = _PageFetcher(self._get_more, last_key,
+                                       self._value_dict)
+
+            yield page
+
+
+class _PageFetcher(object):
+    """
+    Retrieve a single LazyList page in a background thread.
+    """
+
+    def __init__(self, get_more, last_key, value_dict):
+        self._get_more = get_more
+        self._last_key = last_key
+        self._value_dict = value_dict
+        self._result = None
+        self._error = None
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._result = self._get_more(last_key=self._last_key,
+                                          value_dict=self._value_dict)
+        except Exception:
+            self._error = sys.exc_info()[1]
+
+    def result(self):
+        """
+        Wait for the page and return it or re-raise the retrieval error.
+        """
+        self._thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        return self._result
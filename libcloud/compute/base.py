@@ -17,15 +17,22 @@
 Provides base classes for working with drivers
 """
 
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
 import sys
+import copy
 import time
 import hashlib
 import os
 import socket
 import struct
 import binascii
+import threading
 
 from libcloud.utils.py3 import b
+from libcloud.utils.parallel import parallel_imap_unordered
+from libcloud.common.cache import MemoryCacheBackend
 
 import libcloud.compute.ssh
 from libcloud.pricing import get_size_price
@@ -38,12 +45,15 @@ from libcloud.common.base import ConnectionKey, ConnectionUserAndKey
 from libcloud.common.base import BaseDriver
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
 from libcloud.common.base import LibcloudHTTPConnection
-from libcloud.common.types import LibcloudError
+from libcloud.common.types import LibcloudError, InvalidCredsError
 
 
 # How long to wait for the node to come online after creating it
 NODE_ONLINE_WAIT_TIMEOUT = 10 * 60
 
+# Guards creation of the per driver readiness watchers
+_WATCHERS_LOCK = threading.Lock()
+
 # How long to try connecting to a remote SSH server when running a deployment
 # script.
 SSH_CONNECT_TIMEOUT = 5 * 60
@@ -58,6 +68,7 @@ __all__ = [
     "NodeAuthSSHKey",
     "NodeAuthPassword",
     "NodeDriver",
+    "NodeReadinessWatcher",
 
     # @@TR: do the following need exporting?
     "ConnectionKey",
@@ -444,6 +455,14 @@ class NodeDriver(BaseDriver):
 
     NODE_STATE_MAP = {}
 
+    # Default number of seconds the results of the catalog calls are cached
+    # for once the cache has been enabled (see enable_cache)
+    cache_ttls = {
+        'list_sizes': 3600,
+        'list_images': 3600,
+        'list_locations': 3600
+    }
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
                  api_version=None, **kwargs):
         super(NodeDriver, self).__init__(key=key, secret=secret, secure=secure,
@@ -550,6 +569,141 @@ class NodeDriver(BaseDriver):
         raise NotImplementedError(
             'list_locations not implemented for this driver')
 
+    def enable_cache(self, backend=None, ttls=None):
+        """
+        Cache the results of the read-only catalog calls (list_sizes,
+        list_images and list_locations by default).
+
+        Results are cached per driver class, region, credentials and call
+        arguments, so a backend can be shared by multiple drivers (and by
+        multiple processes when using
+        L{libcloud.common.cache.FileCacheBackend}).
+
+        @keyword    backend: Cache backend (default is a new
+                             L{libcloud.common.cache.MemoryCacheBackend}).
+        @type       backend: L{libcloud.common.cache.CacheBackend}
+
+        @keyword    ttls: Number of seconds the results of each method are
+                          cached for, merged with cache_ttls. A TTL of 0
+                          disables caching for a method.
+        @type       ttls: C{dict}
+
+        @rtype: C{None}
+        """
+        if backend is None:
+            backend = MemoryCacheBackend()
+
+        method_ttls = dict(self.cache_ttls)
+        method_ttls.update(ttls or {})
+
+        self.disable_cache()
+        self._cache_backend = backend
+
+        for method_name, ttl in method_ttls.items():
+            if not ttl:
+                continue
+
+            # Remember methods which have been overridden on the instance so
+            # they can be restored by disable_cache
+            self._cached_methods[method_name] = \
+                self.__dict__.get(method_name, None)
+
+            method = getattr(self, method_name)
+            setattr(self, method_name,
+                    self._get_cached_method(method_name, method, ttl))
+
+    def disable_cache(self):
+        """
+        Stop caching the results of the catalog calls. Already cached entries
+        are kept in the backend.
+
+        @rtype: C{None}
+        """
+        cached_methods = self.__dict__.get('_cached_methods', {})
+
+        for method_name, original in cached_methods.items():
+            if original is None:
+                delattr(self, method_name)
+            else:
+                setattr(self, method_name, original)
+
+        self._cache_backend = None
+        self._cached_methods = {}
+
+    def invalidate_cache(self, method_name=None):
+        """
+        Remove the cached results of this driver.
+
+        @keyword    method_name: Only remove the results of this method (e.g.
+                                 'list_images').
+        @type       method_name: C{str}
+
+        @rtype: C{None}
+        """
+        backend = self.__dict__.get('_cache_backend', None)
+
+        if backend is None:
+            return
+
+        if method_name is not None:
+            method_names = [method_name]
+        else:
+            method_names = self._cached_methods.keys()
+
+        for name in method_names:
+            backend.clear(self._get_cache_namespace(name))
+
+    def _get_cache_namespace(self, method_name):
+        connection = getattr(self, 'connection', None)
+        region = getattr(self, 'region_name', None) or \
+            getattr(connection, 'host', None)
+
+        # Credentials are hashed so they are never written to the backend
+        credentials = '%s:%s' % (getattr(self, 'key', None),
+                                 getattr(self, 'secret', None))
+        credentials = hashlib.sha1(b(credentials)).hexdigest()
+
+        return '%s.%s:%s:%s:%s' % (self.__class__.__module__,
+                                   self.__class__.__name__, region,
+                                   credentials, method_name)
+
+    def _get_cached_method(self, method_name, method, ttl):
+        backend = self._cache_backend
+
+        def cached_method(*args, **kwargs):
+            namespace = self._get_cache_namespace(method_name)
+            key = repr((args, sorted(kwargs.items())))
+
+            try:
+                items = backend.get(namespace, key)
+            except KeyError:
+                items = method(*args, **kwargs)
+                backend.set(namespace, key, self._copy_cached_items(items),
+                            ttl)
+                return items
+
+            return self._copy_cached_items(items, driver=self)
+
+        cached_method.__doc__ = method.__doc__
+        return cached_method
+
+    def _copy_cached_items(self, items, driver=None):
+        # Cached copies don't reference the driver (which can't be pickled
+        # and might not be the driver which reads them)
+        if not isinstance(items, list):
+            return items
+
+        result = []
+
+        for item in items:
+            if hasattr(item, 'driver'):
+                item = copy.copy(item)
+                item.driver = driver
+
+            result.append(item)
+
+        return result
+
     def deploy_node(self, **kwargs):
         """
         Create a new node, and start deployment.
@@ -615,10 +769,115 @@ class NodeDriver(BaseDriver):
                                    'public_ips', other option is 'private_ips'.
         @type       ssh_interface: C{str}
         """
+        password = self._prepare_deployment(kwargs)
+        node = self.create_node(**kwargs)
+
+        return self._deploy_created_node(node=node, password=password,
+                                         kwargs=kwargs)
+
+    def create_nodes(self, count, max_workers=4, **kwargs):
+        """
+        Create multiple nodes.
+
+        Nodes are created by calling create_node from at most max_workers
+        threads. Drivers which support creating multiple nodes with a single
+        API call override this method.
+
+        If the name argument is provided, "-<number>" is appended to the
+        name of each node (e.g. "worker-1", "worker-2", ...).
+
+        @inherits: L{NodeDriver.create_node}
+
+        @keyword    count: Number of nodes to create.
+        @type       count: C{int}
+
+        @keyword    max_workers: Maximum number of nodes which are created at
+                                 the same time (default is 4).
+        @type       max_workers: C{int}
+
+        @return: Generator which yields C{(node, error)} tuples as soon as
+                 the creation of a node has finished. Either node or error
+                 is None.
+        @rtype: C{generator}
+        """
+        def create(index):
+            node_kwargs = kwargs.copy()
+
+            if count > 1 and 'name' in kwargs:
+                node_kwargs['name'] = '%s-%s' % (kwargs['name'], index + 1)
+
+            return self.create_node(**node_kwargs)
+
+        for _, _, node, error in parallel_imap_unordered(
+                create, range(count), max_workers=max_workers):
+            yield node, error
+
+    def deploy_nodes(self, count, max_workers=4, **kwargs):
+        """
+        Create multiple nodes and run the deployment on each of them.
+
+        Nodes are created using L{create_nodes} and each node is deployed
+        (wait until it's running, connect to the SSH server and run the
+        deployment) as soon as it has been created. At most max_workers nodes
+        are deployed at the same time. All the nodes share the same
+        authentication information.
+
+        @inherits: L{NodeDriver.deploy_node}
+
+        @keyword    count: Number of nodes to create.
+        @type       count: C{int}
+
+        @keyword    max_workers: Maximum number of nodes which are created and
+                                 deployed at the same time (default is 4).
+        @type       max_workers: C{int}
+
+        @return: Generator which yields C{(node, error)} tuples as soon as
+                 the deployment of a node has finished. If a node couldn't be
+                 created node is None, if the deployment failed error is a
+                 L{DeploymentError}.
+        @rtype: C{generator}
+        """
+        # Validate the arguments before any node is created
+        password = self._prepare_deployment(kwargs)
+        created = self.create_nodes(count=count, max_workers=max_workers,
+                                    **kwargs)
+
+        def deploy(result):
+            node, error = result
+
+            if error is not None:
+                return None
+
+            return self._deploy_created_node(node=node, password=password,
+                                             kwargs=kwargs)
+
+        def deploy_all():
+            for _, result, node, error in parallel_imap_unordered(
+                    deploy, created, max_workers=max_workers):
+                if result[1] is not None:
+                    yield None, result[1]
+                elif error is not None:
+                    yield result[0], error
+                else:
+                    yield node, None
+
+        return deploy_all()
+
+    def _prepare_deployment(self, kwargs):
+        """
+        Check that the deployment is supported and add the authentication
+        information to the create_node arguments if needed.
+
+        @return: Password used to log in to the node or None.
+        """
         if not libcloud.compute.ssh.have_paramiko:
             raise RuntimeError('paramiko is not installed. You can install ' +
                                'it using pip: pip install paramiko')
 
+        # paramiko has only been found so far, make sure it can be imported
+        # before the node is created
+        libcloud.compute.ssh.import_paramiko()
+
         password = None
 
         if 'create_node' not in self.features:
@@ -637,7 +896,12 @@ class NodeDriver(BaseDriver):
             if 'ssh_key' not in kwargs:
                 password = kwargs['auth'].password
 
-        node = self.create_node(**kwargs)
+        return password
+
+    def _deploy_created_node(self, node, password, kwargs):
+        """
+        Wait until the node is running and run the deployment on it.
+        """
         max_tries = kwargs.get('max_tries', 3)
 
         if 'generates_password' in self.features['create_node']:
@@ -775,43 +1039,49 @@ class NodeDriver(BaseDriver):
         @return: C{(Node, ip_addresses)} tuple of Node instance and
                  list of ip_address on success.
         """
-        def is_supported(address):
-            """Return True for supported address"""
-            if force_ipv4 and not is_valid_ip_address(address=address,
-                                                      family=socket.AF_INET):
-                return False
-            return True
+        watcher = self.get_readiness_watcher(wait_period=wait_period)
+        return watcher.wait(node=node, timeout=timeout,
+                            ssh_interface=ssh_interface,
+                            force_ipv4=force_ipv4)
 
-        def filter_addresses(addresses):
-            """Return list of supported addresses"""
-            return [a for a in addresses if is_supported(a)]
+    def get_readiness_watcher(self, wait_period=3):
+        """
+        Return a L{NodeReadinessWatcher} for this driver.
 
-        start = time.time()
-        end = start + timeout
+        Watchers are shared so all the threads which wait for nodes with the
+        same wait_period are served by a single listing per poll.
 
-        if ssh_interface not in ['public_ips', 'private_ips']:
-            raise ValueError('ssh_interface argument must either be' +
-                             'public_ips or private_ips')
+        @keyword    wait_period: How many seconds to wait between polls
+                                 (default is 3)
+        @type       wait_period: C{int}
 
-        while time.time() < end:
-            nodes = self.list_nodes()
-            nodes = list([n for n in nodes if n.uuid == node.uuid])
-
-            if len(nodes) > 1:
-                raise LibcloudError(value=('Booted single node[%s], ' % node
-                                    + 'but multiple nodes have same UUID'),
-                                    driver=self)
-
-            if (len(nodes) == 1 and nodes[0].state == NodeState.RUNNING and
-                    filter_addresses(getattr(nodes[0], ssh_interface))):
-                return (nodes[0], filter_addresses(getattr(nodes[0],
-                                                   ssh_interface)))
-            else:
-                time.sleep(wait_period)
-                continue
+        @rtype: L{NodeReadinessWatcher}
+        """
+        with _WATCHERS_LOCK:
+            # Not all the drivers call NodeDriver.__init__
+            watchers = self.__dict__.setdefault('_watchers', {})
+
+            if wait_period not in watchers:
+                watchers[wait_period] = NodeReadinessWatcher(
+                    driver=self, wait_period=wait_period)
+
+            return watchers[wait_period]
+
+    def _list_nodes_for_watcher(self, nodes):
+        """
+        Return a list of nodes which contains (at least) the current state of
+        the provided nodes.
+
+        Used by L{NodeReadinessWatcher}. Drivers which can filter the node
+        listing (e.g. by node id) should override this method so a single
+        poll doesn't need to retrieve the whole inventory.
+
+        @param      nodes: Nodes which are being waited for.
+        @type       nodes: C{list} of L{Node}
 
-        raise LibcloudError(value='Timed out after %s seconds' % (timeout),
-                            driver=self)
+        @rtype: C{list} of L{Node}
+        """
+        return self.list_nodes()
 
     def _ssh_client_connect(self, ssh_client, wait_period=1.5, timeout=300):
         """
@@ -889,6 +1159,209 @@ class NodeDriver(BaseDriver):
                               size_id=size_id)
 
 
+class NodeReadinessWatcher(object):
+    """
+    Waits for multiple nodes to be fully booted and have an IP address
+    assigned.
+
+    Any number of threads can wait for nodes at the same time. All the
+    pending nodes are checked with a single listing (see
+    L{NodeDriver._list_nodes_for_watcher}) per poll which is performed on a
+    background thread, and every waiter is woken up as soon as its node is
+    running and has an address on the requested interface.
+
+    Errors raised by the listing are treated as "not ready yet" (a node
+    which has just been created might not be known to the API yet) and the
+    nodes keep being polled until the waiter times out. Errors which can't
+    go away by polling again (see L{permanent_errors}) are raised to all the
+    waiters straight away.
+    """
+
+    # Listing errors which are raised to the waiters instead of being retried
+    permanent_errors = (InvalidCredsError, NotImplementedError)
+
+    def __init__(self, driver, wait_period=3):
+        """
+        @keyword    driver: Driver which is used to list the nodes.
+        @type       driver: L{NodeDriver}
+
+        @keyword    wait_period: How many seconds to wait between polls
+                                 (default is 3)
+        @type       wait_period: C{int}
+        """
+        self.driver = driver
+        self.wait_period = wait_period
+
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._thread = None
+
+    def wait(self, node, timeout=NODE_ONLINE_WAIT_TIMEOUT,
+             ssh_interface='public_ips', force_ipv4=True):
+        """
+        Block until node is fully booted and has an IP address assigned.
+
+        @keyword    node: Node instance.
+        @type       node: C{Node}
+
+        @keyword    timeout: How many seconds to wait before timing out
+                             (default is 600)
+        @type       timeout: C{int}
+
+        @keyword    ssh_interface: The interface to wait for.
+                                   Default is 'public_ips', other option is
+                                   'private_ips'.
+        @type       ssh_interface: C{str}
+
+        @keyword    force_ipv4: Ignore ipv6 IP addresses (default is True).
+        @type       force_ipv4: C{bool}
+
+        @return: C{(Node, ip_addresses)} tuple of Node instance and
+                 list of ip_address on success.
+        """
+        if ssh_interface not in ['public_ips', 'private_ips']:
+            raise ValueError('ssh_interface argument must either be' +
+                             'public_ips or private_ips')
+
+        waiter = _NodeWaiter(node=node, ssh_interface=ssh_interface,
+                             force_ipv4=force_ipv4)
+        end = time.time() + timeout
+
+        with self._condition:
+            self._waiters.append(waiter)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.setDaemon(True)
+                self._thread.start()
+
+            while not waiter.done:
+                remaining = end - time.time()
+
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    value = 'Timed out after %s seconds' % (timeout)
+
+                    if waiter.last_error is not None:
+                        value += ' (last error: %s)' % (waiter.last_error)
+
+                    raise LibcloudError(value=value, driver=self.driver)
+
+                self._condition.wait(remaining)
+
+        if waiter.error is not None:
+            raise waiter.error
+
+        return waiter.result
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._waiters:
+                    self._thread = None
+                    return
+
+                waiters = list(self._waiters)
+
+            self._poll(waiters)
+
+            with self._condition:
+                for waiter in waiters:
+                    if waiter.done and waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+                self._condition.notifyAll()
+
+                if not self._waiters:
+                    self._thread = None
+                    return
+
+                self._condition.wait(self.wait_period)
+
+    def _poll(self, waiters):
+        try:
+            nodes = self.driver._list_nodes_for_watcher(
+                [waiter.node for waiter in waiters])
+        except Exception:
+            e = sys.exc_info()[1]
+
+            if isinstance(e, self.permanent_errors):
+                for waiter in waiters:
+                    waiter.error = e
+                    waiter.done = True
+
+                return
+
+            if len(waiters) > 1 and self._lists_requested_nodes_only():
+                # A single node which is not known yet (e.g. EC2 returns
+                # InvalidInstanceID.NotFound right after RunInstances) fails
+                # the whole listing, check each node on its own so the others
+                # aren't held back by it.
+                for waiter in waiters:
+                    self._poll([waiter])
+
+                return
+
+            for waiter in waiters:
+                waiter.last_error = e
+
+            return
+
+        for waiter in waiters:
+            waiter.last_error = None
+            matching = [n for n in nodes if n.uuid == waiter.node.uuid]
+
+            if len(matching) > 1:
+                waiter.error = LibcloudError(
+                    value=('Booted single node[%s], ' % waiter.node +
+                           'but multiple nodes have same UUID'),
+                    driver=self.driver)
+                waiter.done = True
+            elif len(matching) == 1 and matching[0].state == NodeState.RUNNING:
+                addresses = waiter.filter_addresses(
+                    getattr(matching[0], waiter.ssh_interface))
+
+                if addresses:
+                    waiter.result = (matching[0], addresses)
+                    waiter.done = True
+
+    def _lists_requested_nodes_only(self):
+        """
+        Return True if the driver filters the listing by the requested nodes.
+
+        Otherwise every listing returns the whole inventory, so polling each
+        node on its own would only multiply the number of listings.
+        """
+        method = self.driver._list_nodes_for_watcher
+        function = getattr(method, '__func__', getattr(method, 'im_func', None))
+
+        return function is not NodeDriver.__dict__['_list_nodes_for_watcher']
+
+
+class _NodeWaiter(object):
+    """
+    A single node which is being waited for by L{NodeReadinessWatcher}.
+    """
+
+    def __init__(self, node, ssh_interface, force_ipv4):
+        self.node = node
+        self.ssh_interface = ssh_interface
+        self.force_ipv4 = force_ipv4
+
+        self.done = False
+        self.result = None
+        self.error = None
+        self.last_error = None
+
+    def filter_addresses(self, addresses):
+        """Return list of supported addresses"""
+        if not self.force_ipv4:
+            return list(addresses)
+
+        return [a for a in addresses
+                if is_valid_ip_address(address=a, family=socket.AF_INET)]
+
+
 def is_private_subnet(ip):
     """
     Utility function to check if an IP address is inside a private subnet.
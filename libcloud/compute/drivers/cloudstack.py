@@ -145,9 +145,9 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
         }
         if location is not None:
             args['zoneid'] = location.id
-        imgs = self._sync_request('listTemplates', **args)
+        imgs = self._paginated_request('listTemplates', 'template', **args)
         images = []
-        for img in imgs.get('template', []):
+        for img in imgs:
             images.append(NodeImage(img['id'], img['name'], self, {
                 'hypervisor': img['hypervisor'],
                 'format': img['format'],
@@ -156,18 +156,19 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
         return images
 
     def list_locations(self):
-        locs = self._sync_request('listZones')
+        locs = self._paginated_request('listZones', 'zone')
         locations = []
-        for loc in locs['zone']:
+        for loc in locs:
             locations.append(NodeLocation(loc['id'], loc['name'], 'AU', self))
         return locations
 
     def list_nodes(self):
-        vms = self._sync_request('listVirtualMachines')
-        addrs = self._sync_request('listPublicIpAddresses')
+        vms = self._paginated_request('listVirtualMachines', 'virtualmachine')
+        addrs = self._paginated_request('listPublicIpAddresses',
+                                        'publicipaddress')
 
         public_ips = {}
-        for addr in addrs.get('publicipaddress', []):
+        for addr in addrs:
             if 'virtualmachineid' not in addr:
                 continue
             vm_id = addr['virtualmachineid']
@@ -175,9 +176,19 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
                 public_ips[vm_id] = {}
             public_ips[vm_id][addr['ipaddress']] = addr['id']
 
+        # Retrieve all the forwarding rules with a single (paginated) request
+        # and index them by the id of the address they belong to
+        rules_by_address = {}
+        if public_ips:
+            rules = self._paginated_request('listIpForwardingRules',
+                                            'ipforwardingrule')
+            for rule in rules:
+                address_id = rule.get('ipaddressid', None)
+                rules_by_address.setdefault(address_id, []).append(rule)
+
         nodes = []
 
-        for vm in vms.get('virtualmachine', []):
+        for vm in vms:
             private_ips = []
 
             for nic in vm['nic']:
@@ -200,8 +211,7 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
 
             rules = []
             for addr in addrs:
-                result = self._sync_request('listIpForwardingRules')
-                for r in result.get('ipforwardingrule', []):
+                for r in rules_by_address.get(addr.id, []):
                     rule = CloudStackForwardingRule(node, r['id'], addr,
                                                     r['protocol'].upper(),
                                                     r['startport'],
@@ -214,9 +224,10 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
         return nodes
 
     def list_sizes(self, location=None):
-        szs = self._sync_request('listServiceOfferings')
+        szs = self._paginated_request('listServiceOfferings',
+                                      'serviceoffering')
         sizes = []
-        for sz in szs['serviceoffering']:
+        for sz in szs:
             sizes.append(NodeSize(sz['id'], sz['name'], sz['memory'], 0, 0,
                                   0, self))
         return sizes
@@ -267,8 +278,9 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
 
         diskOfferings = []
 
-        diskOfferResponse = self._sync_request('listDiskOfferings')
-        for diskOfferDict in diskOfferResponse.get('diskoffering', ()):
+        diskOfferResponse = self._paginated_request('listDiskOfferings',
+                                                    'diskoffering')
+        for diskOfferDict in diskOfferResponse:
             diskOfferings.append(
                 CloudStackDiskOffering(
                     id=diskOfferDict['id'],
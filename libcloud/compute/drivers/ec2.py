@@ -30,6 +30,7 @@ from xml.etree import ElementTree as ET
 
 from libcloud.utils.py3 import urlquote
 from libcloud.utils.py3 import b
+from libcloud.utils.parallel import parallel_imap_unordered
 
 from libcloud.utils.xml import fixxpath, findtext, findattr, findall
 from libcloud.common.base import ConnectionUserAndKey
@@ -53,6 +54,13 @@ API_VERSION = '2010-08-31'
 
 NAMESPACE = "http://ec2.amazonaws.com/doc/%s/" % (API_VERSION)
 
+# MaxResults / NextToken are not supported by the Describe* actions in
+# API_VERSION, paginated requests are sent with this version instead
+PAGINATION_API_VERSION = '2016-11-15'
+
+PAGINATION_NAMESPACE = "http://ec2.amazonaws.com/doc/%s/" % \
+    (PAGINATION_API_VERSION)
+
 """
 Sizes must be hardcoded, because Amazon doesn't provide an API to fetch them.
 From http://aws.amazon.com/ec2/instance-types/
@@ -221,13 +229,27 @@ class EC2Connection(ConnectionUserAndKey):
         params['SignatureVersion'] = '2'
         params['SignatureMethod'] = 'HmacSHA256'
         params['AWSAccessKeyId'] = self.user_id
-        params['Version'] = API_VERSION
+        # Paginated requests use a newer version (see _paginated_request)
+        params.setdefault('Version', API_VERSION)
         params['Timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%SZ',
                                             time.gmtime())
         params['Signature'] = self._get_aws_auth_param(params, self.key,
                                                        self.action)
         return params
 
+    def is_throttling_error(self, status, error):
+        if super(EC2Connection, self).is_throttling_error(status, error):
+            return True
+
+        # Throttled requests fail with a 503 and a RequestLimitExceeded error
+        message = str(error)
+        return 'RequestLimitExceeded' in message or 'Throttling' in message
+
+    def is_read_only_request(self, method, action, params):
+        # All the operations use GET
+        params = dict(params or {})
+        return params.get('Action', '').startswith('Describe')
+
     def _get_aws_auth_param(self, params, secret_key, path='/'):
         """
         Creates the signature required for AWS, per
@@ -315,6 +337,89 @@ class EC2NodeDriver(NodeDriver):
             params["%s.%s" % (key, i)] = value
         return params
 
+    def _get_filter_params(self, filters):
+        """
+        Converts a dictionary of filters into AWS query param format
+        (Filter.N.Name and Filter.N.Value.M).
+
+        Values can be a single C{str} or a C{list} of C{str}.
+        """
+        params = {}
+        for index, name in enumerate(sorted(filters.keys())):
+            values = filters[name]
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+
+            params['Filter.%s.Name' % (index + 1)] = name
+            params.update(self._pathlist('Filter.%s.Value' % (index + 1),
+                                         values))
+        return params
+
+    def _paginated_request(self, params, xpath, page_size=None):
+        """
+        Perform a Describe* request and follow the nextToken of the response
+        until all the pages have been retrieved.
+
+        Responses are parsed incrementally and each element is discarded
+        once the next one has been requested.
+
+        @param xpath: Path of the items in the response, e.g. 'imagesSet/item'.
+        @type xpath: C{str}
+
+        @param page_size: Maximum number of items per page (MaxResults). If
+                          not provided, the server decides the page size.
+        @type page_size: C{int}
+
+        @return: Generator which yields the elements of all the pages.
+        """
+        params = params.copy()
+        namespace = NAMESPACE
+
+        if page_size:
+            # Only newer API versions support MaxResults. Elements of the
+            # response are moved to NAMESPACE so they can be parsed by the
+            # same code as the other responses.
+            params['Version'] = PAGINATION_API_VERSION
+            params['MaxResults'] = str(page_size)
+            namespace = PAGINATION_NAMESPACE
+
+        while True:
+            # Hooks add the Timestamp and Signature to the params in place,
+            # every page has to be signed over a fresh copy
+            response = self.connection.request(self.path,
+                                               params=dict(params),
+                                               stream=True)
+
+            for element in response.iterparse(xpath, namespace=namespace):
+                if namespace != NAMESPACE:
+                    self._set_namespace(element, namespace, NAMESPACE)
+
+                yield element
+
+            next_token = findtext(element=response.object, xpath='nextToken',
+                                  namespace=namespace)
+            if not next_token:
+                break
+
+            params['NextToken'] = next_token
+
+    def _set_namespace(self, element, old_namespace, new_namespace):
+        """
+        Move element and all its children from old_namespace to
+        new_namespace.
+        """
+        old_prefix = '{%s}' % (old_namespace)
+        new_prefix = '{%s}' % (new_namespace)
+        elements = [element]
+
+        while elements:
+            element = elements.pop()
+
+            if element.tag.startswith(old_prefix):
+                element.tag = new_prefix + element.tag[len(old_prefix):]
+
+            elements.extend(list(element))
+
     def _get_boolean(self, element):
         tag = "{%s}%s" % (NAMESPACE, 'return')
         return element.findtext(tag) == 'true'
@@ -472,7 +577,8 @@ class EC2NodeDriver(NodeDriver):
                              size=int(size),
                              driver=self)
 
-    def list_nodes(self, ex_node_ids=None):
+    def list_nodes(self, ex_node_ids=None, ex_filters=None,
+                   ex_page_size=None):
         """
         List all nodes
 
@@ -483,15 +589,31 @@ class EC2NodeDriver(NodeDriver):
         @param      ex_node_ids: List of C{node.id}
         @type       ex_node_ids: C{list} of C{str}
 
+        @param      ex_filters: Filters which are applied by the server,
+                                e.g. {'instance-state-name': 'running'}.
+                                Values can be a C{str} or a C{list} of C{str}.
+        @type       ex_filters: C{dict}
+
+        @param      ex_page_size: Maximum number of instances returned per
+                                  request. Can't be used together with
+                                  ex_node_ids.
+        @type       ex_page_size: C{int}
+
         @rtype: C{list} of L{Node}
         """
+        if ex_node_ids and ex_page_size:
+            raise ValueError('ex_page_size can\'t be used together with '
+                             'ex_node_ids')
+
         params = {'Action': 'DescribeInstances'}
         if ex_node_ids:
             params.update(self._pathlist('InstanceId', ex_node_ids))
-        elem = self.connection.request(self.path, params=params).object
+        if ex_filters:
+            params.update(self._get_filter_params(ex_filters))
+
         nodes = []
-        for rs in findall(element=elem, xpath='reservationSet/item',
-                          namespace=NAMESPACE):
+        for rs in self._paginated_request(params, 'reservationSet/item',
+                                          page_size=ex_page_size):
             groups = [g.findtext('')
                       for g in findall(element=rs,
                                        xpath='groupSet/item/groupId',
@@ -504,6 +626,10 @@ class EC2NodeDriver(NodeDriver):
             node.public_ips.extend(ips)
         return nodes
 
+    def _list_nodes_for_watcher(self, nodes):
+        # Only describe the instances which are being waited for
+        return self.list_nodes(ex_node_ids=[node.id for node in nodes])
+
     def list_sizes(self, location=None):
         # Cluster instances are not available in all the regions
         if self.region_name == 'us-east-1':
@@ -527,12 +653,76 @@ class EC2NodeDriver(NodeDriver):
             sizes.append(NodeSize(driver=self, **attributes))
         return sizes
 
-    def list_images(self, location=None):
+    def list_images(self, location=None, ex_image_ids=None, ex_owners=None,
+                    ex_executable_by=None, ex_filters=None,
+                    ex_page_size=None):
+        """
+        List images
+
+        Without any of the ex_* arguments all the images which are available
+        to the account are returned (including all the public images).
+        See L{ex_iterate_images} for a version which doesn't keep all the
+        images in memory.
+
+        @param      ex_image_ids: Only return the images with these ids.
+        @type       ex_image_ids: C{list} of C{str}
+
+        @param      ex_owners: Only return the images owned by these accounts
+                               (account id, 'self', 'amazon' or
+                               'aws-marketplace').
+        @type       ex_owners: C{list} of C{str}
+
+        @param      ex_executable_by: Only return the images with launch
+                                      permissions for these accounts
+                                      (account id, 'self' or 'all').
+        @type       ex_executable_by: C{list} of C{str}
+
+        @param      ex_filters: Filters which are applied by the server,
+                                e.g. {'architecture': 'x86_64'}. Values can
+                                be a C{str} or a C{list} of C{str}.
+        @type       ex_filters: C{dict}
+
+        @param      ex_page_size: Maximum number of images returned per
+                                  request. Can't be used together with
+                                  ex_image_ids.
+        @type       ex_page_size: C{int}
+
+        @rtype: C{list} of L{NodeImage}
+        """
+        return list(self.ex_iterate_images(ex_image_ids=ex_image_ids,
+                                           ex_owners=ex_owners,
+                                           ex_executable_by=ex_executable_by,
+                                           ex_filters=ex_filters,
+                                           ex_page_size=ex_page_size))
+
+    def ex_iterate_images(self, ex_image_ids=None, ex_owners=None,
+                          ex_executable_by=None, ex_filters=None,
+                          ex_page_size=None):
+        """
+        Return a generator which yields images as soon as they have been
+        parsed from the response.
+
+        Arguments are the same as for L{list_images}.
+
+        @rtype: C{generator} of L{NodeImage}
+        """
+        if ex_image_ids and ex_page_size:
+            raise ValueError('ex_page_size can\'t be used together with '
+                             'ex_image_ids')
+
         params = {'Action': 'DescribeImages'}
-        images = self._to_images(
-            self.connection.request(self.path, params=params).object
-        )
-        return images
+        if ex_image_ids:
+            params.update(self._pathlist('ImageId', ex_image_ids))
+        if ex_owners:
+            params.update(self._pathlist('Owner', ex_owners))
+        if ex_executable_by:
+            params.update(self._pathlist('ExecutableBy', ex_executable_by))
+        if ex_filters:
+            params.update(self._get_filter_params(ex_filters))
+
+        for element in self._paginated_request(params, 'imagesSet/item',
+                                               page_size=ex_page_size):
+            yield self._to_image(element)
 
     def list_locations(self):
         locations = []
@@ -1062,6 +1252,62 @@ class EC2NodeDriver(NodeDriver):
         @keyword    ex_clienttoken: Unique identifier to ensure idempotency
         @type       ex_clienttoken: C{str}
         """
+        nodes = self._run_instances(**kwargs)
+
+        for node in nodes:
+            self._set_node_name(node, kwargs['name'])
+
+        if len(nodes) == 1:
+            return nodes[0]
+        else:
+            return nodes
+
+    def create_nodes(self, count, max_workers=4, **kwargs):
+        """
+        Create multiple EC2 nodes with a single RunInstances call.
+
+        MaxCount is set to count. Unless ex_mincount is provided, EC2 may
+        launch fewer instances than requested. An error is yielded for each
+        instance which hasn't been launched.
+
+        @inherits: L{NodeDriver.create_nodes}
+
+        @keyword    max_workers: Maximum number of nodes which are tagged
+                                 at the same time (default is 4).
+        @type       max_workers: C{int}
+        """
+        kwargs = kwargs.copy()
+        kwargs['ex_maxcount'] = str(count)
+        name = kwargs['name']
+
+        try:
+            nodes = self._run_instances(**kwargs)
+        except Exception:
+            e = sys.exc_info()[1]
+
+            for _ in range(count):
+                yield None, e
+
+            return
+
+        def set_name(index):
+            if count > 1:
+                self._set_node_name(nodes[index], '%s-%s' % (name, index + 1))
+            else:
+                self._set_node_name(nodes[index], name)
+
+            return nodes[index]
+
+        for _, _, node, error in parallel_imap_unordered(
+                set_name, range(len(nodes)), max_workers=max_workers):
+            yield node, error
+
+        for _ in range(count - len(nodes)):
+            yield None, LibcloudError(value='Only %s of %s requested '
+                                      'instances have been launched' %
+                                      (len(nodes), count), driver=self)
+
+    def _run_instances(self, **kwargs):
         image = kwargs["image"]
         size = kwargs["size"]
         params = {
@@ -1099,23 +1345,18 @@ class EC2NodeDriver(NodeDriver):
             params['ClientToken'] = kwargs['ex_clienttoken']
 
         object = self.connection.request(self.path, params=params).object
-        nodes = self._to_nodes(object, 'instancesSet/item')
+        return self._to_nodes(object, 'instancesSet/item')
 
-        for node in nodes:
-            tags = {'Name': kwargs['name']}
+    def _set_node_name(self, node, name):
+        tags = {'Name': name}
 
-            try:
-                self.ex_create_tags(resource=node, tags=tags)
-            except Exception:
-                continue
-
-            node.name = kwargs['name']
-            node.extra.update({'tags': tags})
+        try:
+            self.ex_create_tags(resource=node, tags=tags)
+        except Exception:
+            return
 
-        if len(nodes) == 1:
-            return nodes[0]
-        else:
-            return nodes
+        node.name = name
+        node.extra.update({'tags': tags})
 
     def reboot_node(self, node):
         params = {'Action': 'RebootInstances'}
@@ -34,6 +34,7 @@ from libcloud.compute.base import NodeState, NodeDriver, Node, NodeLocation
 from libcloud.common.base import ConnectionUserAndKey, XmlResponse
 from libcloud.compute.base import NodeImage, NodeSize
 from libcloud.common.types import InvalidCredsError
+from libcloud.utils.parallel import parallel_map
 from libcloud.compute.providers import Provider
 
 __all__ = [
@@ -278,6 +279,16 @@ class OpenNebulaNodeDriver(NodeDriver):
         'DONE': NodeState.TERMINATED,
         'FAILED': NodeState.TERMINATED}
 
+    # Maximum number of compute resources which are retrieved at the same
+    # time when the collection only contains references to them.
+    max_workers = 4
+
+    # Request verbose collections which contain the full description of
+    # every compute resource, so the nodes are listed with a single request.
+    # Servers which don't support verbose collections return references
+    # which are retrieved one by one.
+    verbose_collections = False
+
     def __new__(cls, key, secret=None, api_version=DEFAULT_API_VERSION,
                 **kwargs):
         if cls is OpenNebulaNodeDriver:
@@ -346,7 +357,13 @@ class OpenNebulaNodeDriver(NodeDriver):
         return resp.status == httplib.OK
 
     def list_nodes(self):
-        return self._to_nodes(self.connection.request('/compute').object)
+        if self.verbose_collections:
+            response = self.connection.request('/compute',
+                                               params={'verbose': 'true'})
+        else:
+            response = self.connection.request('/compute')
+
+        return self._to_nodes(response.object)
 
     def list_images(self, location=None):
         return self._to_images(self.connection.request('/storage').object)
@@ -523,19 +540,25 @@ class OpenNebulaNodeDriver(NodeDriver):
 
         Request a list of compute nodes from the OpenNebula web interface, and
         issue a request to convert each XML object representation of a node
-        to a Node object.
+        to a Node object. The requests are issued concurrently. Elements of a
+        verbose collection already contain the full description of the node
+        and are converted without issuing any request.
 
         @rtype:  C{list} of L{Node}
         @return: A list of compute nodes.
         """
-        computes = []
-        for element in object.findall('COMPUTE'):
+        def get_compute(element):
+            if element.find('ID') is not None:
+                return element
+
             compute_id = element.attrib['href'].partition('/compute/')[2]
-            compute = self.connection.request(
+            return self.connection.request(
                 ('/compute/%s' % (compute_id))).object
-            computes.append(self._to_node(compute))
 
-        return computes
+        computes = parallel_map(get_compute, object.findall('COMPUTE'),
+                                max_workers=self.max_workers)
+
+        return [self._to_node(compute) for compute in computes]
 
     def _to_node(self, compute):
         """
@@ -20,6 +20,7 @@ import sys
 import re
 import base64
 import os
+import threading
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import urlparse
 from libcloud.utils.py3 import b
@@ -35,6 +36,7 @@ from xml.parsers.expat import ExpatError
 
 from libcloud.common.base import XmlResponse, ConnectionUserAndKey
 from libcloud.common.types import InvalidCredsError, LibcloudError
+from libcloud.utils.parallel import parallel_map
 from libcloud.compute.providers import Provider
 from libcloud.compute.types import NodeState
 from libcloud.compute.base import Node, NodeDriver, NodeLocation
@@ -50,6 +52,9 @@ DEFAULT_TASK_COMPLETION_TIMEOUT = 600
 
 DEFAULT_API_VERSION = '0.8'
 
+# Guards creation of the per driver catalog item caches
+_CACHE_LOCK = threading.Lock()
+
 """
 Valid vCloud API v1.5 input values.
 """
@@ -307,6 +312,14 @@ class VCloudNodeDriver(NodeDriver):
     org = None
     _vdcs = None
 
+    # Maximum number of vApps / catalog items which are retrieved at the
+    # same time
+    max_workers = 8
+
+    # How long (in seconds) retrieved catalog items are cached. Set to 0 to
+    # disable the cache.
+    catalog_item_cache_ttl = 300
+
     NODE_STATE_MAP = {'0': NodeState.PENDING,
                       '1': NodeState.PENDING,
                       '2': NodeState.PENDING,
@@ -482,13 +495,12 @@ class VCloudNodeDriver(NodeDriver):
         return res.status in [httplib.ACCEPTED, httplib.NO_CONTENT]
 
     def list_nodes(self):
-        nodes = []
-        for vdc in self.vdcs:
-            res = self.connection.request(get_url_path(vdc.id))
-            elms = res.object.findall(fixxpath(
-                res.object, "ResourceEntities/ResourceEntity")
+        vapps = []
+        for res in self._get_vdc_elements():
+            elms = res.findall(fixxpath(
+                res, "ResourceEntities/ResourceEntity")
             )
-            vapps = [
+            vapps += [
                 (i.get('name'), i.get('href'))
                 for i in elms
                 if i.get('type')
@@ -496,22 +508,36 @@ class VCloudNodeDriver(NodeDriver):
                     and i.get('name')
             ]
 
-            for vapp_name, vapp_href in vapps:
-                try:
-                    res = self.connection.request(
-                        get_url_path(vapp_href),
-                        headers={'Content-Type': 'application/vnd.vmware.vcloud.vApp+xml'}
-                    )
-                    nodes.append(self._to_node(res.object))
-                except Exception:
-                    # The vApp was probably removed since the previous vDC query, ignore
-                    e = sys.exc_info()[1]
-                    if not (isinstance(e.args[0], _ElementInterface) and
-                            e.args[0].tag.endswith('Error') and
-                            e.args[0].get('minorErrorCode') == 'ACCESS_TO_RESOURCE_IS_FORBIDDEN'):
-                        raise e
-
-        return nodes
+        def get_node(vapp):
+            vapp_name, vapp_href = vapp
+            try:
+                res = self.connection.request(
+                    get_url_path(vapp_href),
+                    headers={'Content-Type': 'application/vnd.vmware.vcloud.vApp+xml'}
+                )
+                return self._to_node(res.object)
+            except Exception:
+                # The vApp was probably removed since the previous vDC query, ignore
+                e = sys.exc_info()[1]
+                if not (isinstance(e.args[0], _ElementInterface) and
+                        e.args[0].tag.endswith('Error') and
+                        e.args[0].get('minorErrorCode') == 'ACCESS_TO_RESOURCE_IS_FORBIDDEN'):
+                    raise e
+
+        nodes = parallel_map(get_node, vapps, max_workers=self.max_workers)
+        return [node for node in nodes if node is not None]
+
+    def _get_vdc_elements(self):
+        """Returns elementree of every vDC, the vDCs are retrieved
+           concurrently"""
+        # vdcs also makes sure we are logged in before the requests are
+        # spread over multiple threads
+        vdcs = self.vdcs
+
+        def get_vdc(vdc):
+            return self.connection.request(get_url_path(vdc.id)).object
+
+        return parallel_map(get_vdc, vdcs, max_workers=self.max_workers)
 
     def _to_size(self, ram):
         ns = NodeSize(
@@ -547,7 +573,41 @@ class VCloudNodeDriver(NodeDriver):
         return cat_item_hrefs
 
     def _get_catalogitem(self, catalog_item):
-        """Given a catalog item href returns elementree"""
+        """Given a catalog item href returns elementree
+
+           Catalog items are cached for catalog_item_cache_ttl seconds"""
+        ttl = self.catalog_item_cache_ttl
+
+        if ttl:
+            cache = self._get_catalogitem_cache()
+            entry = cache.get(catalog_item, None)
+
+            if entry is not None and entry[0] > time.time():
+                return entry[1]
+
+        res = self._request_catalogitem(catalog_item)
+
+        if ttl:
+            cache[catalog_item] = (time.time() + ttl, res)
+
+        return res
+
+    def _get_catalogitem_cache(self):
+        _CACHE_LOCK.acquire()
+        try:
+            return self.__dict__.setdefault('_catalogitem_cache', {})
+        finally:
+            _CACHE_LOCK.release()
+
+    def ex_clear_catalog_item_cache(self):
+        """
+        Remove all the cached catalog items.
+
+        @rtype: C{None}
+        """
+        self._get_catalogitem_cache().clear()
+
+    def _request_catalogitem(self, catalog_item):
         res = self.connection.request(
             get_url_path(catalog_item),
             headers={
@@ -560,8 +620,7 @@ class VCloudNodeDriver(NodeDriver):
 
     def list_images(self, location=None):
         images = []
-        for vdc in self.vdcs:
-            res = self.connection.request(get_url_path(vdc.id)).object
+        for res in self._get_vdc_elements():
             res_ents = res.findall(fixxpath(
                 res, "ResourceEntities/ResourceEntity")
             )
@@ -572,16 +631,21 @@ class VCloudNodeDriver(NodeDriver):
                     'application/vnd.vmware.vcloud.vAppTemplate+xml'
             ]
 
-        for catalog in self._get_catalog_hrefs():
-            for cat_item in self._get_catalogitems_hrefs(catalog):
-                res = self._get_catalogitem(cat_item)
-                res_ents = res.findall(fixxpath(res, 'Entity'))
-                images += [
+        catalogs = parallel_map(self._get_catalogitems_hrefs,
+                                self._get_catalog_hrefs(),
+                                max_workers=self.max_workers)
+        cat_items = [cat_item for cat_items in catalogs
+                     for cat_item in cat_items]
+
+        for res in parallel_map(self._get_catalogitem, cat_items,
+                                max_workers=self.max_workers):
+            res_ents = res.findall(fixxpath(res, 'Entity'))
+            images += [
                 self._to_image(i)
                 for i in res_ents
                 if i.get('type') ==
-                   'application/vnd.vmware.vcloud.vAppTemplate+xml'
-                ]
+                    'application/vnd.vmware.vcloud.vAppTemplate+xml'
+            ]
 
         def idfun(image):
             return image.id
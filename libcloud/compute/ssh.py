@@ -16,19 +16,36 @@
 """
 Wraps multiple ways to communicate over SSH
 """
-have_paramiko = False
+from os.path import split as psplit
 
-try:
-    import paramiko
-    have_paramiko = True
-except ImportError:
-    pass
+from libcloud.utils.misc import is_module_available
 
-# Depending on your version of Paramiko, it may cause a deprecation
-# warning on Python 2.6.
-# Ref: https://bugs.launchpad.net/paramiko/+bug/392973
+# paramiko is slow to import so it's only imported once a ParamikoSSHClient
+# is created. have_paramiko only tells that the module can be found, it's set
+# to False if the import fails (see import_paramiko).
+have_paramiko = is_module_available('paramiko')
 
-from os.path import split as psplit
+
+def import_paramiko():
+    """
+    Import and return the paramiko module.
+
+    Raises RuntimeError if paramiko is not installed or if it can't be
+    imported (e.g. one of its dependencies is missing).
+    """
+    global have_paramiko
+
+    try:
+        # Depending on your version of Paramiko, it may cause a deprecation
+        # warning on Python 2.6.
+        # Ref: https://bugs.launchpad.net/paramiko/+bug/392973
+        import paramiko
+    except ImportError:
+        have_paramiko = False
+        raise RuntimeError('paramiko is not installed. You can install ' +
+                           'it using pip: pip install paramiko')
+
+    return paramiko
 
 
 class BaseSSHClient(object):
@@ -127,6 +144,8 @@ class ParamikoSSHClient(BaseSSHClient):
                  key=None, timeout=None):
         super(ParamikoSSHClient, self).__init__(hostname, port, username,
                                                 password, key, timeout)
+
+        paramiko = import_paramiko()
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
@@ -84,6 +84,7 @@ class Route53DNSResponse(AWSBaseResponse):
 
 class Route53Connection(ConnectionUserAndKey):
     host = API_HOST
+    follows_http_semantics = True
 
     def pre_connect_hook(self, params, headers):
         time_string = datetime.datetime.utcnow() \
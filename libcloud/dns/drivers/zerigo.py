@@ -100,6 +100,7 @@ class ZerigoDNSConnection(ConnectionUserAndKey):
     host = API_HOST
     secure = True
     responseCls = ZerigoDNSResponse
+    follows_http_semantics = True
 
     def add_default_headers(self, headers):
         auth_b64 = base64.b64encode(b('%s:%s' % (self.user_id, self.key)))
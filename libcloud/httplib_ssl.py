@@ -16,15 +16,103 @@
 Subclass for httplib.HTTPSConnection with optional certificate name
 verification, depending on libcloud.security settings.
 """
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
 import os
 import re
 import socket
 import ssl
+import time
 import warnings
+import threading
 
 import libcloud.security
 from libcloud.utils.py3 import httplib
 
+# Maximum number of entries in the TLS session and hostname verification
+# caches
+MAX_CACHE_ENTRIES = 1024
+
+# (ca_cert, key_file, cert_file) -> SSLContext
+_ssl_contexts = {}
+# (context id, host, port) -> SSLSession
+_ssl_sessions = {}
+# (hostname, certificate names) -> bool
+_verified_hostnames = {}
+_cache_lock = threading.Lock()
+
+
+def get_ssl_context(ca_cert, key_file=None, cert_file=None):
+    """
+    Return the SSLContext shared by all the connections which use the same
+    CA bundle and client certificate, so the CA bundle is only read once and
+    the TLS sessions can be resumed.
+
+    Returns None if ssl.SSLContext is not available (Python < 2.7.9).
+    """
+    if getattr(ssl, 'SSLContext', None) is None:
+        return None
+
+    key = (ca_cert, key_file, cert_file)
+    context = _ssl_contexts.get(key, None)
+
+    if context is not None:
+        return context
+
+    with _cache_lock:
+        context = _ssl_contexts.get(key, None)
+
+        if context is None:
+            context = _create_ssl_context(ca_cert, key_file, cert_file)
+            _ssl_contexts[key] = context
+
+    return context
+
+
+def clear_ssl_caches():
+    """
+    Remove the cached SSL contexts, TLS sessions and hostname verification
+    results (e.g. after the CA bundle has been updated).
+    """
+    with _cache_lock:
+        _ssl_contexts.clear()
+        _ssl_sessions.clear()
+        _verified_hostnames.clear()
+
+
+def _create_ssl_context(ca_cert, key_file, cert_file):
+    # Negotiate the highest version supported by both sides instead of
+    # pinning TLSv1, SSLv2 and SSLv3 are disabled
+    protocol = getattr(ssl, 'PROTOCOL_TLS_CLIENT', None)
+
+    if protocol is None:
+        protocol = getattr(ssl, 'PROTOCOL_TLS', ssl.PROTOCOL_SSLv23)
+
+    context = ssl.SSLContext(protocol)
+    context.options |= getattr(ssl, 'OP_NO_SSLv2', 0)
+    context.options |= getattr(ssl, 'OP_NO_SSLv3', 0)
+
+    # Hostname is verified by LibcloudHTTPSConnection._verify_hostname
+    if getattr(context, 'check_hostname', None) is not None:
+        context.check_hostname = False
+
+    context.verify_mode = ssl.CERT_REQUIRED
+    context.load_verify_locations(ca_cert)
+
+    if cert_file:
+        context.load_cert_chain(cert_file, key_file)
+
+    return context
+
+
+def _set_cached(cache, key, value):
+    with _cache_lock:
+        if len(cache) >= MAX_CACHE_ENTRIES:
+            cache.clear()
+
+        cache[key] = value
+
 
 class LibcloudHTTPSConnection(httplib.HTTPSConnection):
     """LibcloudHTTPSConnection
@@ -34,6 +122,8 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection):
     """
     verify = False        # does not verify
     ca_cert = None        # no default CA Certificate
+    tls_handshake_time = None  # duration of the last TLS handshake
+    tls_session_reused = False  # True if the last TLS session was resumed
 
     def __init__(self, *args, **kwargs):
         """Constructor
@@ -100,36 +190,104 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection):
         else:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.connect((self.host, self.port))
-        self.sock = ssl.wrap_socket(sock,
-                                    self.key_file,
-                                    self.cert_file,
-                                    cert_reqs=ssl.CERT_REQUIRED,
-                                    ca_certs=self.ca_cert,
-                                    ssl_version=ssl.PROTOCOL_TLSv1)
+        handshake_start = time.time()
+        context = get_ssl_context(self.ca_cert, self.key_file,
+                                  self.cert_file)
+
+        if context is None:
+            self.sock = ssl.wrap_socket(sock,
+                                        self.key_file,
+                                        self.cert_file,
+                                        cert_reqs=ssl.CERT_REQUIRED,
+                                        ca_certs=self.ca_cert,
+                                        ssl_version=ssl.PROTOCOL_TLSv1)
+        else:
+            self.sock = self._wrap_socket(context, sock)
+            self._store_session()
+
+        self.tls_handshake_time = time.time() - handshake_start
         cert = self.sock.getpeercert()
         if not self._verify_hostname(self.host, cert):
             raise ssl.SSLError('Failed to verify hostname')
 
+    def close(self):
+        """Close
+
+        Stores the TLS session first, with TLS 1.3 the session tickets are
+        only received after the handshake.
+        """
+        self._store_session()
+        httplib.HTTPSConnection.close(self)
+
+    def _wrap_socket(self, context, sock):
+        """Wrap Socket
+
+        Resume the last TLS session established with the same host if the
+        ssl module supports it (Python 3.6+)
+        """
+        kwargs = {}
+
+        if getattr(ssl, 'HAS_SNI', False):
+            kwargs['server_hostname'] = self.host
+
+        session_key = (id(context), self.host, self.port)
+        session = _ssl_sessions.get(session_key, None)
+
+        if session is not None:
+            kwargs['session'] = session
+
+        try:
+            sslsock = context.wrap_socket(sock, **kwargs)
+        except TypeError:
+            # session argument is not supported
+            kwargs.pop('session', None)
+            sslsock = context.wrap_socket(sock, **kwargs)
+
+        self._session_key = session_key
+        self.tls_session_reused = getattr(sslsock, 'session_reused', False)
+        return sslsock
+
+    def _store_session(self):
+        session_key = getattr(self, '_session_key', None)
+        session = getattr(self.sock, 'session', None)
+
+        if session_key is None or session is None:
+            return
+
+        if getattr(session, 'has_ticket', True) or \
+           session_key not in _ssl_sessions:
+            _set_cached(_ssl_sessions, session_key, session)
+
     def _verify_hostname(self, hostname, cert):
         """Verify hostname against peer cert
 
         Check both commonName and entries in subjectAltName, using a
-        rudimentary glob to dns regex check to find matches
+        rudimentary glob to dns regex check to find matches. Results are
+        cached per hostname and certificate names.
         """
-        common_name = self._get_common_name(cert)
+        common_name = self._get_common_name(cert) or []
         alt_names = self._get_subject_alt_names(cert)
+        names = frozenset(common_name) | frozenset(alt_names)
+
+        key = (hostname, names)
+        result = _verified_hostnames.get(key, None)
+
+        if result is not None:
+            return result
 
         # replace * with alphanumeric and dash
         # replace . with literal .
         valid_patterns = [
             re.compile('^' + pattern.replace(r".", r"\.") \
                                     .replace(r"*", r"[0-9A-Za-z]+") + '$')
-            for pattern in (set(common_name) | set(alt_names))]
+            for pattern in names]
 
-        return any(
+        result = any(
             pattern.search(hostname)
             for pattern in valid_patterns
         )
+        _set_cached(_verified_hostnames, key, result)
+        return result
 
     def _get_subject_alt_names(self, cert):
         """Get SubjectAltNames
@@ -52,8 +52,8 @@ class CloudStackLBDriver(CloudStackDriverMixIn, Driver):
         return ['tcp']
 
     def list_balancers(self):
-        balancers = self._sync_request('listLoadBalancerRules')
-        balancers = balancers.get('loadbalancerrule', [])
+        balancers = self._paginated_request('listLoadBalancerRules',
+                                            'loadbalancerrule')
         return [self._to_balancer(balancer) for balancer in balancers]
 
     def get_balancer(self, balancer_id):
@@ -119,9 +119,9 @@ class CloudStackLBDriver(CloudStackDriverMixIn, Driver):
         return True
 
     def balancer_list_members(self, balancer):
-        members = self._sync_request('listLoadBalancerRuleInstances',
-                                     id=balancer.id)
-        members = members['loadbalancerruleinstance']
+        members = self._paginated_request('listLoadBalancerRuleInstances',
+                                          'loadbalancerruleinstance',
+                                          id=balancer.id)
         return [self._to_member(m, balancer.ex_private_port) for m in members]
 
     def _to_balancer(self, obj):
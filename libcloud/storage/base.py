@@ -21,6 +21,9 @@ Provides base classes for working with storage
 from __future__ import with_statement
 
 import os.path                          # pylint: disable-msg=W0404
+import ssl
+import time
+import socket
 import hashlib
 from os.path import join as pjoin
 
@@ -29,12 +32,28 @@ from libcloud.utils.py3 import next
 from libcloud.utils.py3 import b
 
 import libcloud.utils.files
+from libcloud.utils.parallel import parallel_map
+from libcloud.utils.parallel import iterate_in_thread, BackgroundHash
 from libcloud.common.types import LibcloudError
 from libcloud.common.base import ConnectionUserAndKey, BaseDriver
 from libcloud.storage.types import ObjectDoesNotExistError
 
 CHUNK_SIZE = 8096
 
+# Default size of a byte range which is retrieved with a single request when
+# downloading an object using multiple concurrent ranged requests.
+DOWNLOAD_RANGE_SIZE = 8 * 1024 * 1024
+
+# Size of a block which is read from a local file and sent over the network
+# at once when uploading a file.
+UPLOAD_BLOCK_SIZE = 256 * 1024
+
+try:
+    memoryview = memoryview
+except NameError:
+    # Python < 2.7
+    memoryview = None
+
 class Object(object):
     """
     Represents an object (BLOB).
@@ -166,6 +185,20 @@ class StorageDriver(BaseDriver):
     hash_type = 'md5'
     supports_chunked_encoding = False
 
+    # Number of bytes which are read and sent / received and written at once
+    # when transferring object data. None means the default for a transfer
+    # type (CHUNK_SIZE for streams and UPLOAD_BLOCK_SIZE for files).
+    chunk_size = None
+
+    # True to adjust the chunk size of a transfer based on the measured
+    # throughput (see libcloud.utils.files.AdaptiveChunkSize). Chunk size
+    # which is explicitly passed to a method is never adjusted.
+    adaptive_chunk_size = False
+
+    # True to read, hash and send the data of a streamed upload on separate
+    # threads so the three overlap (see _stream_data).
+    pipelined_upload = False
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None, **kwargs):
       super(StorageDriver, self).__init__(key=key, secret=secret, secure=secure,
                                           host=host, port=port, **kwargs)
@@ -442,33 +475,22 @@ class StorageDriver(BaseDriver):
                                    exists.
 
         @type chunk_size: C{int}
-        @param chunk_size: Optional chunk size (defaults to L{libcloud.storage.base.CHUNK_SIZE}, 8kb)
+        @param chunk_size: Optional chunk size (defaults to the driver
+                           chunk_size or L{libcloud.storage.base.CHUNK_SIZE},
+                           8kb)
 
         @rtype: C{bool}
         @return: True on success, False otherwise.
         """
 
-        chunk_size = chunk_size or CHUNK_SIZE
-
-        base_name = os.path.basename(destination_path)
-
-        if not base_name and not os.path.exists(destination_path):
-            raise LibcloudError(
-                value='Path %s does not exist' % (destination_path),
-                driver=self)
-
-        if not base_name:
-            file_path = pjoin(destination_path, obj.name)
-        else:
-            file_path = destination_path
+        chunk_size, adaptive = self._get_chunk_size(chunk_size)
 
-        if os.path.exists(file_path) and not overwrite_existing:
-            raise LibcloudError(
-                value='File %s already exists, but ' % (file_path) +
-                'overwrite_existing=False',
-                driver=self)
+        file_path = self._get_object_file_path(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=overwrite_existing)
 
-        stream = libcloud.utils.files.read_in_chunks(response, chunk_size)
+        stream = libcloud.utils.files.read_in_chunks(response, chunk_size,
+                                                     adaptive=adaptive)
 
         try:
             data_read = next(stream)
@@ -500,6 +522,225 @@ class StorageDriver(BaseDriver):
 
         return True
 
+    def _get_object_file_path(self, obj, destination_path,
+                              overwrite_existing=False):
+        """
+        Return a path to the local file where the object should be saved.
+
+        @type obj: C{Object}
+        @param obj: Object instance.
+
+        @type destination_path: C{str}
+        @param destination_path: Full path to a file or a directory.
+
+        @type overwrite_existing: C{bool}
+        @param overwrite_existing: True to overwrite a local path if it already
+                                   exists.
+
+        @rtype: C{str}
+        """
+        base_name = os.path.basename(destination_path)
+
+        if not base_name and not os.path.exists(destination_path):
+            raise LibcloudError(
+                value='Path %s does not exist' % (destination_path),
+                driver=self)
+
+        if not base_name:
+            file_path = pjoin(destination_path, obj.name)
+        else:
+            file_path = destination_path
+
+        if os.path.exists(file_path) and not overwrite_existing:
+            raise LibcloudError(
+                value='File %s already exists, but ' % (file_path) +
+                'overwrite_existing=False',
+                driver=self)
+
+        return file_path
+
+    def _save_object_ranges(self, obj, request_path, destination_path,
+                            overwrite_existing=False, delete_on_failure=True,
+                            range_size=None, max_workers=4, chunk_size=None):
+        """
+        Download an object using multiple concurrent ranged GET requests and
+        save it to the provided path.
+
+        Local file is preallocated and every range is written at its offset as
+        soon as it arrives. Once all the ranges have been retrieved, hash of
+        the file is compared with the object hash (if the object hash is a
+        plain digest of the object content, see L{_is_content_hash}).
+
+        If the server doesn't support ranged requests (responds with the whole
+        object), the object is downloaded with a single request.
+
+        @type obj: C{Object}
+        @param obj: Object instance.
+
+        @type request_path: C{str}
+        @param request_path: Path which is used to retrieve the object.
+
+        @type destination_path: C{str}
+        @param destination_path: Full path to a file or a directory.
+
+        @type overwrite_existing: C{bool}
+        @param overwrite_existing: True to overwrite a local path if it already
+                                   exists.
+
+        @type delete_on_failure: C{bool}
+        @param delete_on_failure: True to delete partially downloaded object if
+                                  the download fails.
+
+        @type range_size: C{int}
+        @param range_size: Number of bytes retrieved with a single request
+                           (defaults to DOWNLOAD_RANGE_SIZE).
+
+        @type max_workers: C{int}
+        @param max_workers: Maximum number of concurrent requests.
+
+        @type chunk_size: C{int}
+        @param chunk_size: Optional chunk size (defaults to CHUNK_SIZE).
+
+        @rtype: C{bool}
+        @return: True on success, False otherwise.
+        """
+        range_size = range_size or DOWNLOAD_RANGE_SIZE
+        chunk_size, _ = self._get_chunk_size(chunk_size)
+
+        file_path = self._get_object_file_path(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=overwrite_existing)
+
+        size = int(obj.size)
+        ranges = [(start, min(start + range_size, size) - 1)
+                  for start in range(0, size, range_size)]
+
+        with open(file_path, 'wb') as file_handle:
+            file_handle.truncate(size)
+
+        def save_range(byte_range):
+            start, end = byte_range
+            headers = {'Range': 'bytes=%s-%s' % (start, end)}
+            response = self.connection.request(request_path, method='GET',
+                                               headers=headers, raw=True)
+
+            if response.status != httplib.PARTIAL_CONTENT:
+                # Body won't be read so the connection can't be reused
+                self.connection.connection.close()
+
+            if response.status == httplib.OK:
+                # Server has ignored the Range header
+                return None
+            elif response.status == httplib.NOT_FOUND:
+                raise ObjectDoesNotExistError(object_name=obj.name,
+                                              value='', driver=self)
+            elif response.status != httplib.PARTIAL_CONTENT:
+                raise LibcloudError(value='Unexpected status code: %s' %
+                                          (response.status),
+                                    driver=self)
+
+            http_response = response.response
+            bytes_transferred = 0
+
+            with open(file_path, 'r+b') as file_handle:
+                file_handle.seek(start)
+
+                while True:
+                    data = http_response.read(chunk_size)
+
+                    if not data:
+                        break
+
+                    file_handle.write(b(data))
+                    bytes_transferred += len(data)
+
+            # The whole body has been read so the connection can be reused
+            self.connection._release_connection(self.connection.connection)
+
+            return bytes_transferred
+
+        try:
+            transferred = parallel_map(save_range, ranges,
+                                       max_workers=max_workers)
+
+            if None in transferred:
+                # Ranged requests aren't supported, download the whole object
+                # with a single request instead
+                response = self.connection.request(request_path,
+                                                   method='GET', raw=True)
+                return self._get_object(
+                    obj=obj, callback=self._save_object, response=response,
+                    callback_kwargs={'obj': obj,
+                                     'response': response.response,
+                                     'destination_path': file_path,
+                                     'overwrite_existing': True,
+                                     'delete_on_failure': delete_on_failure,
+                                     'chunk_size': chunk_size},
+                    success_status_code=httplib.OK)
+        except Exception:
+            if delete_on_failure:
+                self._delete_file(file_path)
+            raise
+
+        success = (sum(transferred) == size)
+
+        if success and self._is_content_hash(obj):
+            success = (self._get_file_hash(file_path, chunk_size) ==
+                       obj.hash.strip('"').lower())
+
+        if not success and delete_on_failure:
+            self._delete_file(file_path)
+
+        return success
+
+    def _is_content_hash(self, obj):
+        """
+        Return True if the object hash is a digest of the object content and
+        can be compared with the hash of the downloaded data.
+
+        @type obj: C{Object}
+        @param obj: Object instance.
+
+        @rtype: C{bool}
+        """
+        if not obj.hash:
+            return False
+
+        if '-' in obj.hash:
+            # Multipart uploads have a different ETag format (md5-parts)
+            return False
+
+        if (obj.extra or {}).get('object_manifest'):
+            # ETag of a manifest object (segmented upload) is a hash of the
+            # segment ETags and not of the content
+            return False
+
+        return True
+
+    def _get_file_hash(self, file_path, chunk_size=None):
+        """
+        Return hex digest of a local file.
+        """
+        chunk_size = chunk_size or CHUNK_SIZE
+        data_hash = self._get_hash_function()
+
+        with open(file_path, 'rb') as file_handle:
+            while True:
+                data = file_handle.read(chunk_size)
+
+                if not data:
+                    break
+
+                data_hash.update(data)
+
+        return data_hash.hexdigest()
+
+    def _delete_file(self, file_path):
+        try:
+            os.unlink(file_path)
+        except Exception:
+            pass
+
     def _upload_object(self, object_name, content_type, upload_func,
                        upload_func_kwargs, request_path, request_method='PUT',
                        headers=None, file_path=None, iterator=None):
@@ -627,7 +868,8 @@ class StorageDriver(BaseDriver):
                                (defauls to True).
 
         @type chunk_size: C{int}
-        @param chunk_size: Optional chunk size (defaults to CHUNK_SIZE)
+        @param chunk_size: Optional chunk size (defaults to the driver
+                           chunk_size or CHUNK_SIZE)
 
         @rtype: C{tuple}
         @return: First item is a boolean indicator of success, second
@@ -635,13 +877,22 @@ class StorageDriver(BaseDriver):
                  is the number of transferred bytes.
         """
 
-        chunk_size = chunk_size or CHUNK_SIZE
+        chunk_size, adaptive = self._get_chunk_size(chunk_size)
+        pipelined = self.pipelined_upload
 
         data_hash = None
         if calculate_hash:
             data_hash = self._get_hash_function()
 
-        generator = libcloud.utils.files.read_in_chunks(iterator, chunk_size)
+            if pipelined:
+                data_hash = BackgroundHash(data_hash)
+
+        generator = libcloud.utils.files.read_in_chunks(iterator, chunk_size,
+                                                        adaptive=adaptive)
+
+        if pipelined:
+            # Next chunk is read while the current one is being sent
+            generator = iterate_in_thread(generator)
 
         bytes_transferred = 0
         try:
@@ -661,6 +912,11 @@ class StorageDriver(BaseDriver):
             return True, data_hash.hexdigest(), bytes_transferred
 
         while len(chunk) > 0:
+            if calculate_hash:
+                # Hash is updated first so a background hash can be computed
+                # while the chunk is being sent
+                data_hash.update(b(chunk))
+
             try:
                 if chunked:
                     response.connection.connection.send(b('%X\r\n' %
@@ -672,11 +928,15 @@ class StorageDriver(BaseDriver):
             except Exception:
                 # TODO: let this exception propagate
                 # Timeout, etc.
+                if pipelined:
+                    generator.close()
+
+                    if calculate_hash:
+                        data_hash.close()
+
                 return False, None, bytes_transferred
 
             bytes_transferred += len(chunk)
-            if calculate_hash:
-                data_hash.update(b(chunk))
 
             try:
                 chunk = next(generator)
@@ -692,10 +952,15 @@ class StorageDriver(BaseDriver):
         return True, data_hash, bytes_transferred
 
     def _upload_file(self, response, file_path, chunked=False,
-                     calculate_hash=True):
+                     calculate_hash=True, chunk_size=None):
         """
         Upload a file to the server.
 
+        If chunked transfer encoding is not used, file is sent in large blocks
+        which are read into a single reusable buffer. On a plain (non-TLS)
+        socket the data is sent with sendfile() so it doesn't need to be
+        copied into Python for sending.
+
         @type response: C{RawResponse}
         @param response: RawResponse object.
 
@@ -706,21 +971,143 @@ class StorageDriver(BaseDriver):
         @param response: An object which implements an iterator interface (File
                          object, etc.)
 
+        @type chunk_size: C{int}
+        @param chunk_size: Optional chunk size (defaults to the driver
+                           chunk_size or UPLOAD_BLOCK_SIZE)
+
         @rtype: C{tuple}
         @return: First item is a boolean indicator of success, second
                  one is the uploaded data MD5 hash and the third one
                  is the number of transferred bytes.
         """
         with open(file_path, 'rb') as file_handle:
+            if not chunked and memoryview is not None:
+                return self._send_file(response=response,
+                                       file_handle=file_handle,
+                                       calculate_hash=calculate_hash,
+                                       chunk_size=chunk_size)
+
             success, data_hash, bytes_transferred = (
                 self._stream_data(
                     response=response,
-                    iterator=iter(file_handle),
+                    iterator=file_handle,
                     chunked=chunked,
-                    calculate_hash=calculate_hash))
+                    calculate_hash=calculate_hash,
+                    chunk_size=chunk_size))
 
         return success, data_hash, bytes_transferred
 
+    def _send_file(self, response, file_handle, calculate_hash=True,
+                   chunk_size=None):
+        """
+        Send content of an open file over an http connection.
+
+        @type response: C{RawResponse}
+        @param response: RawResponse object.
+
+        @type file_handle: C{file}
+        @param file_handle: File opened in binary mode.
+
+        @type calculate_hash: C{boolean}
+        @param calculate_hash: True to calculate hash of the transfered data.
+
+        @type chunk_size: C{int}
+        @param chunk_size: Optional chunk size (defaults to the driver
+                           chunk_size or UPLOAD_BLOCK_SIZE)
+
+        @rtype: C{tuple}
+        @return: First item is a boolean indicator of success, second
+                 one is the uploaded data MD5 hash and the third one
+                 is the number of transferred bytes.
+        """
+        chunk_size, adaptive = self._get_chunk_size(chunk_size,
+                                                    default=UPLOAD_BLOCK_SIZE)
+        connection = response.connection.connection
+        sock = getattr(connection, 'sock', None)
+
+        # socket.sendfile() falls back to send() for TLS sockets so the data
+        # would be copied anyway
+        use_sendfile = (isinstance(sock, socket.socket) and
+                        not isinstance(sock, ssl.SSLSocket) and
+                        hasattr(sock, 'sendfile'))
+
+        data_hash = None
+        bytes_transferred = 0
+
+        if use_sendfile and not calculate_hash:
+            try:
+                bytes_transferred = sock.sendfile(file_handle)
+            except Exception:
+                return False, None, bytes_transferred
+
+            return True, None, bytes_transferred
+
+        if calculate_hash:
+            data_hash = self._get_hash_function()
+
+        sizer = None
+
+        if adaptive:
+            sizer = libcloud.utils.files.AdaptiveChunkSize(size=chunk_size)
+            buf = bytearray(sizer.max_size)
+        else:
+            buf = bytearray(chunk_size)
+
+        view = memoryview(buf)
+        start = time.time()
+
+        while True:
+            size = file_handle.readinto(view[:chunk_size])
+
+            if not size:
+                break
+
+            block = view[:size]
+
+            if calculate_hash:
+                data_hash.update(block)
+
+            try:
+                if use_sendfile:
+                    # Block has just been read so it is in the page cache
+                    sock.sendfile(file_handle, bytes_transferred, size)
+                else:
+                    connection.send(block)
+            except Exception:
+                # Timeout, etc.
+                return False, None, bytes_transferred
+
+            bytes_transferred += size
+
+            if sizer is not None:
+                now = time.time()
+                chunk_size = sizer.update(size, now - start)
+                start = now
+
+        if calculate_hash:
+            data_hash = data_hash.hexdigest()
+
+        return True, data_hash, bytes_transferred
+
+    def _get_chunk_size(self, chunk_size=None, default=CHUNK_SIZE):
+        """
+        Return a chunk size for a transfer and a boolean indicating whether
+        it should be adjusted based on the measured throughput.
+
+        @type chunk_size: C{int}
+        @param chunk_size: Chunk size which has been passed to a method.
+
+        @type default: C{int}
+        @param default: Chunk size used if neither chunk_size nor the driver
+                        chunk_size is set.
+
+        @rtype: C{tuple}
+        """
+        if chunk_size:
+            return chunk_size, False
+
+        return (self.chunk_size or default), self.adaptive_chunk_size
+
     def _get_hash_function(self):
         """
         Return instantiated hash function for the hash type supported by
@@ -71,6 +71,7 @@ class AtmosResponse(XmlResponse):
 
 class AtmosConnection(ConnectionUserAndKey):
     responseCls = AtmosResponse
+    follows_http_semantics = True
 
     def add_default_headers(self, headers):
         headers['x-emc-uid'] = self.user_id
@@ -380,9 +381,29 @@ class AtmosDriver(StorageDriver):
             raise ObjectDoesNotExistError(e, self, obj.name)
         return True
 
-    def list_container_objects(self, container):
+    def list_container_objects(self, container, ex_prefetch=False,
+                               ex_cache=True):
+        """
+        Return a list of objects for the given container.
+
+        @type container: C{Container}
+        @param container: Container instance
+
+        @type ex_prefetch: C{bool}
+        @param ex_prefetch: True to retrieve the next page of the listing in
+                            the background while the current one is being
+                            consumed.
+
+        @type ex_cache: C{bool}
+        @param ex_cache: False to discard objects once they have been yielded
+                         so the memory usage stays bounded when iterating
+                         over very large containers.
+
+        @return: A L{LazyList} of Object instances.
+        """
         value_dict = {'container': container}
-        return LazyList(get_more=self._get_more, value_dict=value_dict)
+        return LazyList(get_more=self._get_more, value_dict=value_dict,
+                        prefetch=ex_prefetch, cache=ex_cache)
 
     def enable_object_cdn(self, obj):
         return True
@@ -30,11 +30,14 @@ if PY3:
     from io import FileIO as file
 
 from libcloud.utils.files import read_in_chunks
+from libcloud.utils.parallel import parallel_map
 from libcloud.common.types import MalformedResponseError, LibcloudError
 from libcloud.common.base import Response, RawResponse
+from libcloud.common.base import _request_state_property
 
 from libcloud.storage.providers import Provider
 from libcloud.storage.base import Object, Container, StorageDriver
+from libcloud.storage.base import DOWNLOAD_RANGE_SIZE
 from libcloud.storage.types import ContainerAlreadyExistsError
 from libcloud.storage.types import ContainerDoesNotExistError
 from libcloud.storage.types import ContainerIsNotEmptyError
@@ -103,12 +106,16 @@ class CloudFilesConnection(OpenStackBaseConnection):
     responseCls = CloudFilesResponse
     rawResponseCls = CloudFilesRawResponse
 
+    # Set by every request, CDN and storage requests can be performed by
+    # different threads at the same time
+    cdn_request = _request_state_property('cdn_request',
+                                          default=lambda: False)
+
     def __init__(self, user_id, key, secure=True, **kwargs):
         super(CloudFilesConnection, self).__init__(user_id, key, secure=secure,
                                                    **kwargs)
         self.api_version = API_VERSION
         self.accept_format = 'application/json'
-        self.cdn_request = False
 
     def get_endpoint(self):
         # First, we parse out both files and cdn endpoints
@@ -208,6 +215,7 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
     connectionCls = CloudFilesConnection
     hash_type = 'md5'
     supports_chunked_encoding = True
+    adaptive_chunk_size = True
 
     def __init__(self, *args, **kwargs):
         OpenStackDriverMixin.__init__(self, *args, **kwargs)
@@ -223,9 +231,29 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
         raise LibcloudError('Unexpected status code: %s' % (response.status))
 
-    def list_container_objects(self, container):
+    def list_container_objects(self, container, ex_prefetch=False,
+                               ex_cache=True):
+        """
+        Return a list of objects for the given container.
+
+        @type container: C{Container}
+        @param container: Container instance
+
+        @type ex_prefetch: C{bool}
+        @param ex_prefetch: True to retrieve the next page of the listing in
+                            the background while the current one is being
+                            consumed.
+
+        @type ex_cache: C{bool}
+        @param ex_cache: False to discard objects once they have been yielded
+                         so the memory usage stays bounded when iterating
+                         over very large containers.
+
+        @return: A L{LazyList} of Object instances.
+        """
         value_dict = { 'container': container }
-        return LazyList(get_more=self._get_more, value_dict=value_dict)
+        return LazyList(get_more=self._get_more, value_dict=value_dict,
+                        prefetch=ex_prefetch, cache=ex_cache)
 
     def get_container(self, container_name):
         response = self.connection.request('/%s' % (container_name),
@@ -324,9 +352,42 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
                                            container_name=name, driver=self)
 
     def download_object(self, obj, destination_path, overwrite_existing=False,
-                        delete_on_failure=True):
+                        delete_on_failure=True, ex_max_workers=1,
+                        ex_range_size=None, ex_chunk_size=None):
+        """
+        Download an object to the specified destination path.
+
+        If ex_max_workers is larger than 1, object is split into byte ranges
+        of ex_range_size bytes which are downloaded concurrently using ranged
+        GET requests.
+
+        @type ex_max_workers: C{int}
+        @param ex_max_workers: Maximum number of concurrent ranged requests.
+
+        @type ex_range_size: C{int}
+        @param ex_range_size: Number of bytes retrieved with a single ranged
+                              request (defaults to 8 MB).
+
+        @type ex_chunk_size: C{int}
+        @param ex_chunk_size: Number of bytes read from the response and
+                              written to the file at once (defaults to the
+                              driver chunk_size, adjusted to the measured
+                              throughput).
+        """
         container_name = obj.container.name
         object_name = obj.name
+        range_size = ex_range_size or DOWNLOAD_RANGE_SIZE
+
+        if ex_max_workers > 1 and int(obj.size) > range_size:
+            request_path = '/%s/%s' % (container_name, object_name)
+            return self._save_object_ranges(
+                obj=obj, request_path=request_path,
+                destination_path=destination_path,
+                overwrite_existing=overwrite_existing,
+                delete_on_failure=delete_on_failure,
+                range_size=range_size, max_workers=ex_max_workers,
+                chunk_size=ex_chunk_size)
+
         response = self.connection.request('/%s/%s' % (container_name,
                                                        object_name),
                                            method='GET', raw=True)
@@ -337,7 +398,8 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
                                  'response': response.response,
                                  'destination_path': destination_path,
                                  'overwrite_existing': overwrite_existing,
-                                 'delete_on_failure': delete_on_failure},
+                                 'delete_on_failure': delete_on_failure,
+                                 'chunk_size': ex_chunk_size},
                                 success_status_code=httplib.OK)
 
     def download_object_as_stream(self, obj, chunk_size=None):
@@ -346,23 +408,33 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         response = self.connection.request('/%s/%s' % (container_name,
                                                        object_name),
                                            method='GET', raw=True)
+        chunk_size, adaptive = self._get_chunk_size(chunk_size)
 
         return self._get_object(obj=obj, callback=read_in_chunks,
                                 response=response,
                                 callback_kwargs={'iterator': response.response,
-                                                 'chunk_size': chunk_size},
+                                                 'chunk_size': chunk_size,
+                                                 'adaptive': adaptive},
                                 success_status_code=httplib.OK)
 
     def upload_object(self, file_path, container, object_name, extra=None,
-                      verify_hash=True):
+                      verify_hash=True, ex_chunk_size=None):
         """
         Upload an object.
 
         Note: This will override file with a same name if it already exists.
+
+        @type ex_chunk_size: C{int}
+        @param ex_chunk_size: Number of bytes read from the file and sent at
+                              once (defaults to the driver chunk_size,
+                              adjusted to the measured throughput).
         """
         upload_func = self._upload_file
         upload_func_kwargs = { 'file_path': file_path }
 
+        if ex_chunk_size:
+            upload_func_kwargs['chunk_size'] = ex_chunk_size
+
         return self._put_object(container=container, object_name=object_name,
                                 upload_func=upload_func,
                                 upload_func_kwargs=upload_func_kwargs,
@@ -416,20 +488,76 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
     def ex_multipart_upload_object(self, file_path, container, object_name,
                                    chunk_size=33554432, extra=None,
-                                   verify_hash=True):
+                                   verify_hash=True, max_workers=1,
+                                   max_retries=2, resume=False):
+        """
+        Upload a large file as a set of segments and a manifest object which
+        references them.
+
+        @param chunk_size: Size of a single segment in bytes.
+        @type chunk_size: C{int}
+
+        @param max_workers: Number of segments which are uploaded in parallel.
+        @type max_workers: C{int}
+
+        @param max_retries: Number of times the upload of a single segment is
+                            retried before giving up.
+        @type max_retries: C{int}
+
+        @param resume: True to skip segments which have already been uploaded
+                       (e.g. by a previous failed call) and whose hash
+                       matches the hash of the local data.
+        @type resume: C{bool}
+        """
         object_size = os.path.getsize(file_path)
         if object_size < chunk_size:
             return self.upload_object(file_path, container, object_name,
                     extra=extra, verify_hash=verify_hash)
 
-        iter_chunk_reader = FileChunkReader(file_path, chunk_size)
-
-        for index, iterator in enumerate(iter_chunk_reader):
-            self._upload_object_part(container=container,
-                                     object_name=object_name,
-                                     part_number=index,
-                                     iterator=iterator,
-                                     verify_hash=verify_hash)
+        uploaded_segments = {}
+        if resume:
+            uploaded_segments = self._get_uploaded_segments(container,
+                                                            object_name)
+
+        read_size, _ = self._get_chunk_size()
+
+        segments = []
+        for part_number, start_block in \
+                enumerate(range(0, object_size, chunk_size)):
+            end_block = min(start_block + chunk_size, object_size)
+            segments.append((part_number, start_block, end_block))
+
+        def upload_segment(segment):
+            part_number, start_block, end_block = segment
+            part_name = self._get_segment_name(object_name, part_number)
+
+            if part_name in uploaded_segments:
+                size, hash = uploaded_segments[part_name]
+                local_hash = self._get_segment_hash(file_path, start_block,
+                                                    end_block)
+
+                if size == end_block - start_block and hash == local_hash:
+                    return
+
+            attempt = 0
+            while True:
+                iterator = ChunkStreamReader(file_path=file_path,
+                                             start_block=start_block,
+                                             end_block=end_block,
+                                             chunk_size=read_size)
+                try:
+                    return self._upload_object_part(container=container,
+                                                    object_name=object_name,
+                                                    part_number=part_number,
+                                                    iterator=iterator,
+                                                    verify_hash=verify_hash)
+                except Exception:
+                    attempt += 1
+
+                    if attempt > max_retries:
+                        raise
+
+        parallel_map(upload_segment, segments, max_workers=max_workers)
 
         return self._upload_object_manifest(container=container,
                                             object_name=object_name,
@@ -472,12 +600,40 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
         return response.status in [ httplib.CREATED, httplib.ACCEPTED ]
 
+    def _get_segment_name(self, object_name, part_number):
+        return object_name + '/%08d' % part_number
+
+    def _get_segment_hash(self, file_path, start_block, end_block):
+        """
+        Return hash of the local data which belongs to a single segment.
+        """
+        data_hash = self._get_hash_function()
+        read_size, _ = self._get_chunk_size()
+
+        for data in ChunkStreamReader(file_path=file_path,
+                                      start_block=start_block,
+                                      end_block=end_block,
+                                      chunk_size=read_size):
+            data_hash.update(b(data))
+
+        return data_hash.hexdigest()
+
+    def _get_uploaded_segments(self, container, object_name):
+        """
+        Return a dictionary which maps names of the already uploaded segments
+        of the provided object to their (size, hash) tuple.
+        """
+        value_dict = {'container': container, 'prefix': object_name + '/'}
+        objects = LazyList(get_more=self._get_more, value_dict=value_dict)
+
+        return dict([(obj.name, (obj.size, obj.hash)) for obj in objects])
+
     def _upload_object_part(self, container, object_name, part_number,
                             iterator, verify_hash=True):
 
         upload_func = self._stream_data
         upload_func_kwargs = {'iterator': iterator}
-        part_name = object_name + '/%08d' % part_number
+        part_name = self._get_segment_name(object_name, part_number)
         extra = {'content_type': 'application/octet-stream'}
 
         self._put_object(container=container,
@@ -496,9 +652,10 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         object_name_cleaned = self._clean_object_name(object_name)
         request_path = '/%s/%s' % (container_name_cleaned, object_name_cleaned)
 
+        object_manifest = '%s/%s/' % (container_name_cleaned,
+                                      object_name_cleaned)
         headers = {'X-Auth-Token': self.connection.auth_token,
-                   'X-Object-Manifest': '%s/%s/' % \
-                       (container_name_cleaned, object_name_cleaned)}
+                   'X-Object-Manifest': object_manifest}
 
         data = ''
         response = self.connection.request(request_path,
@@ -520,7 +677,8 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
                            (data_hash, object_hash),
                     object_name=object_name, driver=self)
 
-        obj = Object(name=object_name, size=0, hash=object_hash, extra=None,
+        extra = {'object_manifest': object_manifest}
+        obj = Object(name=object_name, size=0, hash=object_hash, extra=extra,
                      meta_data=meta_data, container=container, driver=self)
 
         return obj
@@ -532,6 +690,9 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         if last_key:
             params['marker'] = last_key
 
+        if value_dict.get('prefix', None):
+            params['prefix'] = value_dict['prefix']
+
         response = self.connection.request('/%s' % (container.name),
                                           params=params)
 
@@ -667,6 +828,7 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         last_modified = headers.pop('last-modified', None)
         etag = headers.pop('etag', None)
         content_type = headers.pop('content-type', None)
+        object_manifest = headers.pop('x-object-manifest', None)
 
         meta_data = {}
         for key, value in list(headers.items()):
@@ -676,6 +838,10 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
         extra = {'content_type': content_type, 'last_modified': last_modified}
 
+        if object_manifest:
+            # Segmented object, etag is not a hash of the content
+            extra['object_manifest'] = object_manifest
+
         obj = Object(name=name, size=size, hash=etag, extra=extra,
                      meta_data=meta_data, container=container, driver=self)
         return obj
@@ -723,35 +889,6 @@ class CloudFilesUKStorageDriver(CloudFilesStorageDriver):
     connectionCls = CloudFilesUKConnection
 
 
-class FileChunkReader(object):
-    def __init__(self, file_path, chunk_size):
-        self.file_path = file_path
-        self.total = os.path.getsize(file_path)
-        self.chunk_size = chunk_size
-        self.bytes_read = 0
-        self.stop_iteration = False
-
-    def __iter__(self):
-        return self
-
-    def next(self):
-        if self.stop_iteration:
-            raise StopIteration
-
-        start_block = self.bytes_read
-        end_block = start_block + self.chunk_size
-        if end_block >= self.total:
-            end_block = self.total
-            self.stop_iteration = True
-        self.bytes_read += end_block - start_block
-        return ChunkStreamReader(file_path=self.file_path,
-                                 start_block=start_block,
-                                 end_block=end_block,
-                                 chunk_size=8192)
-
-    def __next__(self):
-        return self.next()
-
 class ChunkStreamReader(object):
     def __init__(self, file_path, start_block, end_block, chunk_size):
         self.fd = open(file_path, 'rb')
@@ -44,6 +44,7 @@ class GoogleStorageConnection(ConnectionUserAndKey):
     host = AUTH_HOST
     responseCls = S3Response
     rawResponseCls = S3RawResponse
+    follows_http_semantics = True
 
     def add_default_headers(self, headers):
         date = formatdate(usegmt=True)
@@ -132,3 +133,4 @@ class GoogleStorageDriver(S3StorageDriver):
     hash_type = 'md5'
     namespace = NAMESPACE
     supports_chunked_encoding = False
+    supports_s3_multipart_upload = False
@@ -13,12 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import os
 import time
 import copy
 import base64
 import hmac
 
-from hashlib import sha1
+from hashlib import sha1, md5
 from xml.etree.ElementTree import Element, SubElement, tostring
 
 from libcloud.utils.py3 import PY3
@@ -26,13 +30,16 @@ from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import urlquote
 from libcloud.utils.py3 import b
 
+from libcloud.utils.py3 import next
+
 from libcloud.utils.xml import fixxpath, findtext
-from libcloud.utils.files import read_in_chunks
+from libcloud.utils.files import read_in_chunks, guess_file_mime_type
 from libcloud.common.types import InvalidCredsError, LibcloudError
 from libcloud.common.base import ConnectionUserAndKey, RawResponse
 from libcloud.common.aws import AWSBaseResponse
 
 from libcloud.storage.base import Object, Container, StorageDriver
+from libcloud.storage.base import DOWNLOAD_RANGE_SIZE
 from libcloud.storage.types import ContainerIsNotEmptyError
 from libcloud.storage.types import InvalidContainerNameError
 from libcloud.storage.types import ContainerDoesNotExistError
@@ -53,6 +60,16 @@ S3_AP_NORTHEAST_HOST = 's3-ap-northeast-1.amazonaws.com'
 API_VERSION = '2006-03-01'
 NAMESPACE = 'http://s3.amazonaws.com/doc/%s/' % (API_VERSION)
 
+# Query string parameters which are part of the signed resource
+SUB_RESOURCES = ['partNumber', 'uploadId', 'uploads']
+
+# Size of a single part in a multipart upload (Amazon S3 requires all the
+# parts except the last one to be at least 5 MB large)
+CHUNK_SIZE = 5 * 1024 * 1024
+
+# Files larger than this are uploaded using multipart upload
+MULTIPART_UPLOAD_THRESHOLD = 100 * 1024 * 1024
+
 
 class S3Response(AWSBaseResponse):
 
@@ -84,6 +101,7 @@ class S3Connection(ConnectionUserAndKey):
     host = 's3.amazonaws.com'
     responseCls = S3Response
     rawResponseCls = S3RawResponse
+    follows_http_semantics = True
 
     def add_default_params(self, params):
         expires = str(int(time.time()) + EXPIRATION_SECONDS)
@@ -97,9 +115,30 @@ class S3Connection(ConnectionUserAndKey):
                                                        params=params,
                                                        expires=params['Expires'],
                                                        secret_key=self.key,
-                                                       path=self.action)
+                                                       path=self._get_signed_path(params))
         return params, headers
 
+    def _get_signed_path(self, params):
+        """
+        Return the canonicalized resource which includes the sub-resources
+        (e.g. ?uploads, ?partNumber=1&uploadId=foo) present in the params.
+        """
+        sub_resources = []
+        for key in SUB_RESOURCES:
+            if key not in params:
+                continue
+
+            value = params[key]
+            if value == '' or value is None:
+                sub_resources.append(key)
+            else:
+                sub_resources.append('%s=%s' % (key, value))
+
+        if not sub_resources:
+            return self.action
+
+        return '%s?%s' % (self.action, '&'.join(sub_resources))
+
     def _get_aws_auth_param(self, method, headers, params, expires,
                             secret_key, path='/'):
         """
@@ -167,9 +206,16 @@ class S3StorageDriver(StorageDriver):
     connectionCls = S3Connection
     hash_type = 'md5'
     supports_chunked_encoding = False
+    supports_s3_multipart_upload = True
     ex_location_name = ''
     namespace = NAMESPACE
 
+    # Size of a single part and minimum file size for multipart uploads
+    multipart_chunk_size = CHUNK_SIZE
+    multipart_upload_threshold = MULTIPART_UPLOAD_THRESHOLD
+
+    adaptive_chunk_size = True
+
     def list_containers(self):
         response = self.connection.request('/')
         if response.status == httplib.OK:
@@ -180,9 +226,29 @@ class S3StorageDriver(StorageDriver):
         raise LibcloudError('Unexpected status code: %s' % (response.status),
                             driver=self)
 
-    def list_container_objects(self, container):
+    def list_container_objects(self, container, ex_prefetch=False,
+                               ex_cache=True):
+        """
+        Return a list of objects for the given container.
+
+        @type container: C{Container}
+        @param container: Container instance
+
+        @type ex_prefetch: C{bool}
+        @param ex_prefetch: True to retrieve the next page of the listing in
+                            the background while the current one is being
+                            consumed.
+
+        @type ex_cache: C{bool}
+        @param ex_cache: False to discard objects once they have been yielded
+                         so the memory usage stays bounded when iterating
+                         over very large containers.
+
+        @return: A L{LazyList} of Object instances.
+        """
         value_dict = { 'container': container }
-        return LazyList(get_more=self._get_more, value_dict=value_dict)
+        return LazyList(get_more=self._get_more, value_dict=value_dict,
+                        prefetch=ex_prefetch, cache=ex_cache)
 
     def get_container(self, container_name):
         # This is very inefficient, but afaik it's the only way to do it
@@ -267,9 +333,41 @@ class S3StorageDriver(StorageDriver):
         return False
 
     def download_object(self, obj, destination_path, overwrite_existing=False,
-                        delete_on_failure=True):
+                        delete_on_failure=True, ex_max_workers=1,
+                        ex_range_size=None, ex_chunk_size=None):
+        """
+        Download an object to the specified destination path.
+
+        If ex_max_workers is larger than 1, object is split into byte ranges
+        of ex_range_size bytes which are downloaded concurrently using ranged
+        GET requests.
+
+        @type ex_max_workers: C{int}
+        @param ex_max_workers: Maximum number of concurrent ranged requests.
+
+        @type ex_range_size: C{int}
+        @param ex_range_size: Number of bytes retrieved with a single ranged
+                              request (defaults to 8 MB).
+
+        @type ex_chunk_size: C{int}
+        @param ex_chunk_size: Number of bytes read from the response and
+                              written to the file at once (defaults to the
+                              driver chunk_size, adjusted to the measured
+                              throughput).
+        """
         container_name = self._clean_object_name(obj.container.name)
         object_name = self._clean_object_name(obj.name)
+        range_size = ex_range_size or DOWNLOAD_RANGE_SIZE
+
+        if ex_max_workers > 1 and int(obj.size) > range_size:
+            request_path = '/%s/%s' % (container_name, object_name)
+            return self._save_object_ranges(
+                obj=obj, request_path=request_path,
+                destination_path=destination_path,
+                overwrite_existing=overwrite_existing,
+                delete_on_failure=delete_on_failure,
+                range_size=range_size, max_workers=ex_max_workers,
+                chunk_size=ex_chunk_size)
 
         response = self.connection.request('/%s/%s' % (container_name,
                                                        object_name),
@@ -282,7 +380,8 @@ class S3StorageDriver(StorageDriver):
                                  'response': response.response,
                                  'destination_path': destination_path,
                                  'overwrite_existing': overwrite_existing,
-                                 'delete_on_failure': delete_on_failure},
+                                 'delete_on_failure': delete_on_failure,
+                                 'chunk_size': ex_chunk_size},
                                 success_status_code=httplib.OK)
 
     def download_object_as_stream(self, obj, chunk_size=None):
@@ -291,18 +390,50 @@ class S3StorageDriver(StorageDriver):
         response = self.connection.request('/%s/%s' % (container_name,
                                                        object_name),
                                            method='GET', raw=True)
+        chunk_size, adaptive = self._get_chunk_size(chunk_size)
 
         return self._get_object(obj=obj, callback=read_in_chunks,
                                 response=response,
                                 callback_kwargs={ 'iterator': response.response,
-                                                  'chunk_size': chunk_size},
+                                                  'chunk_size': chunk_size,
+                                                  'adaptive': adaptive},
                                 success_status_code=httplib.OK)
 
     def upload_object(self, file_path, container, object_name, extra=None,
-                      verify_hash=True, ex_storage_class=None):
+                      verify_hash=True, ex_storage_class=None,
+                      ex_chunk_size=None):
+        """
+        Upload an object currently located on a disk.
+
+        Files larger than multipart_upload_threshold bytes are uploaded using
+        multipart upload (if supported by the provider).
+
+        @type ex_storage_class: C{str}
+        @param ex_storage_class: Storage class (standard or
+                                 reduced_redundancy).
+
+        @type ex_chunk_size: C{int}
+        @param ex_chunk_size: Number of bytes read from the file and sent at
+                              once (defaults to the driver chunk_size,
+                              adjusted to the measured throughput).
+        """
+        if self.supports_s3_multipart_upload and os.path.exists(file_path) \
+           and os.path.getsize(file_path) > self.multipart_upload_threshold:
+            chunk_size = self.multipart_chunk_size
+
+            with open(file_path, 'rb') as file_handle:
+                iterator = iter(lambda: file_handle.read(chunk_size), b(''))
+                return self._put_object_multipart(
+                    container=container, object_name=object_name,
+                    iterator=iterator, extra=extra, file_path=file_path,
+                    verify_hash=verify_hash, storage_class=ex_storage_class)
+
         upload_func = self._upload_file
         upload_func_kwargs = { 'file_path': file_path }
 
+        if ex_chunk_size:
+            upload_func_kwargs['chunk_size'] = ex_chunk_size
+
         return self._put_object(container=container, object_name=object_name,
                                 upload_func=upload_func,
                                 upload_func_kwargs=upload_func_kwargs,
@@ -312,8 +443,26 @@ class S3StorageDriver(StorageDriver):
 
     def upload_object_via_stream(self, iterator, container, object_name,
                                  extra=None, ex_storage_class=None):
-        # Amazon S3 does not support chunked transfer encoding so the whole data
-        # is read into memory before uploading the object.
+        """
+        Upload an object using an iterator.
+
+        If the provider supports multipart upload, data is sent in parts of
+        multipart_chunk_size bytes so only a single part needs to be buffered
+        in memory. Otherwise the whole data is read into memory before
+        uploading the object, because Amazon S3 does not support chunked
+        transfer encoding.
+
+        @type ex_storage_class: C{str}
+        @param ex_storage_class: Storage class (standard or
+                                 reduced_redundancy).
+        """
+        if self.supports_s3_multipart_upload:
+            return self._put_object_multipart(container=container,
+                                              object_name=object_name,
+                                              iterator=iterator, extra=extra,
+                                              verify_hash=False,
+                                              storage_class=ex_storage_class)
+
         upload_func = self._upload_data
         upload_func_kwargs = {}
 
@@ -349,11 +498,14 @@ class S3StorageDriver(StorageDriver):
             params['marker'] = last_key
 
         response = self.connection.request('/%s' % (container.name),
-                                           params=params)
+                                           params=params, stream=True)
 
         if response.status == httplib.OK:
-            objects = self._to_objs(obj=response.object,
-                                       xpath='Contents', container=container)
+            # Contents elements are discarded as soon as they have been
+            # converted so the XML tree of the whole page is never built
+            objects = [self._to_obj(element, container) for element in
+                       response.iterparse('Contents',
+                                          namespace=self.namespace)]
             is_truncated = response.object.findtext(fixxpath(xpath='IsTruncated',
                                                    namespace=self.namespace)).lower()
             exhausted = (is_truncated == 'false')
@@ -370,24 +522,15 @@ class S3StorageDriver(StorageDriver):
     def _put_object(self, container, object_name, upload_func,
                     upload_func_kwargs, extra=None, file_path=None,
                     iterator=None, verify_hash=True, storage_class=None):
-        headers = {}
         extra = extra or {}
-        storage_class = storage_class or 'standard'
-        if storage_class not in ['standard', 'reduced_redundancy']:
-            raise ValueError('Invalid storage class value: %s' % (storage_class))
-
-        headers['x-amz-storage-class'] = storage_class.upper()
+        headers = self._get_put_headers(extra=extra,
+                                        storage_class=storage_class)
 
         container_name_cleaned = container.name
         object_name_cleaned = self._clean_object_name(object_name)
         content_type = extra.get('content_type', None)
         meta_data = extra.get('meta_data', None)
 
-        if meta_data:
-            for key, value in list(meta_data.items()):
-                key = 'x-amz-meta-%s' % (key)
-                headers[key] = value
-
         request_path = '/%s/%s' % (container_name_cleaned, object_name_cleaned)
         # TODO: Let the underlying exceptions bubble up and capture the SIGPIPE
         # here.
@@ -423,14 +566,193 @@ class S3StorageDriver(StorageDriver):
             raise LibcloudError('Unexpected status code, status_code=%s' % (response.status),
                                 driver=self)
 
+    def _get_put_headers(self, extra, storage_class=None):
+        headers = {}
+        storage_class = storage_class or 'standard'
+        if storage_class not in ['standard', 'reduced_redundancy']:
+            raise ValueError('Invalid storage class value: %s' % (storage_class))
+
+        headers['x-amz-storage-class'] = storage_class.upper()
+
+        meta_data = extra.get('meta_data', None)
+
+        if meta_data:
+            for key, value in list(meta_data.items()):
+                key = 'x-amz-meta-%s' % (key)
+                headers[key] = value
+
+        return headers
+
+    def _put_object_multipart(self, container, object_name, iterator,
+                              extra=None, file_path=None, verify_hash=True,
+                              storage_class=None):
+        """
+        Upload an object using the multipart upload API.
+
+        Data is read from the iterator in parts of multipart_chunk_size bytes
+        and each part is uploaded in a separate request. If the iterator
+        yields less than a single part, a regular PUT request is used
+        instead.
+        """
+        extra = extra or {}
+        chunk_size = self.multipart_chunk_size
+        meta_data = extra.get('meta_data', None)
+
+        chunks = read_in_chunks(iterator=iterator, chunk_size=chunk_size,
+                                fill_size=True)
+
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            chunk = b('')
+
+        if len(chunk) < chunk_size:
+            # Everything fits in a single part, multipart upload would only
+            # add two extra requests
+            return self._put_object(container=container,
+                                    object_name=object_name,
+                                    upload_func=self._upload_data,
+                                    upload_func_kwargs={},
+                                    extra=extra, iterator=iter([chunk]),
+                                    verify_hash=verify_hash,
+                                    storage_class=storage_class)
+
+        content_type = extra.get('content_type', None)
+        if not content_type:
+            content_type, _ = guess_file_mime_type(file_path or object_name)
+
+            if not content_type:
+                raise AttributeError(
+                    'File content-type could not be guessed and' +
+                    ' no content_type value provided')
+
+        headers = self._get_put_headers(extra=extra,
+                                        storage_class=storage_class)
+        headers['Content-Type'] = content_type
+
+        object_path = '/%s/%s' % (container.name,
+                                  self._clean_object_name(object_name))
+        upload_id = self._initiate_multipart(object_path=object_path,
+                                             headers=headers)
+
+        parts = []
+        bytes_transferred = 0
+
+        try:
+            while len(chunk) > 0:
+                part_number = len(parts) + 1
+                etag = self._upload_multipart_part(object_path=object_path,
+                                                   upload_id=upload_id,
+                                                   part_number=part_number,
+                                                   data=chunk,
+                                                   verify_hash=verify_hash)
+                parts.append((part_number, etag))
+                bytes_transferred += len(chunk)
+
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    chunk = b('')
+
+            server_hash = self._commit_multipart(object_path=object_path,
+                                                 upload_id=upload_id,
+                                                 parts=parts)
+        except Exception:
+            self._abort_multipart(object_path=object_path,
+                                  upload_id=upload_id)
+            raise
+
+        obj = Object(name=object_name, size=bytes_transferred,
+                     hash=server_hash, extra=None, meta_data=meta_data,
+                     container=container, driver=self)
+        return obj
+
+    def _initiate_multipart(self, object_path, headers):
+        """
+        Start a multipart upload and return its upload id.
+        """
+        response = self.connection.request(object_path, method='POST',
+                                           params={'uploads': ''},
+                                           headers=headers)
+
+        if response.status != httplib.OK:
+            raise LibcloudError('Error initiating multipart upload, status '
+                                'code: %s' % (response.status), driver=self)
+
+        return findtext(element=response.object, xpath='UploadId',
+                        namespace=self.namespace)
+
+    def _upload_multipart_part(self, object_path, upload_id, part_number,
+                               data, verify_hash=True):
+        """
+        Upload a single part and return its ETag.
+        """
+        params = {'uploadId': upload_id, 'partNumber': part_number}
+        response = self.connection.request(object_path, method='PUT',
+                                           params=params, data=data)
+
+        if response.status != httplib.OK:
+            raise LibcloudError('Error uploading part %s, status code: %s' %
+                                (part_number, response.status), driver=self)
+
+        server_hash = response.headers['etag'].replace('"', '')
+
+        if verify_hash and md5(b(data)).hexdigest() != server_hash:
+            raise ObjectHashMismatchError(
+                value='MD5 hash checksum of part %s does not match' %
+                      (part_number),
+                object_name=object_path, driver=self)
+
+        return server_hash
+
+    def _commit_multipart(self, object_path, upload_id, parts):
+        """
+        Complete a multipart upload and return the ETag of the object.
+
+        @type parts: C{list}
+        @param parts: List of (part number, ETag) tuples.
+        """
+        root = Element('CompleteMultipartUpload')
+
+        for part_number, etag in parts:
+            part = SubElement(root, 'Part')
+            SubElement(part, 'PartNumber').text = str(part_number)
+            SubElement(part, 'ETag').text = '"%s"' % (etag)
+
+        if PY3:
+            encoding = 'unicode'
+        else:
+            encoding = None
+        data = tostring(root, encoding=encoding)
+
+        response = self.connection.request(object_path, method='POST',
+                                           params={'uploadId': upload_id},
+                                           data=data)
+
+        # Amazon S3 can return an error in the body of a 200 response
+        body = response.object
+        if response.status != httplib.OK or body.tag.endswith('Error'):
+            raise LibcloudError('Error completing multipart upload: %s' %
+                                (response.body), driver=self)
+
+        return findtext(element=body, xpath='ETag',
+                        namespace=self.namespace).replace('"', '')
+
+    def _abort_multipart(self, object_path, upload_id):
+        """
+        Abort a multipart upload and discard the already uploaded parts.
+        """
+        try:
+            self.connection.request(object_path, method='DELETE',
+                                    params={'uploadId': upload_id})
+        except Exception:
+            # Don't hide the error which caused the upload to be aborted
+            pass
+
     def _to_containers(self, obj, xpath):
         return [ self._to_container(element) for element in \
                  obj.findall(fixxpath(xpath=xpath, namespace=self.namespace))]
 
-    def _to_objs(self, obj, xpath, container):
-        return [ self._to_obj(element, container) for element in \
-                 obj.findall(fixxpath(xpath=xpath, namespace=self.namespace))]
-
     def _to_container(self, element):
         extra = {
             'creation_date': findtext(element=element, xpath='CreationDate',
@@ -0,0 +1,225 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+import unittest
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from libcloud.utils.py3 import b
+from libcloud.common.base import BaseDriver, ConnectionKey, JsonResponse
+from libcloud.common.async_driver import AsyncDriver, AsyncTransport
+from libcloud.common.async_driver import asyncio
+from libcloud.compute.drivers.dummy import DummyNodeDriver
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    ThreadPoolExecutor = None
+
+
+CONCURRENT_REQUESTS = 8
+
+
+class AsyncDriverTests(unittest.TestCase):
+    def setUp(self):
+        if asyncio is None:
+            self.skipTest('asyncio is not available')
+
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.driver = AsyncDriver(DummyNodeDriver(0), loop=self.loop,
+                                  executor=self.executor)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.loop.close()
+
+    def test_methods_return_futures(self):
+        nodes, sizes = self.loop.run_until_complete(
+            asyncio.gather(self.driver.list_nodes(),
+                           self.driver.list_sizes()))
+
+        self.assertEqual([node.id for node in nodes], ['1', '2'])
+        self.assertTrue(len(sizes) > 0)
+        self.assertEqual(self.driver.name, self.driver.driver.name)
+
+    def test_calls_are_concurrent(self):
+        # Calls only get past the barrier if all of them are running at the
+        # same time
+        barrier = threading.Barrier(4, timeout=10)
+
+        def call(value):
+            barrier.wait()
+            return value
+
+        result = self.loop.run_until_complete(
+            asyncio.gather(*[self.driver.run(call, value)
+                             for value in range(4)]))
+
+        self.assertEqual(result, [0, 1, 2, 3])
+
+    def test_generators_are_consumed(self):
+        def generator():
+            yield 1
+            yield 2
+
+        result = self.loop.run_until_complete(self.driver.run(generator))
+        self.assertEqual(result, [1, 2])
+
+    def test_errors_are_propagated(self):
+        future = self.driver.destroy_node(None)
+        self.assertRaises(Exception, self.loop.run_until_complete, future)
+
+
+class AsyncTransportTests(unittest.TestCase):
+    def setUp(self):
+        if asyncio is None:
+            self.skipTest('asyncio is not available')
+
+        EchoRequestHandler.barrier = None
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          EchoRequestHandler)
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.loop = asyncio.new_event_loop()
+        self.driver = EchoDriver('key', secure=False, host='127.0.0.1',
+                                 port=self.server.server_address[1])
+        self.transport = AsyncTransport(self.driver.connection,
+                                        loop=self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_request_uses_connection_hooks(self):
+        response = self.loop.run_until_complete(
+            self.transport.request('/echo', params={'name': 'value'},
+                                   headers={'X-Extra': '1'}))
+
+        self.assertTrue(isinstance(response, JsonResponse))
+        self.assertEqual(response.object['method'], 'GET')
+        self.assertEqual(response.object['path'],
+                         '/v1/echo?name=value&key=key&signed=1')
+        self.assertEqual(response.object['headers']['x-extra'], '1')
+        self.assertEqual(response.object['headers']['x-default'], 'yes')
+        self.assertTrue(response.object['headers']['user-agent']
+                        .startswith('libcloud/'))
+
+    def test_request_body(self):
+        response = self.loop.run_until_complete(
+            self.transport.request('/echo', data='{"a": 1}', method='POST'))
+
+        self.assertEqual(response.object['method'], 'POST')
+        self.assertEqual(response.object['body'], '{"a": 1}')
+
+    def test_requests_are_concurrent(self):
+        # The server only answers once all the requests are in flight
+        EchoRequestHandler.barrier = threading.Barrier(CONCURRENT_REQUESTS,
+                                                       timeout=10)
+        futures = [self.transport.request('/echo', params={'index': i})
+                   for i in range(CONCURRENT_REQUESTS)]
+        responses = self.loop.run_until_complete(asyncio.gather(*futures))
+
+        self.assertEqual([r.status for r in responses],
+                         [200] * CONCURRENT_REQUESTS)
+
+    def test_error_response_is_raised(self):
+        future = self.transport.request('/error')
+        self.assertRaises(Exception, self.loop.run_until_complete, future)
+
+    def test_async_driver_request(self):
+        driver = AsyncDriver(self.driver, loop=self.loop)
+        response = self.loop.run_until_complete(driver.request('/echo'))
+
+        self.assertEqual(response.object['path'], '/v1/echo?key=key&signed=1')
+
+
+class EchoConnection(ConnectionKey):
+    responseCls = JsonResponse
+
+    def morph_action_hook(self, action):
+        return '/v1' + action
+
+    def add_default_params(self, params):
+        params['key'] = self.key
+        return params
+
+    def add_default_headers(self, headers):
+        headers['X-Default'] = 'yes'
+        return headers
+
+    def pre_connect_hook(self, params, headers):
+        params['signed'] = '1'
+        return params, headers
+
+
+class EchoDriver(BaseDriver):
+    name = 'Echo'
+    connectionCls = EchoConnection
+
+
+if ThreadPoolExecutor is not None:
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    class EchoRequestHandler(BaseHTTPRequestHandler):
+        barrier = None
+
+        def do_GET(self):
+            self._echo()
+
+        def do_POST(self):
+            self._echo()
+
+        def log_message(self, *args):
+            pass
+
+        def _echo(self):
+            if self.path.startswith('/v1/error'):
+                self._respond(500, {'error': 'failed'})
+                return
+
+            if self.barrier is not None:
+                self.barrier.wait()
+
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length).decode('utf-8')
+            self._respond(200, {'method': self.command, 'path': self.path,
+                                'body': body,
+                                'headers': dict((k.lower(), v) for k, v in
+                                                self.headers.items())})
+
+        def _respond(self, status, value):
+            body = b(json.dumps(value))
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
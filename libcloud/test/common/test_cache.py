@@ -0,0 +1,154 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+from libcloud.common.cache import MemoryCacheBackend, FileCacheBackend
+from libcloud.compute.drivers.dummy import DummyNodeDriver
+
+
+class BackendTestsMixin(object):
+    def test_get_set(self):
+        self.assertRaises(KeyError, self.backend.get, 'ns', 'key')
+
+        self.backend.set('ns', 'key', [1, 2], ttl=60)
+        self.assertEqual(self.backend.get('ns', 'key'), [1, 2])
+        self.assertRaises(KeyError, self.backend.get, 'other', 'key')
+
+        self.backend.set('ns', 'key', [3], ttl=60)
+        self.assertEqual(self.backend.get('ns', 'key'), [3])
+
+    def test_expiration(self):
+        self.backend.set('ns', 'key', 'value', ttl=-1)
+        self.assertRaises(KeyError, self.backend.get, 'ns', 'key')
+
+    def test_clear(self):
+        self.backend.set('ns1', 'key1', 'value', ttl=60)
+        self.backend.set('ns1', 'key2', 'value', ttl=60)
+        self.backend.set('ns2', 'key1', 'value', ttl=60)
+
+        self.backend.clear('ns1')
+        self.assertRaises(KeyError, self.backend.get, 'ns1', 'key1')
+        self.assertRaises(KeyError, self.backend.get, 'ns1', 'key2')
+        self.assertEqual(self.backend.get('ns2', 'key1'), 'value')
+
+        self.backend.clear()
+        self.assertRaises(KeyError, self.backend.get, 'ns2', 'key1')
+
+
+class MemoryCacheBackendTests(unittest.TestCase, BackendTestsMixin):
+    def setUp(self):
+        self.backend = MemoryCacheBackend()
+
+    def test_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set('ns', 'a', 1, ttl=60)
+        backend.set('ns', 'b', 2, ttl=60)
+        backend.get('ns', 'a')
+        backend.set('ns', 'c', 3, ttl=60)
+
+        self.assertEqual(backend.get('ns', 'a'), 1)
+        self.assertEqual(backend.get('ns', 'c'), 3)
+        self.assertRaises(KeyError, backend.get, 'ns', 'b')
+
+
+class FileCacheBackendTests(unittest.TestCase, BackendTestsMixin):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backend = FileCacheBackend(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_between_instances(self):
+        self.backend.set('ns', 'key', {'a': 1}, ttl=60)
+        backend = FileCacheBackend(self.directory)
+        self.assertEqual(backend.get('ns', 'key'), {'a': 1})
+
+
+class NodeDriverCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.driver = DummyNodeDriver(0)
+        self.calls = []
+        list_images = self.driver.list_images
+
+        def mock_list_images(location=None):
+            self.calls.append(location)
+            return list_images(location=location)
+
+        self.driver.list_images = mock_list_images
+
+    def test_cache_disabled_by_default(self):
+        self.driver.list_images()
+        self.driver.list_images()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_enable_cache(self):
+        self.driver.enable_cache()
+
+        images = self.driver.list_images()
+        cached_images = self.driver.list_images()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([image.id for image in images],
+                         [image.id for image in cached_images])
+        self.assertTrue(cached_images[0].driver is self.driver)
+
+        # Different arguments are cached separately
+        self.driver.list_images(location='loc')
+        self.assertEqual(len(self.calls), 2)
+
+        self.driver.invalidate_cache('list_images')
+        self.driver.list_images()
+        self.assertEqual(len(self.calls), 3)
+
+        self.driver.disable_cache()
+        self.driver.list_images()
+        self.assertEqual(len(self.calls), 4)
+
+    def test_ttls(self):
+        self.driver.enable_cache(ttls={'list_images': 0})
+        self.driver.list_images()
+        self.driver.list_images()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_shared_file_backend(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            self.driver.enable_cache(backend=FileCacheBackend(directory))
+            self.driver.list_images()
+
+            driver = DummyNodeDriver(0)
+            driver.enable_cache(backend=FileCacheBackend(directory))
+            images = driver.list_images()
+
+            self.assertEqual(len(self.calls), 1)
+            self.assertTrue(images[0].driver is driver)
+
+            # Drivers with different credentials don't share entries
+            self.driver.key = 'other'
+            self.driver.list_images()
+            self.assertEqual(len(self.calls), 2)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -55,6 +55,26 @@ class CloudStackCommonTest(unittest.TestCase):
         self.driver.path = '/sync'
         self.connection._sync_request('fake')
 
+    def test_paginated_request(self):
+        self.driver.path = '/paginated'
+        self.connection.page_size = 2
+
+        CloudStackMockHttp.pages = []
+        items = self.connection._paginated_request('listFakes', 'fake')
+
+        self.assertEqual(items, [1, 2, 3, 4, 5])
+        self.assertEqual(CloudStackMockHttp.pages, ['1', '2', '3'])
+
+    def test_paginated_request_stops_at_count(self):
+        self.driver.path = '/paginated'
+        self.connection.page_size = 5
+
+        CloudStackMockHttp.pages = []
+        items = self.connection._paginated_request('listFakes', 'fake')
+
+        self.assertEqual(items, [1, 2, 3, 4, 5])
+        self.assertEqual(CloudStackMockHttp.pages, ['1'])
+
     def test_async_request_successful(self):
         self.driver.path = '/async/success'
         result = self.connection._async_request('fake')
@@ -77,6 +97,18 @@ class CloudStackCommonTest(unittest.TestCase):
         self.connection._async_request('fake')
         self.assertEqual(async_delay, 0)
 
+    def test_submit_async_request(self):
+        global async_delay
+        self.driver.path = '/async/delayed'
+        async_delay = 2
+
+        future = self.connection.submit_async_request(
+            action=None, context={'command': 'fake'})
+        result = future.result(timeout=10)
+
+        self.assertEqual(result['jobresult'], {'fake': 'result'})
+        self.assertEqual(async_delay, 0)
+
     def test_signature_algorithm(self):
         cases = [
             (
@@ -114,6 +146,7 @@ class CloudStackCommonTest(unittest.TestCase):
 class CloudStackMockHttp(MockHttpTestCase):
 
     ERROR_TEXT = 'ERROR TEXT'
+    pages = []
 
     def _response(self, status, result, response):
         return (status, json.dumps(result), result, response)
@@ -136,6 +169,16 @@ class CloudStackMockHttp(MockHttpTestCase):
         result = {'success': True}
         return self._response(httplib.OK, result, httplib.responses[httplib.OK])
 
+    def _paginated(self, method, url, body, headers):
+        query = self._check_request(url)
+        CloudStackMockHttp.pages.append(query['page'])
+
+        page, page_size = int(query['page']), int(query['pagesize'])
+        values = list(range(1, 6))[(page - 1) * page_size:page * page_size]
+        result = {query['command'].lower() + 'response': {'count': 5,
+                                                          'fake': values}}
+        return self._response(httplib.OK, result, httplib.responses[httplib.OK])
+
     def _sync(self, method, url, body, headers):
         query = self._check_request(url)
         result = {query['command'].lower() + 'response': {}}
@@ -0,0 +1,134 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import unittest
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection
+from libcloud.common.instrumentation import RequestEvent, LatencyAggregator
+from libcloud.common.instrumentation import add_listener, remove_listener
+from libcloud.common.instrumentation import get_operation_name
+
+from libcloud.test import MockHttp
+
+
+class InstrumentationMockHttp(MockHttp):
+    def _describe(self, method, url, body, headers):
+        return (httplib.OK, 'result', {}, httplib.responses[httplib.OK])
+
+    def _fail(self, method, url, body, headers):
+        return (httplib.INTERNAL_SERVER_ERROR, 'error', {},
+                httplib.responses[httplib.INTERNAL_SERVER_ERROR])
+
+
+class FakeDriver(object):
+    name = 'Fake'
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        add_listener(self.events.append)
+
+        self.connection = Connection(secure=False, host='localhost', port=80)
+        self.connection.conn_classes = (InstrumentationMockHttp,
+                                        InstrumentationMockHttp)
+        self.connection.driver = FakeDriver()
+
+    def tearDown(self):
+        remove_listener(self.events.append)
+
+    def test_request_event(self):
+        self.connection.request('/describe', params={'Action': 'Describe'},
+                                data='body', method='POST')
+
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+
+        self.assertEqual(event.driver, 'Fake')
+        self.assertEqual(event.action, '/describe')
+        self.assertEqual(event.operation, 'Describe')
+        self.assertEqual(event.method, 'POST')
+        self.assertEqual(event.status, httplib.OK)
+        self.assertEqual(event.bytes_sent, 4)
+        self.assertEqual(event.bytes_received, 6)
+        self.assertEqual(event.error, None)
+
+        for name in ['sign', 'send', 'first_byte', 'parse', 'total']:
+            self.assertTrue(event.timings[name] >= 0)
+
+    def test_request_error_event(self):
+        self.assertRaises(Exception, self.connection.request, '/fail')
+
+        event = self.events[0]
+        self.assertEqual(event.status, httplib.INTERNAL_SERVER_ERROR)
+        self.assertTrue(event.error is not None)
+
+    def test_listener_errors_are_ignored(self):
+        def listener(event):
+            raise ValueError()
+
+        add_listener(listener)
+
+        try:
+            self.connection.request('/describe')
+        finally:
+            remove_listener(listener)
+
+        self.assertEqual(len(self.events), 1)
+
+    def test_get_operation_name(self):
+        self.assertEqual(get_operation_name('/', {'Action': 'Run'}), 'Run')
+        self.assertEqual(get_operation_name('/', [('command', 'list')]),
+                         'list')
+        self.assertEqual(get_operation_name('/servers', None), '/servers')
+
+
+class LatencyAggregatorTests(unittest.TestCase):
+    def _get_event(self, total, status=httplib.OK, operation='List'):
+        event = RequestEvent(driver='Fake', host='localhost', action='/',
+                             operation=operation, method='GET')
+        event.status = status
+        event.timings['total'] = total
+        return event
+
+    def test_aggregation(self):
+        aggregator = LatencyAggregator(buckets=(0.1, 1))
+        aggregator(self._get_event(0.05))
+        aggregator(self._get_event(0.5))
+        aggregator(self._get_event(5, status=httplib.SERVICE_UNAVAILABLE))
+        aggregator(self._get_event(0.01, operation='Get'))
+
+        stats = aggregator.snapshot()[('Fake', 'GET', 'List')]
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['min'], 0.05)
+        self.assertEqual(stats['max'], 5)
+        self.assertEqual(stats['buckets'], [(0.1, 1), (1, 2), (None, 3)])
+
+        dump = aggregator.dump()
+        self.assertTrue('libcloud_request_duration_seconds_bucket{driver='
+                        '"Fake",method="GET",operation="List",le="+Inf"} 3'
+                        in dump)
+        self.assertTrue('libcloud_request_errors_total{driver="Fake",'
+                        'method="GET",operation="Get"} 0' in dump)
+
+        aggregator.reset()
+        self.assertEqual(aggregator.snapshot(), {})
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,161 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import threading
+import unittest
+
+from email.utils import formatdate
+
+from libcloud.common.types import LibcloudError
+from libcloud.common.polling import FixedPollingStrategy
+from libcloud.common.polling import ExponentialBackoffPollingStrategy
+from libcloud.common.polling import PollingScheduler, get_retry_after
+
+
+class FakeResponse(object):
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class PollingStrategyTests(unittest.TestCase):
+    def test_get_retry_after(self):
+        self.assertEqual(get_retry_after(None), None)
+        self.assertEqual(get_retry_after(FakeResponse()), None)
+        self.assertEqual(get_retry_after(FakeResponse({'retry-after': '5'})),
+                         5)
+        self.assertEqual(get_retry_after(FakeResponse({'retry-after': '-1'})),
+                         0)
+        self.assertEqual(get_retry_after(FakeResponse({'retry-after': 'x'})),
+                         None)
+
+        date = formatdate(time.time() + 60, usegmt=True)
+        delay = get_retry_after(FakeResponse({'retry-after': date}))
+        self.assertTrue(55 <= delay <= 60)
+
+    def test_exponential_backoff(self):
+        strategy = ExponentialBackoffPollingStrategy(initial_interval=1,
+                                                     factor=2, max_interval=5,
+                                                     jitter=0)
+        delays = [strategy.next_delay(attempt) for attempt in range(1, 6)]
+        self.assertEqual(delays, [1, 2, 4, 5, 5])
+
+        # Large number of attempts doesn't overflow
+        self.assertEqual(strategy.next_delay(10000), 5)
+
+    def test_exponential_backoff_jitter(self):
+        strategy = ExponentialBackoffPollingStrategy(initial_interval=10,
+                                                     jitter=0.5)
+
+        for _ in range(100):
+            delay = strategy.next_delay(1)
+            self.assertTrue(5 <= delay <= 15)
+
+    def test_retry_after_is_honored(self):
+        strategy = FixedPollingStrategy(1)
+        self.assertEqual(strategy.next_delay(1, FakeResponse()), 1)
+        self.assertEqual(
+            strategy.next_delay(1, FakeResponse({'retry-after': '20'})), 20)
+        self.assertEqual(
+            strategy.next_delay(1, FakeResponse({'retry-after': '900'})), 300)
+
+        strategy.honor_retry_after = False
+        self.assertEqual(
+            strategy.next_delay(1, FakeResponse({'retry-after': '20'})), 1)
+
+
+class PollingSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PollingScheduler(max_workers=2)
+
+    def _get_poll(self, polls_needed, calls):
+        def poll():
+            calls.append(threading.currentThread())
+            return len(calls) >= polls_needed, len(calls)
+
+        return poll
+
+    def test_submit_many_jobs(self):
+        strategy = FixedPollingStrategy(0.01)
+        calls = [[] for _ in range(10)]
+        futures = [self.scheduler.submit(self._get_poll(index + 1,
+                                                        calls[index]),
+                                         strategy=strategy, timeout=10)
+                   for index in range(10)]
+
+        for index, future in enumerate(futures):
+            self.assertEqual(future.result(timeout=10), index + 1)
+            self.assertTrue(future.done())
+            self.assertEqual(future.exception(), None)
+
+        self.assertEqual(self.scheduler.pending(), 0)
+
+    def test_poll_error(self):
+        def poll():
+            raise ValueError('poll failed')
+
+        future = self.scheduler.submit(poll, FixedPollingStrategy(0),
+                                       timeout=10)
+
+        try:
+            future.result(timeout=10)
+        except ValueError:
+            e = sys.exc_info()[1]
+            self.assertEqual(str(e), 'poll failed')
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_job_timeout(self):
+        calls = []
+        future = self.scheduler.submit(self._get_poll(1000, calls),
+                                       FixedPollingStrategy(0.01),
+                                       timeout=0.1)
+
+        e = future.exception(timeout=10)
+        self.assertTrue(isinstance(e, LibcloudError))
+        self.assertTrue('did not complete in 0.1 seconds' in str(e))
+        self.assertTrue(len(calls) > 1)
+
+    def test_cancel_and_callbacks(self):
+        finished = []
+        calls = []
+        future = self.scheduler.submit(self._get_poll(1000, calls),
+                                       FixedPollingStrategy(0.05),
+                                       timeout=10)
+        future.add_done_callback(finished.append)
+
+        self.assertTrue(future.cancel())
+        self.assertTrue(future.cancelled())
+        self.assertFalse(future.cancel())
+        self.assertEqual(finished, [future])
+
+        self.assertRaises(LibcloudError, future.result)
+
+        finished = []
+        future.add_done_callback(finished.append)
+        self.assertEqual(finished, [future])
+
+    def test_result_timeout(self):
+        future = self.scheduler.submit(self._get_poll(1000, []),
+                                       FixedPollingStrategy(0.05),
+                                       timeout=10)
+
+        self.assertRaises(LibcloudError, future.result, 0.01)
+        future.cancel()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
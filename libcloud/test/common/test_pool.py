@@ -0,0 +1,321 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import socket
+import threading
+import unittest
+
+from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import b
+from libcloud.common.base import Connection
+from libcloud.common.pool import ConnectionPool, is_connection_dropped
+
+from libcloud.test import MockHttp
+
+
+class FakeConnection(object):
+    def __init__(self, sock=False):
+        self._remote = None
+
+        if sock is False:
+            # Idle connection with a live socket
+            sock, self._remote = socket.socketpair()
+
+        self.sock = sock
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+        if self._remote is not None:
+            self.sock.close()
+            self._remote.close()
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, idle_timeout=60)
+
+    def test_acquire_empty_pool(self):
+        self.assertEqual(self.pool.acquire('key'), None)
+
+    def test_release_and_acquire(self):
+        connection = FakeConnection()
+        self.pool.release('key', connection)
+
+        self.assertEqual(self.pool.size('key'), 1)
+        self.assertEqual(self.pool.acquire('other'), None)
+        self.assertTrue(self.pool.acquire('key') is connection)
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_max_size_evicts_oldest(self):
+        connections = [FakeConnection() for _ in range(3)]
+
+        for connection in connections:
+            self.pool.release('key', connection)
+
+        self.assertEqual(self.pool.size('key'), 2)
+        self.assertTrue(connections[0].closed)
+        self.assertTrue(self.pool.acquire('key') is connections[2])
+
+    def test_idle_timeout(self):
+        self.pool.idle_timeout = -1
+        connection = FakeConnection()
+        self.pool.release('key', connection)
+
+        self.assertEqual(self.pool.acquire('key'), None)
+        self.assertTrue(connection.closed)
+
+    def test_evict_idle(self):
+        connection = FakeConnection()
+        self.pool.release('key', connection)
+        self.pool.idle_timeout = -1
+        self.pool.evict_idle()
+
+        self.assertEqual(self.pool.size(), 0)
+        self.assertTrue(connection.closed)
+
+    def test_clear(self):
+        connection = FakeConnection()
+        self.pool.release('key', connection)
+        self.pool.clear()
+
+        self.assertEqual(self.pool.size(), 0)
+        self.assertTrue(connection.closed)
+
+    def test_is_connection_dropped(self):
+        # Connections without a socket can't be checked and aren't reused
+        self.assertTrue(is_connection_dropped(object()))
+        self.assertTrue(is_connection_dropped(FakeConnection(sock=None)))
+
+        if not hasattr(socket, 'socketpair'):
+            return
+
+        local, remote = socket.socketpair()
+        try:
+            self.assertFalse(is_connection_dropped(FakeConnection(local)))
+
+            # Half-closed socket is readable (EOF)
+            remote.close()
+            self.assertTrue(is_connection_dropped(FakeConnection(local)))
+        finally:
+            local.close()
+
+    def test_dropped_connection_is_not_reused(self):
+        if not hasattr(socket, 'socketpair'):
+            return
+
+        local, remote = socket.socketpair()
+        connection = FakeConnection(local)
+        try:
+            self.pool.release('key', connection)
+            remote.send(b('unexpected'))
+
+            self.assertEqual(self.pool.acquire('key'), None)
+            self.assertTrue(connection.closed)
+        finally:
+            local.close()
+            remote.close()
+
+
+class ConnectionKeepAliveTests(unittest.TestCase):
+    def setUp(self):
+        PoolMockHttp.instances = 0
+        PoolMockHttp.fail_next = False
+        PoolMockHttp.fail_next_response = False
+        self.connection = PoolConnection(host='api.example.com')
+        self.connection.driver = FakeDriver()
+        self.connection.connection_pool = ConnectionPool()
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            response = self.connection.request('/resource')
+            self.assertEqual(response.body, 'ok')
+
+        self.assertEqual(PoolMockHttp.instances, 1)
+        self.assertEqual(self.connection.connection_pool.size(), 1)
+
+    def test_connection_is_not_reused_if_keep_alive_is_disabled(self):
+        self.connection.keep_alive = False
+
+        for _ in range(3):
+            self.connection.request('/resource')
+
+        self.assertEqual(PoolMockHttp.instances, 3)
+        self.assertEqual(self.connection.connection_pool.size(), 0)
+
+    def test_stale_connection_is_replaced(self):
+        self.connection.request('/resource')
+
+        PoolMockHttp.fail_next = True
+        response = self.connection.request('/resource')
+
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(PoolMockHttp.instances, 2)
+
+    def test_stale_connection_is_replaced_if_request_was_not_sent(self):
+        self.connection.request('/resource')
+
+        PoolMockHttp.fail_next = True
+        response = self.connection.request('/resource', method='POST')
+
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(PoolMockHttp.instances, 2)
+
+    def test_sent_non_idempotent_request_is_not_retried(self):
+        self.connection.request('/resource')
+
+        # Server might have performed the request before closing the
+        # connection
+        PoolMockHttp.fail_next_response = True
+
+        try:
+            self.connection.request('/resource', method='POST')
+        except httplib.BadStatusLine:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertEqual(PoolMockHttp.instances, 1)
+
+    def test_sent_idempotent_request_is_retried(self):
+        self.connection.request('/resource')
+
+        PoolMockHttp.fail_next_response = True
+        response = self.connection.request('/resource', method='PUT')
+
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(PoolMockHttp.instances, 2)
+
+    def test_error_on_new_connection_is_not_retried(self):
+        PoolMockHttp.fail_next = True
+
+        try:
+            self.connection.request('/resource')
+        except httplib.BadStatusLine:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+
+class ConnectionThreadSafetyTests(unittest.TestCase):
+    def setUp(self):
+        PoolMockHttp.instances = 0
+        PoolMockHttp.fail_next = False
+        PoolMockHttp.fail_next_response = False
+        self.connection = PoolConnection(host='api.example.com')
+        self.connection.driver = FakeDriver()
+        self.connection.connection_pool = ConnectionPool()
+
+    def test_request_state_is_per_thread(self):
+        self.connection.set_context({'thread': 'main'})
+        self.connection.request('/resource')
+
+        result = {}
+
+        def worker():
+            result['action'] = self.connection.action
+            result['context'] = self.connection.context
+            self.connection.request('/echo', params={'value': 'worker'})
+            result['worker_action'] = self.connection.action
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(result['action'], None)
+        self.assertEqual(result['context'], {})
+        self.assertEqual(result['worker_action'], '/echo')
+        self.assertEqual(self.connection.action, '/resource')
+        self.assertEqual(self.connection.context, {'thread': 'main'})
+
+    def test_concurrent_requests(self):
+        errors = []
+
+        def worker(index):
+            try:
+                for _ in range(5):
+                    value = '%s' % (index)
+                    response = self.connection.request('/echo',
+                                                       params={'value': value})
+                    if response.body != value:
+                        errors.append((value, response.body))
+            except Exception:
+                errors.append(sys.exc_info()[1])
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Every thread leases its own connection and idle ones are reused
+        self.assertTrue(PoolMockHttp.instances <= 8)
+
+
+class FakeDriver(object):
+    name = 'fake'
+
+
+class PoolMockHttp(MockHttp):
+    instances = 0
+    fail_next = False
+    fail_next_response = False
+
+    def __init__(self, *args, **kwargs):
+        PoolMockHttp.instances += 1
+        super(PoolMockHttp, self).__init__(*args, **kwargs)
+        # Connections without a real socket are never pooled
+        self.sock, self._remote = socket.socketpair()
+
+    def close(self):
+        self.sock.close()
+        self._remote.close()
+
+    def request(self, *args, **kwargs):
+        if PoolMockHttp.fail_next:
+            PoolMockHttp.fail_next = False
+            raise httplib.BadStatusLine('')
+
+        return super(PoolMockHttp, self).request(*args, **kwargs)
+
+    def getresponse(self):
+        if PoolMockHttp.fail_next_response:
+            PoolMockHttp.fail_next_response = False
+            raise httplib.BadStatusLine('')
+
+        return super(PoolMockHttp, self).getresponse()
+
+    def _resource(self, method, url, body, headers):
+        return (httplib.OK, 'ok', {}, httplib.responses[httplib.OK])
+
+    def _echo(self, method, url, body, headers):
+        # Give other threads a chance to run in the middle of a request
+        time.sleep(0.001)
+        value = url.split('value=')[1]
+        return (httplib.OK, value, {}, httplib.responses[httplib.OK])
+
+
+class PoolConnection(Connection):
+    conn_classes = (None, PoolMockHttp)
+    follows_http_semantics = True
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
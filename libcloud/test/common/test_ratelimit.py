@@ -0,0 +1,166 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import unittest
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import ConnectionUserAndKey
+from libcloud.common.ratelimit import TokenBucket, get_token_bucket
+from libcloud.common.ratelimit import clear_token_buckets
+from libcloud.compute.drivers.ec2 import EC2Connection
+
+from libcloud.test import MockHttp
+
+
+class RateLimitMockHttp(MockHttp):
+    def _resource(self, method, url, body, headers):
+        return (httplib.OK, 'result', {}, httplib.responses[httplib.OK])
+
+
+class FakeDriver(object):
+    name = 'Fake'
+    type = 'fake'
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_burst(self):
+        bucket = TokenBucket(rate=1, capacity=3)
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_default_capacity(self):
+        self.assertEqual(TokenBucket(rate=10).capacity, 10)
+        self.assertEqual(TokenBucket(rate=0.5).capacity, 1)
+        self.assertRaises(ValueError, TokenBucket, rate=0)
+
+    def test_reserve(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+
+        self.assertEqual(bucket.reserve(), 0)
+
+        # Waiting callers are served in order
+        self.assertTrue(0.05 < bucket.reserve() <= 0.1)
+        self.assertTrue(0.15 < bucket.reserve() <= 0.2)
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        time.sleep(0.02)
+        self.assertTrue(bucket.try_acquire())
+
+    def test_acquire_waits(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        bucket.acquire()
+
+        start = time.time()
+        delay = bucket.acquire()
+        self.assertTrue(delay > 0)
+        self.assertTrue(time.time() - start >= delay * 0.9)
+
+    def test_shared_buckets(self):
+        clear_token_buckets()
+
+        bucket = get_token_bucket(('a', 'read'), rate=1)
+        self.assertTrue(get_token_bucket(('a', 'read'), rate=2) is bucket)
+        self.assertFalse(get_token_bucket(('b', 'read'), rate=1) is bucket)
+
+        clear_token_buckets()
+        self.assertFalse(get_token_bucket(('a', 'read'), rate=1) is bucket)
+
+
+class ConnectionRateLimitTests(unittest.TestCase):
+    def setUp(self):
+        clear_token_buckets()
+
+    def tearDown(self):
+        clear_token_buckets()
+
+    def _get_connection(self, user_id='user', key='key'):
+        connection = ConnectionUserAndKey(user_id, key, secure=False,
+                                          host='localhost', port=80)
+        connection.conn_classes = (RateLimitMockHttp, RateLimitMockHttp)
+        connection.driver = FakeDriver()
+        connection.follows_http_semantics = True
+        connection.rate_limits = {'read': (1000, 1), 'write': (1, 1)}
+        return connection
+
+    def test_connections_share_limits(self):
+        connection1 = self._get_connection()
+        connection2 = self._get_connection()
+
+        self.assertEqual(connection1.get_rate_limit_key(),
+                         connection2.get_rate_limit_key())
+
+        connection1.request('/resource', method='POST')
+        key = connection2.get_rate_limit_key() + ('write',)
+        self.assertFalse(get_token_bucket(key, rate=1).try_acquire())
+
+    def test_different_credentials(self):
+        connection1 = self._get_connection()
+        connection2 = self._get_connection(key='other')
+
+        self.assertNotEqual(connection1.get_rate_limit_key(),
+                            connection2.get_rate_limit_key())
+
+    def test_request_classes(self):
+        connection = self._get_connection()
+
+        self.assertEqual(connection.get_request_class('GET', '/', {}), 'read')
+        self.assertEqual(connection.get_request_class('POST', '/', {}),
+                         'write')
+
+        # GET requests might modify resources unless the API follows the
+        # HTTP semantics
+        connection.follows_http_semantics = False
+        self.assertEqual(connection.get_request_class('GET', '/', {}),
+                         'write')
+        self.assertEqual(connection.get_request_class('HEAD', '/', {}),
+                         'read')
+
+        ec2 = EC2Connection('key', 'secret')
+        self.assertEqual(ec2.get_request_class(
+            'GET', '/', {'Action': 'DescribeImages'}), 'read')
+        self.assertEqual(ec2.get_request_class(
+            'GET', '/', {'Action': 'TerminateInstances'}), 'write')
+
+    def test_request_waits_for_token(self):
+        connection = self._get_connection()
+        connection.rate_limits = {'read': (50, 1)}
+
+        connection.request('/resource')
+        connection.request('/resource')
+
+        key = connection.get_rate_limit_key() + ('read',)
+        self.assertTrue(get_token_bucket(key, rate=50).reserve() > 0)
+
+    def test_unlimited_class(self):
+        connection = self._get_connection()
+        connection.rate_limits = {'write': (0.001, 1)}
+
+        start = time.time()
+        for _ in range(5):
+            connection.request('/resource')
+        self.assertTrue(time.time() - start < 1)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
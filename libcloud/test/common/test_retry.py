@@ -0,0 +1,236 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+import socket
+import unittest
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection
+from libcloud.common.retry import RetryPolicy
+from libcloud.common.polling import FixedPollingStrategy
+from libcloud.common.instrumentation import RequestEvent
+from libcloud.common.cloudstack import CloudStackConnection
+from libcloud.common.openstack import OpenStackBaseConnection
+from libcloud.compute.drivers.ec2 import EC2Connection
+
+from libcloud.test import MockHttp
+
+
+class RetryMockHttp(MockHttp):
+    attempts = 0
+    urls = []
+
+    def _flaky(self, method, url, body, headers):
+        RetryMockHttp.attempts += 1
+        RetryMockHttp.urls.append(url)
+
+        if RetryMockHttp.attempts < 3:
+            return (httplib.SERVICE_UNAVAILABLE, 'unavailable', {},
+                    httplib.responses[httplib.SERVICE_UNAVAILABLE])
+
+        return (httplib.OK, 'result', {}, httplib.responses[httplib.OK])
+
+    def _throttled(self, method, url, body, headers):
+        RetryMockHttp.attempts += 1
+
+        if RetryMockHttp.attempts < 2:
+            return (429, 'slow down', {'Retry-After': '0'}, 'Too Many Requests')
+
+        return (httplib.OK, 'result', {}, httplib.responses[httplib.OK])
+
+    def _reset(self, method, url, body, headers):
+        RetryMockHttp.attempts += 1
+
+        if RetryMockHttp.attempts < 2:
+            raise socket.error('Connection reset by peer')
+
+        return (httplib.OK, 'result', {}, httplib.responses[httplib.OK])
+
+    def _not_found(self, method, url, body, headers):
+        RetryMockHttp.attempts += 1
+        return (httplib.NOT_FOUND, 'not found', {},
+                httplib.responses[httplib.NOT_FOUND])
+
+
+class FakeDriver(object):
+    name = 'Fake'
+
+
+class SigningConnection(Connection):
+    follows_http_semantics = True
+
+    def add_default_params(self, params):
+        params['signature'] = 'sig-%s' % (len(params))
+        return params
+
+
+class RetryTests(unittest.TestCase):
+    def setUp(self):
+        RetryMockHttp.attempts = 0
+        RetryMockHttp.urls = []
+
+        self.connection = SigningConnection(secure=False, host='localhost',
+                                            port=80)
+        self.connection.conn_classes = (RetryMockHttp, RetryMockHttp)
+        self.connection.driver = FakeDriver()
+        self.connection.retry_policy = RetryPolicy(
+            max_retries=3, backoff=FixedPollingStrategy(0))
+
+    def test_requests_are_not_retried_by_default(self):
+        self.connection.retry_policy = None
+
+        self.assertRaises(Exception, self.connection.request, '/flaky')
+        self.assertEqual(RetryMockHttp.attempts, 1)
+
+    def test_transient_error_is_retried(self):
+        response = self.connection.request('/flaky', params={'a': '1'})
+
+        self.assertEqual(response.body, 'result')
+        self.assertEqual(RetryMockHttp.attempts, 3)
+
+        # Every attempt is signed from the original params
+        for url in RetryMockHttp.urls:
+            self.assertEqual(url.count('signature='), 1)
+            self.assertTrue('signature=sig-1' in url)
+
+    def test_connection_error_is_retried(self):
+        response = self.connection.request('/reset')
+
+        self.assertEqual(response.body, 'result')
+        self.assertEqual(RetryMockHttp.attempts, 2)
+
+    def test_non_idempotent_request_is_not_retried(self):
+        self.assertRaises(Exception, self.connection.request, '/flaky',
+                          method='POST')
+        self.assertEqual(RetryMockHttp.attempts, 1)
+
+    def test_throttled_non_idempotent_request_is_retried(self):
+        response = self.connection.request('/throttled', method='POST')
+
+        self.assertEqual(response.body, 'result')
+        self.assertEqual(RetryMockHttp.attempts, 2)
+
+    def test_client_error_is_not_retried(self):
+        self.assertRaises(Exception, self.connection.request, '/not_found')
+        self.assertEqual(RetryMockHttp.attempts, 1)
+
+    def test_max_retries(self):
+        self.connection.retry_policy.max_retries = 1
+
+        self.assertRaises(Exception, self.connection.request, '/flaky')
+        self.assertEqual(RetryMockHttp.attempts, 2)
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def setUp(self):
+        self.connection = Connection()
+        self.connection.follows_http_semantics = True
+        self.event = RequestEvent(driver=None, host='localhost',
+                                  action='/', operation='/', method='GET')
+        self.event.status = httplib.SERVICE_UNAVAILABLE
+
+    def test_retry_after_is_honored(self):
+        policy = RetryPolicy(backoff=FixedPollingStrategy(0))
+        self.event.headers = {'retry-after': '5'}
+
+        delay = policy.get_retry_delay(self.connection, self.event,
+                                       Exception(), 0, time.time())
+        self.assertEqual(delay, 5)
+
+    def test_deadline(self):
+        policy = RetryPolicy(deadline=10, backoff=FixedPollingStrategy(1))
+
+        delay = policy.get_retry_delay(self.connection, self.event,
+                                       Exception(), 0, time.time())
+        self.assertEqual(delay, 1)
+
+        delay = policy.get_retry_delay(self.connection, self.event,
+                                       Exception(), 0, time.time() - 9.5)
+        self.assertEqual(delay, None)
+
+    def test_default_backoff_is_exponential(self):
+        policy = RetryPolicy()
+        policy.backoff.jitter = 0
+
+        delays = [policy.get_retry_delay(self.connection, self.event,
+                                         Exception(), attempt, time.time())
+                  for attempt in range(3)]
+        self.assertEqual(delays, [0.5, 1, 2])
+
+
+class ErrorClassificationTests(unittest.TestCase):
+    def test_get_is_not_idempotent_by_default(self):
+        connection = Connection()
+
+        self.assertFalse(connection.is_idempotent_request('GET', '/', {}))
+        self.assertFalse(connection.is_idempotent_request('PUT', '/', {}))
+        self.assertTrue(connection.is_idempotent_request('HEAD', '/', {}))
+        self.assertTrue(connection.is_idempotent_request('OPTIONS', '/', {}))
+
+        connection.follows_http_semantics = True
+        self.assertTrue(connection.is_idempotent_request('GET', '/', {}))
+        self.assertTrue(connection.is_idempotent_request('PUT', '/', {}))
+        self.assertTrue(connection.is_idempotent_request('DELETE', '/', {}))
+        self.assertFalse(connection.is_idempotent_request('POST', '/', {}))
+
+    def test_get_request_is_not_retried_by_default(self):
+        RetryMockHttp.attempts = 0
+        connection = Connection(secure=False, host='localhost', port=80)
+        connection.conn_classes = (RetryMockHttp, RetryMockHttp)
+        connection.driver = FakeDriver()
+        connection.retry_policy = RetryPolicy(
+            max_retries=3, backoff=FixedPollingStrategy(0))
+
+        self.assertRaises(Exception, connection.request, '/flaky')
+        self.assertEqual(RetryMockHttp.attempts, 1)
+
+    def test_ec2(self):
+        connection = EC2Connection('key', 'secret')
+
+        error = Exception('RequestLimitExceeded: Request limit exceeded.')
+        self.assertTrue(connection.is_throttling_error(503, error))
+        self.assertFalse(connection.is_throttling_error(
+            503, Exception('Unavailable: Service unavailable')))
+
+        self.assertTrue(connection.is_idempotent_request(
+            'GET', '/', {'Action': 'DescribeInstances'}))
+        self.assertFalse(connection.is_idempotent_request(
+            'GET', '/', {'Action': 'RunInstances'}))
+
+    def test_cloudstack(self):
+        connection = CloudStackConnection('key', 'secret')
+
+        self.assertTrue(connection.is_idempotent_request(
+            'GET', '/', {'command': 'listVirtualMachines'}))
+        self.assertTrue(connection.is_idempotent_request(
+            'GET', '/', {'command': 'queryAsyncJobResult'}))
+        self.assertFalse(connection.is_idempotent_request(
+            'GET', '/', {'command': 'deployVirtualMachine'}))
+
+    def test_openstack_over_limit(self):
+        connection = OpenStackBaseConnection('user', 'key')
+
+        self.assertTrue(connection.is_idempotent_request('GET', '/', {}))
+
+        self.assertTrue(connection.is_throttling_error(
+            httplib.REQUEST_ENTITY_TOO_LARGE, Exception('overLimit')))
+        self.assertFalse(connection.is_throttling_error(
+            httplib.NOT_FOUND, Exception('itemNotFound')))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -64,6 +64,26 @@ class CloudStackNodeDriverTest(unittest.TestCase, TestCaseMixin):
         images = self.driver.list_images()
         self.assertEquals(0, len(images))
 
+    def test_list_nodes_forwarding_rules(self):
+        CloudStackMockHttp.fixture_tag = 'withrules'
+        CloudStackMockHttp.forwarding_rule_requests = 0
+        nodes = self.driver.list_nodes()
+
+        # Rules for all the addresses are retrieved with a single request
+        self.assertEqual(CloudStackMockHttp.forwarding_rule_requests, 1)
+        self.assertEqual(len(nodes), 2)
+
+        rules = nodes[0].extra['ip_forwarding_rules']
+        self.assertEqual([rule.id for rule in rules], [772, 773])
+        self.assertEqual(rules[0].address.address, '1.1.1.49')
+        self.assertEqual(rules[0].protocol, 'TCP')
+        self.assertEqual(rules[1].start_port, 80)
+
+        rules = nodes[1].extra['ip_forwarding_rules']
+        self.assertEqual([rule.id for rule in rules], [774])
+        self.assertEqual(rules[0].address.address, '1.1.1.48')
+        self.assertEqual(rules[0].protocol, 'UDP')
+
     def test_ex_list_disk_offerings(self):
         diskOfferings = self.driver.ex_list_disk_offerings()
         self.assertEquals(1, len(diskOfferings))
@@ -118,6 +138,7 @@ class CloudStackNodeDriverTest(unittest.TestCase, TestCaseMixin):
 class CloudStackMockHttp(MockHttpTestCase):
     fixtures = ComputeFileFixtures('cloudstack')
     fixture_tag = 'default'
+    forwarding_rule_requests = 0
 
     def _load_fixture(self, fixture):
         body = self.fixtures.load(fixture)
@@ -151,5 +172,11 @@ class CloudStackMockHttp(MockHttpTestCase):
         body, obj = self._load_fixture(fixture)
         return (httplib.OK, body, obj, httplib.responses[httplib.OK])
 
+    def _cmd_listIpForwardingRules(self, **kwargs):
+        CloudStackMockHttp.forwarding_rule_requests += 1
+        fixture = 'listIpForwardingRules' + '_' + self.fixture_tag + '.json'
+        body, obj = self._load_fixture(fixture)
+        return (httplib.OK, body, obj, httplib.responses[httplib.OK])
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -17,6 +17,7 @@
 import os
 import sys
 import time
+import threading
 import unittest
 
 from libcloud.utils.py3 import httplib
@@ -25,8 +26,9 @@ from libcloud.utils.py3 import u
 from libcloud.compute.deployment import MultiStepDeployment, Deployment
 from libcloud.compute.deployment import SSHKeyDeployment, ScriptDeployment
 from libcloud.compute.deployment import FileDeployment
-from libcloud.compute.base import Node
+from libcloud.compute.base import Node, _NodeWaiter
 from libcloud.compute.types import NodeState, DeploymentError, LibcloudError
+from libcloud.compute.types import InvalidCredsError
 from libcloud.compute.ssh import BaseSSHClient
 from libcloud.compute.drivers.rackspace import RackspaceNodeDriver as Rackspace
 
@@ -203,6 +205,171 @@ class DeploymentTests(unittest.TestCase):
         else:
             self.fail('Exception was not thrown')
 
+    def test_wait_until_running_multiple_waiters_share_listing(self):
+        RackspaceMockHttp.type = 'TIMEOUT'
+        calls = []
+        list_nodes = self.driver.list_nodes
+
+        def mock_list_nodes():
+            calls.append(RackspaceMockHttp.type)
+            return list_nodes()
+
+        self.driver.list_nodes = mock_list_nodes
+        results = []
+
+        def wait():
+            results.append(self.driver._wait_until_running(
+                node=self.node, wait_period=0.5, timeout=10))
+
+        threads = [threading.Thread(target=wait) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+
+        time.sleep(0.2)
+        RackspaceMockHttp.type = None
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 3)
+        for node, ips in results:
+            self.assertEqual(self.node.uuid, node.uuid)
+            self.assertEqual(['67.23.21.33'], ips)
+
+        # Per node polling would need at least 6 listings
+        self.assertTrue(len(calls) <= 3)
+
+    def test_wait_until_running_list_nodes_error_is_retried(self):
+        calls = []
+        list_nodes = self.driver.list_nodes
+
+        def mock_list_nodes():
+            calls.append(None)
+
+            if len(calls) == 1:
+                raise LibcloudError('InvalidInstanceID.NotFound')
+
+            return list_nodes()
+
+        self.driver.list_nodes = mock_list_nodes
+
+        node2, ips = self.driver._wait_until_running(node=self.node,
+                                                     wait_period=0.1,
+                                                     timeout=10)
+        self.assertEqual(self.node.uuid, node2.uuid)
+        self.assertEqual(['67.23.21.33'], ips)
+        self.assertEqual(len(calls), 2)
+
+    def test_wait_until_running_list_nodes_error_times_out(self):
+        def mock_list_nodes():
+            raise LibcloudError('list failed')
+
+        self.driver.list_nodes = mock_list_nodes
+
+        try:
+            self.driver._wait_until_running(node=self.node, wait_period=0.5,
+                                            timeout=1)
+        except LibcloudError:
+            e = sys.exc_info()[1]
+            self.assertTrue(e.value.find('Timed out after 1 second') != -1)
+            self.assertTrue(e.value.find('list failed') != -1)
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_wait_until_running_error_only_holds_back_failing_node(self):
+        unknown = Node(id=2, name='unknown', state=NodeState.PENDING,
+                       public_ips=[], private_ips=[], driver=self.driver)
+        list_nodes = self.driver.list_nodes
+
+        def mock_list_nodes_for_watcher(nodes):
+            if unknown in nodes:
+                raise LibcloudError('InvalidInstanceID.NotFound')
+
+            return list_nodes()
+
+        self.driver._list_nodes_for_watcher = mock_list_nodes_for_watcher
+        results = []
+        errors = []
+
+        def wait(node):
+            try:
+                results.append(self.driver._wait_until_running(
+                    node=node, wait_period=0.1, timeout=1))
+            except LibcloudError:
+                errors.append(sys.exc_info()[1])
+
+        threads = [threading.Thread(target=wait, args=(node,))
+                   for node in [self.node, unknown]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.node.uuid, results[0][0].uuid)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].value.find('NotFound') != -1)
+
+    def test_wait_until_running_error_lists_all_nodes_once(self):
+        other = Node(id=2, name='other', state=NodeState.PENDING,
+                     public_ips=[], private_ips=[], driver=self.driver)
+        error = LibcloudError('list failed')
+        calls = []
+
+        def mock_list_nodes():
+            calls.append(None)
+            raise error
+
+        self.driver.list_nodes = mock_list_nodes
+        watcher = self.driver.get_readiness_watcher(wait_period=0.1)
+        waiters = [_NodeWaiter(node=node, ssh_interface='public_ips',
+                               force_ipv4=True)
+                   for node in [self.node, other]]
+
+        # The listing isn't filtered by node, polling nodes one by one
+        # wouldn't tell the failing node apart
+        watcher._poll(waiters)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([waiter.last_error for waiter in waiters],
+                         [error, error])
+        self.assertEqual([waiter.done for waiter in waiters], [False, False])
+
+    def test_wait_until_running_permanent_error_is_raised(self):
+        calls = []
+
+        def mock_list_nodes():
+            calls.append(None)
+            raise InvalidCredsError('invalid credentials')
+
+        self.driver.list_nodes = mock_list_nodes
+        errors = []
+
+        def wait():
+            try:
+                self.driver._wait_until_running(node=self.node,
+                                                wait_period=0.1, timeout=10)
+            except InvalidCredsError:
+                errors.append(sys.exc_info()[1])
+
+        start = time.time()
+        threads = [threading.Thread(target=wait) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0].value, 'invalid credentials')
+        self.assertTrue(len(calls) <= 2)
+        self.assertTrue(time.time() - start < 5)
+
+    def test_get_readiness_watcher_is_shared(self):
+        watcher = self.driver.get_readiness_watcher(wait_period=1)
+
+        self.assertTrue(watcher is self.driver.get_readiness_watcher(1))
+        self.assertFalse(watcher is self.driver.get_readiness_watcher(2))
+
     def test_ssh_client_connect_success(self):
         mock_ssh_client = Mock()
         mock_ssh_client.return_value = None
@@ -360,6 +527,68 @@ class DeploymentTests(unittest.TestCase):
         node = self.driver.deploy_node(deploy=Mock())
         self.assertEqual(self.node.id, node.id)
 
+    def test_create_nodes(self):
+        names = []
+
+        def create_node(name, **kwargs):
+            names.append(name)
+
+            if name == 'test-2':
+                raise LibcloudError('create failed')
+
+            return Node(id=name, name=name, state=NodeState.PENDING,
+                        public_ips=[], private_ips=[], driver=self.driver)
+
+        self.driver.create_node = create_node
+        results = list(self.driver.create_nodes(count=3, max_workers=2,
+                                                name='test'))
+
+        self.assertEqual(sorted(names), ['test-1', 'test-2', 'test-3'])
+        self.assertEqual(sorted([n.name for n, error in results if n]),
+                         ['test-1', 'test-3'])
+        errors = [error for n, error in results if error]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].value, 'create failed')
+
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes(self, mock_ssh_module, _):
+        mock_ssh_module.have_paramiko = True
+        created = [(self.node, None), (None, LibcloudError('create failed')),
+                   (self.node, None)]
+        self.driver.create_nodes = Mock()
+        self.driver.create_nodes.return_value = iter(created)
+
+        deploy = Mock()
+        deploy.run.side_effect = [self.node, Exception('foo'), self.node,
+                                  self.node, self.node]
+
+        results = list(self.driver.deploy_nodes(count=3, deploy=deploy,
+                                                max_tries=1))
+
+        self.assertEqual(len(results), 3)
+        deployed = [n for n, error in results if error is None]
+        self.assertEqual([n.id for n in deployed], [self.node.id])
+
+        errors = sorted([error.__class__.__name__
+                         for n, error in results if error])
+        self.assertEqual(errors, ['DeploymentError', 'LibcloudError'])
+
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes_not_implemented(self, mock_ssh_module):
+        self.driver.features = {'create_node': []}
+        mock_ssh_module.have_paramiko = True
+        self.driver.create_nodes = Mock()
+
+        try:
+            self.driver.deploy_nodes(count=2, deploy=Mock())
+        except NotImplementedError:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertFalse(self.driver.create_nodes.called)
+
 
 class RackspaceMockHttp(MockHttp):
 
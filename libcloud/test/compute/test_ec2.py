@@ -16,6 +16,7 @@ import sys
 import unittest
 
 from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import urlparse
 
 from libcloud.compute.drivers.ec2 import EC2NodeDriver, EC2APSENodeDriver
 from libcloud.compute.drivers.ec2 import NimbusNodeDriver, EucNodeDriver
@@ -24,12 +25,18 @@ from libcloud.compute.drivers.ec2 import IdempotentParamError
 from libcloud.compute.base import Node, NodeImage, NodeSize, NodeLocation
 from libcloud.compute.base import StorageVolume
 
-from libcloud.test import MockHttp, LibcloudTestCase
+from libcloud.test import MockHttpTestCase, LibcloudTestCase
 from libcloud.test.compute import TestCaseMixin
 from libcloud.test.file_fixtures import ComputeFileFixtures
 
 from libcloud.test.secrets import EC2_PARAMS
 
+try:
+    parse_qsl = urlparse.parse_qsl
+except AttributeError:
+    import cgi
+    parse_qsl = cgi.parse_qsl
+
 
 class EC2Tests(LibcloudTestCase, TestCaseMixin):
     image_name = 'ec2-public-images/fedora-8-i386-base-v1.04.manifest.xml'
@@ -85,6 +92,26 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
             idem_error = e
         self.assertTrue(idem_error is not None)
 
+    def test_create_nodes(self):
+        EC2MockHttp.type = 'multiple'
+        image = NodeImage(id='ami-be3adfd7',
+                          name=self.image_name,
+                          driver=self.driver)
+        size = NodeSize('m1.small', 'Small Instance', None, None, None, None,
+                        driver=self.driver)
+        results = list(self.driver.create_nodes(count=3, name='foo',
+                                                image=image, size=size))
+
+        nodes = sorted([node for node, error in results if node],
+                       key=lambda node: node.id)
+        errors = [error for node, error in results if error]
+
+        self.assertEqual([node.id for node in nodes],
+                         ['i-2ba64342', 'i-2ba64343'])
+        self.assertEqual([node.name for node in nodes], ['foo-1', 'foo-2'])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].value.find('Only 2 of 3') != -1)
+
     def test_create_node_no_availability_zone(self):
         image = NodeImage(id='ami-be3adfd7',
                           name=self.image_name,
@@ -134,6 +161,37 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         self.assertEqual(node.id, 'i-8474834a')
         self.assertEqual(node.name, 'foobar1')
 
+    def test_list_nodes_for_watcher_filters_by_node_id(self):
+        calls = []
+        list_nodes = self.driver.list_nodes
+
+        def mock_list_nodes(ex_node_ids=None):
+            calls.append(ex_node_ids)
+            return list_nodes(ex_node_ids=ex_node_ids)
+
+        self.driver.list_nodes = mock_list_nodes
+        nodes = [Node('i-4382922a', None, None, None, None, self.driver),
+                 Node('i-8474834a', None, None, None, None, self.driver)]
+        result = self.driver._list_nodes_for_watcher(nodes)
+
+        self.assertEqual(calls, [['i-4382922a', 'i-8474834a']])
+        self.assertEqual([node.id for node in result],
+                         ['i-4382922a', 'i-8474834a'])
+
+    def test_list_nodes_with_filters(self):
+        EC2MockHttp.type = 'filters'
+        nodes = self.driver.list_nodes(
+            ex_filters={'instance-state-name': ['running', 'pending'],
+                        'tag:stack': 'web'},
+            ex_page_size=100)
+
+        self.assertEqual(nodes[0].id, 'i-4382922a')
+        self.assertEqual(nodes[0].extra['instancetype'], 'm1.small')
+
+    def test_list_nodes_page_size_and_node_ids(self):
+        self.assertRaises(ValueError, self.driver.list_nodes,
+                          ex_node_ids=['i-4382922a'], ex_page_size=100)
+
     def test_list_location(self):
         locations = self.driver.list_locations()
         self.assertTrue(len(locations) > 0)
@@ -204,6 +262,54 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
                     'ec2-public-images/fedora-8-i386-base-v1.04.manifest.xml')
         self.assertEqual(image.id, 'ami-be3adfd7')
 
+    def test_list_images_with_filters(self):
+        EC2MockHttp.type = 'filters'
+        images = self.driver.list_images(ex_owners=['self', 'amazon'],
+                                         ex_executable_by=['all'],
+                                         ex_image_ids=['ami-be3adfd7'],
+                                         ex_filters={'architecture': 'i386'})
+
+        self.assertEqual([image.id for image in images], ['ami-be3adfd7'])
+
+    def test_list_images_pagination(self):
+        EC2MockHttp.type = 'paginated'
+        images = self.driver.list_images(ex_page_size=1)
+
+        self.assertEqual([image.id for image in images],
+                         ['ami-be3adfd7', 'ami-be3adfd8'])
+
+    def test_list_images_pagination_signs_every_page(self):
+        EC2MockHttp.type = 'paginated'
+        signed_keys = []
+        connection = self.driver.connection
+        get_aws_auth_param = connection._get_aws_auth_param
+
+        def mock_get_aws_auth_param(params, secret_key, path='/'):
+            signed_keys.append(sorted(params.keys()))
+            return get_aws_auth_param(params, secret_key, path)
+
+        connection._get_aws_auth_param = mock_get_aws_auth_param
+        self.driver.list_images(ex_page_size=1)
+
+        self.assertEqual(len(signed_keys), 2)
+        self.assertFalse('Signature' in signed_keys[0])
+        self.assertFalse('Signature' in signed_keys[1])
+        self.assertTrue('NextToken' in signed_keys[1])
+        self.assertEqual(set(signed_keys[1]) - set(signed_keys[0]),
+                         set(['NextToken']))
+
+    def test_list_images_page_size_and_image_ids(self):
+        self.assertRaises(ValueError, self.driver.list_images,
+                          ex_image_ids=['ami-be3adfd7'], ex_page_size=1)
+
+    def test_ex_iterate_images(self):
+        EC2MockHttp.type = 'paginated'
+        images = self.driver.ex_iterate_images(ex_page_size=1)
+
+        self.assertEqual(next(images).id, 'ami-be3adfd7')
+        self.assertEqual(next(images).id, 'ami-be3adfd8')
+        self.assertRaises(StopIteration, next, images)
+
     def test_ex_list_availability_zones(self):
         availability_zones = self.driver.ex_list_availability_zones()
         availability_zone = availability_zones[0]
@@ -330,7 +436,7 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         self.assertTrue(retValue)
 
 
-class EC2MockHttp(MockHttp):
+class EC2MockHttp(MockHttpTestCase):
 
     fixtures = ComputeFileFixtures('ec2')
 
@@ -362,10 +468,65 @@ class EC2MockHttp(MockHttp):
         body = self.fixtures.load('describe_images.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _filters_DescribeInstances(self, method, url, body, headers):
+        params = dict(parse_qsl(urlparse.urlparse(url).query))
+        self.assertEqual(params['Filter.1.Name'], 'instance-state-name')
+        self.assertEqual(params['Filter.1.Value.1'], 'running')
+        self.assertEqual(params['Filter.1.Value.2'], 'pending')
+        self.assertEqual(params['Filter.2.Name'], 'tag:stack')
+        self.assertEqual(params['Filter.2.Value.1'], 'web')
+        self.assertEqual(params['MaxResults'], '100')
+        self.assertEqual(params['Version'], '2016-11-15')
+
+        body = self.fixtures.load('describe_instances.xml')
+        body = body.replace('2010-08-31', '2016-11-15')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _filters_DescribeAddresses(self, method, url, body, headers):
+        return self._DescribeAddresses(method, url, body, headers)
+
+    def _filters_DescribeImages(self, method, url, body, headers):
+        params = dict(parse_qsl(urlparse.urlparse(url).query))
+        self.assertEqual(params['Owner.1'], 'self')
+        self.assertEqual(params['Owner.2'], 'amazon')
+        self.assertEqual(params['ExecutableBy.1'], 'all')
+        self.assertEqual(params['ImageId.1'], 'ami-be3adfd7')
+        self.assertEqual(params['Filter.1.Name'], 'architecture')
+        self.assertEqual(params['Filter.1.Value.1'], 'i386')
+        self.assertTrue('MaxResults' not in params)
+
+        body = self.fixtures.load('describe_images.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _paginated_DescribeImages(self, method, url, body, headers):
+        params = dict(parse_qsl(urlparse.urlparse(url).query))
+        self.assertEqual(params['MaxResults'], '1')
+        self.assertEqual(params['Version'], '2016-11-15')
+
+        if 'NextToken' not in params:
+            body = self.fixtures.load('describe_images_page1.xml')
+        else:
+            self.assertEqual(params['NextToken'], 'token-page-2')
+            body = self.fixtures.load('describe_images_page2.xml')
+
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
     def _RunInstances(self, method, url, body, headers):
         body = self.fixtures.load('run_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _multiple_RunInstances(self, method, url, body, headers):
+        if 'MaxCount=3' not in url:
+            return (httplib.BAD_REQUEST, '', {},
+                    httplib.responses[httplib.BAD_REQUEST])
+
+        body = self.fixtures.load('run_instances_multiple.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _multiple_CreateTags(self, method, url, body, headers):
+        body = self.fixtures.load('create_tags.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
     def _idempotent_RunInstances(self, method, url, body, headers):
         body = self.fixtures.load('run_instances_idem.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
@@ -422,6 +422,29 @@ class OpenNebula_2_0_Tests(unittest.TestCase, OpenNebulaCaseMixin):
         context = node.extra['context']
         self.assertEqual(context, {})
 
+    def test_list_nodes_verbose_collection(self):
+        """
+        Test list_nodes functionality with a verbose collection.
+        """
+        nodes = self.driver.list_nodes()
+        actions = []
+        request = self.driver.connection.request
+
+        def mock_request(action, *args, **kwargs):
+            actions.append((action, kwargs.get('params', None)))
+            return request(action, *args, **kwargs)
+
+        self.driver.connection.request = mock_request
+        self.driver.verbose_collections = True
+        verbose_nodes = self.driver.list_nodes()
+
+        self.assertEqual(actions, [('/compute', {'verbose': 'true'})])
+        self.assertEqual([(node.id, node.name, node.state)
+                          for node in verbose_nodes],
+                         [(node.id, node.name, node.state) for node in nodes])
+        self.assertEqual(verbose_nodes[1].public_ips[0].address,
+                         '192.168.0.2')
+
     def test_list_images(self):
         """
         Test list_images functionality.
@@ -798,7 +821,10 @@ class OpenNebula_2_0_MockHttp(MockHttp):
         Compute pool resources.
         """
         if method == 'GET':
-            body = self.fixtures.load('compute_collection.xml')
+            if 'verbose=true' in url:
+                body = self.fixtures.load('compute_collection_verbose.xml')
+            else:
+                body = self.fixtures.load('compute_collection.xml')
             return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
         if method == 'POST':
@@ -23,7 +23,32 @@ from mock import Mock
 
 
 class ParamikoSSHClientTests(unittest.TestCase):
-    pass
+    def setUp(self):
+        self.have_paramiko = libcloud.compute.ssh.have_paramiko
+        self.paramiko_module = sys.modules.get('paramiko', False)
+
+    def tearDown(self):
+        libcloud.compute.ssh.have_paramiko = self.have_paramiko
+
+        if self.paramiko_module is False:
+            sys.modules.pop('paramiko', None)
+        else:
+            sys.modules['paramiko'] = self.paramiko_module
+
+    def test_broken_paramiko_installation(self):
+        # Import of a module set to None in sys.modules raises ImportError
+        sys.modules['paramiko'] = None
+        libcloud.compute.ssh.have_paramiko = True
+
+        try:
+            libcloud.compute.ssh.ParamikoSSHClient(hostname='localhost')
+        except RuntimeError:
+            e = sys.exc_info()[1]
+            self.assertTrue(str(e).find('paramiko is not installed') != -1)
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertFalse(libcloud.compute.ssh.have_paramiko)
 
 
 if __name__ == '__main__':
@@ -43,6 +43,30 @@ class TerremarkTests(unittest.TestCase, TestCaseMixin):
         ret = self.driver.list_images()
         self.assertEqual(ret[0].id, 'https://services.vcloudexpress.terremark.com/api/v0.8/vAppTemplate/5')
 
+    def test_list_images_catalog_item_cache(self):
+        requested = []
+        request_catalogitem = self.driver._request_catalogitem
+
+        def mock_request_catalogitem(catalog_item):
+            requested.append(catalog_item)
+            return request_catalogitem(catalog_item)
+
+        self.driver._request_catalogitem = mock_request_catalogitem
+
+        images = self.driver.list_images()
+        self.assertEqual([image.id for image in self.driver.list_images()],
+                         [image.id for image in images])
+        self.assertEqual(len(requested), 1)
+
+        self.driver.ex_clear_catalog_item_cache()
+        self.driver.list_images()
+        self.assertEqual(len(requested), 2)
+
+        self.driver.catalog_item_cache_ttl = 0
+        self.driver.list_images()
+        self.driver.list_images()
+        self.assertEqual(len(requested), 4)
+
     def test_list_sizes(self):
         ret = self.driver.list_sizes()
         self.assertEqual(ret[0].ram, 512)
@@ -13,12 +13,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sys
-import unittest
+import socket
+import random
+import threading
 import hashlib
+import tempfile
+import unittest
 
 from mock import Mock
 
+from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import PY3
 from libcloud.utils.py3 import b
@@ -26,9 +32,11 @@ from libcloud.utils.py3 import b
 if PY3:
     from io import FileIO as file
 
-from libcloud.storage.base import StorageDriver
+from libcloud.common.types import LibcloudError
+from libcloud.storage.base import StorageDriver, Container, Object
+from libcloud.storage.types import ObjectDoesNotExistError
 
-from libcloud.test import StorageMockHttp # pylint: disable-msg=E0611
+from libcloud.test import StorageMockHttp, MockResponse # pylint: disable-msg=E0611
 
 
 class BaseStorageTests(unittest.TestCase):
@@ -114,6 +122,43 @@ class BaseStorageTests(unittest.TestCase):
         self.assertEqual(bytes_transferred, 0)
         self.assertEqual(self.send_called, 5)
 
+    def test__stream_data_pipelined(self):
+        sent = []
+
+        def mock_send(data):
+            sent.append(data)
+
+        response = Mock()
+        response.connection.connection.send = mock_send
+
+        data = ['%s' % (i) * 1000 for i in range(10)]
+        self.driver2.pipelined_upload = True
+
+        success, data_hash, bytes_transferred = \
+                 self.driver2._stream_data(response=response,
+                                           iterator=iter(data),
+                                           chunked=False, calculate_hash=True)
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(b(''.join(data))).hexdigest())
+        self.assertEqual(bytes_transferred, 10000)
+        self.assertEqual(b('').join(sent), b(''.join(data)))
+
+    def test__stream_data_pipelined_send_failure(self):
+        response = Mock()
+        response.connection.connection.send.side_effect = Exception('timeout')
+
+        data = ['%s' % (i) * 1000 for i in range(10)]
+        self.driver2.pipelined_upload = True
+
+        success, data_hash, bytes_transferred = \
+                 self.driver2._stream_data(response=response,
+                                           iterator=iter(data),
+                                           chunked=False, calculate_hash=True)
+
+        self.assertFalse(success)
+        self.assertEqual(bytes_transferred, 0)
+
     def test__upload_data(self):
         def mock_send(data):
             self.send_called += 1
@@ -131,6 +176,127 @@ class BaseStorageTests(unittest.TestCase):
         self.assertEqual(bytes_transferred, (len(data)))
         self.assertEqual(self.send_called, 1)
 
+    def _create_temp_file(self, data):
+        fd, file_path = tempfile.mkstemp()
+        os.write(fd, b(data))
+        os.close(fd)
+        return file_path
+
+    def test__upload_file_buffered(self):
+        sent = []
+
+        def mock_send(data):
+            # Buffer is reused so the data needs to be copied
+            if hasattr(data, 'tobytes'):
+                data = data.tobytes()
+            sent.append(data)
+
+        response = Mock()
+        response.connection.connection.send = mock_send
+
+        data = '1234567890' * 1000
+        file_path = self._create_temp_file(data)
+
+        file_handle = open(file_path, 'rb')
+
+        try:
+            success, data_hash, bytes_transferred = \
+                     self.driver1._send_file(response=response,
+                                             file_handle=file_handle,
+                                             calculate_hash=True,
+                                             chunk_size=4096)
+        finally:
+            file_handle.close()
+            os.unlink(file_path)
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(b(data)).hexdigest())
+        self.assertEqual(bytes_transferred, len(data))
+        self.assertEqual(len(sent), 3)
+        self.assertEqual(b('').join(sent), b(data))
+
+    def test__get_chunk_size(self):
+        self.assertEqual(self.driver1._get_chunk_size(), (8096, False))
+        self.assertEqual(self.driver1._get_chunk_size(default=1024),
+                         (1024, False))
+
+        self.driver1.chunk_size = 2048
+        self.driver1.adaptive_chunk_size = True
+        self.assertEqual(self.driver1._get_chunk_size(), (2048, True))
+
+        # Explicitly passed chunk size is never adjusted
+        self.assertEqual(self.driver1._get_chunk_size(512), (512, False))
+
+    def test__upload_file_adaptive_chunk_size(self):
+        sizes = []
+
+        def mock_send(data):
+            sizes.append(len(data))
+
+        response = Mock()
+        response.connection.connection.send = mock_send
+
+        data = '1234567890' * 10000
+        file_path = self._create_temp_file(data)
+
+        self.driver1.chunk_size = 100
+        self.driver1.adaptive_chunk_size = True
+
+        try:
+            success, data_hash, bytes_transferred = \
+                     self.driver1._upload_file(response=response,
+                                               file_path=file_path,
+                                               calculate_hash=True)
+        finally:
+            os.unlink(file_path)
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(b(data)).hexdigest())
+        self.assertEqual(sum(sizes), len(data))
+        self.assertEqual(sizes[0], 100)
+        self.assertTrue(max(sizes) > 100)
+
+    def test__upload_file_sendfile(self):
+        if not hasattr(socket, 'socketpair') or \
+           not hasattr(socket.socket, 'sendfile'):
+            return
+
+        local, remote = socket.socketpair()
+        received = []
+
+        def receive():
+            while True:
+                data = remote.recv(65536)
+                if not data:
+                    break
+                received.append(data)
+
+        thread = threading.Thread(target=receive)
+        thread.start()
+
+        response = Mock()
+        response.connection.connection.sock = local
+        response.connection.connection.send.side_effect = Exception('send')
+
+        data = '1234567890' * 100000
+        file_path = self._create_temp_file(data)
+
+        try:
+            success, data_hash, bytes_transferred = \
+                     self.driver1._upload_file(response=response,
+                                               file_path=file_path,
+                                               calculate_hash=True)
+            local.close()
+            thread.join()
+        finally:
+            os.unlink(file_path)
+            remote.close()
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(b(data)).hexdigest())
+        self.assertEqual(bytes_transferred, len(data))
+        self.assertEqual(b('').join(received), b(data))
+
     def test__get_hash_function(self):
         self.driver1.hash_type = 'md5'
         func = self.driver1._get_hash_function()
@@ -148,5 +314,178 @@ class BaseStorageTests(unittest.TestCase):
         else:
             self.fail('Invalid hash type but exception was not thrown')
 
+
+class SaveObjectRangesTests(unittest.TestCase):
+    def setUp(self):
+        RangesMockHttp.ranges = []
+        RangesMockHttp.closed = 0
+        RangesMockHttp.data = ''.join([str(random.randint(0, 9))
+                                       for _ in range(1000)])
+        StorageDriver.connectionCls.conn_classes = (None, RangesMockHttp)
+
+        self.driver = StorageDriver('username', 'key', host='localhost')
+        self.container = Container(name='container', extra={},
+                                   driver=self.driver)
+
+        fd, self.file_path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        StorageDriver.connectionCls.conn_classes = (None, StorageMockHttp)
+
+        if os.path.exists(self.file_path):
+            os.unlink(self.file_path)
+
+    def _get_object(self, name='object', hash=None):
+        if hash is None:
+            hash = hashlib.md5(b(RangesMockHttp.data)).hexdigest()
+
+        return Object(name=name, size=len(RangesMockHttp.data), hash=hash,
+                      extra={}, meta_data={}, container=self.container,
+                      driver=self.driver)
+
+    def _read_file(self):
+        with open(self.file_path, 'rb') as file_handle:
+            return file_handle.read()
+
+    def test_save_object_ranges(self):
+        obj = self._get_object()
+        result = self.driver._save_object_ranges(
+            obj=obj, request_path='/container/object',
+            destination_path=self.file_path, overwrite_existing=True,
+            range_size=64, max_workers=4)
+
+        self.assertTrue(result)
+        self.assertEqual(self._read_file(), b(RangesMockHttp.data))
+        self.assertEqual(len(RangesMockHttp.ranges), 16)
+        self.assertTrue('bytes=960-999' in RangesMockHttp.ranges)
+
+    def test_save_object_ranges_hash_mismatch(self):
+        obj = self._get_object(hash='"%s"' % (hashlib.md5(b('x')).hexdigest()))
+        result = self.driver._save_object_ranges(
+            obj=obj, request_path='/container/object',
+            destination_path=self.file_path, overwrite_existing=True,
+            range_size=100, max_workers=4)
+
+        self.assertFalse(result)
+        self.assertFalse(os.path.exists(self.file_path))
+
+    def test_save_object_ranges_multipart_hash_is_not_verified(self):
+        obj = self._get_object(hash='"%s-3"' % (hashlib.md5(b('x')).hexdigest()))
+        result = self.driver._save_object_ranges(
+            obj=obj, request_path='/container/object',
+            destination_path=self.file_path, overwrite_existing=True,
+            range_size=100, max_workers=4)
+
+        self.assertTrue(result)
+        self.assertEqual(self._read_file(), b(RangesMockHttp.data))
+
+    def test_save_object_ranges_manifest_hash_is_not_verified(self):
+        obj = self._get_object(hash='"%s"' % (hashlib.md5(b('x')).hexdigest()))
+        obj.extra['object_manifest'] = 'container/object/'
+        result = self.driver._save_object_ranges(
+            obj=obj, request_path='/container/object',
+            destination_path=self.file_path, overwrite_existing=True,
+            range_size=100, max_workers=4)
+
+        self.assertTrue(result)
+        self.assertEqual(self._read_file(), b(RangesMockHttp.data))
+
+    def test_save_object_ranges_object_does_not_exist(self):
+        obj = self._get_object(name='missing')
+
+        try:
+            self.driver._save_object_ranges(
+                obj=obj, request_path='/container/missing',
+                destination_path=self.file_path, overwrite_existing=True,
+                range_size=100, max_workers=4)
+        except ObjectDoesNotExistError:
+            self.assertFalse(os.path.exists(self.file_path))
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_save_object_ranges_unexpected_status_closes_connection(self):
+        obj = self._get_object(name='error')
+
+        try:
+            self.driver._save_object_ranges(
+                obj=obj, request_path='/container/error',
+                destination_path=self.file_path, overwrite_existing=True,
+                range_size=100, max_workers=4)
+        except LibcloudError:
+            e = sys.exc_info()[1]
+            self.assertTrue(e.value.find('Unexpected status code') != -1)
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertEqual(RangesMockHttp.closed, 10)
+        self.assertEqual(self.driver.connection.connection_pool.size(), 0)
+
+    def test_save_object_ranges_range_not_supported(self):
+        obj = self._get_object(name='no_ranges')
+        result = self.driver._save_object_ranges(
+            obj=obj, request_path='/container/no_ranges',
+            destination_path=self.file_path, overwrite_existing=True,
+            range_size=100, max_workers=4)
+
+        self.assertTrue(result)
+        self.assertEqual(self._read_file(), b(RangesMockHttp.data))
+        # Whole object is downloaded once more without a Range header
+        self.assertEqual(len(RangesMockHttp.ranges), 11)
+        self.assertEqual(RangesMockHttp.ranges[-1], None)
+
+
+class RangesMockHttp(StorageMockHttp):
+    data = ''
+    ranges = []
+    closed = 0
+
+    def close(self):
+        RangesMockHttp.closed += 1
+
+    def putrequest(self, method, action):
+        self._action = action
+        self._headers = {}
+
+    def putheader(self, key, value):
+        self._headers[key] = value
+
+    def getresponse(self):
+        if self._action == '/container/missing':
+            return MockResponse(httplib.NOT_FOUND, '', {},
+                                httplib.responses[httplib.NOT_FOUND])
+
+        if self._action == '/container/error':
+            return MockResponse(httplib.INTERNAL_SERVER_ERROR, '', {},
+                                httplib.responses[
+                                    httplib.INTERNAL_SERVER_ERROR])
+
+        byte_range = self._headers.get('Range', None)
+        self.ranges.append(byte_range)
+
+        if self._action == '/container/no_ranges':
+            return IterableMockResponse(httplib.OK, self.data, {},
+                                        httplib.responses[httplib.OK])
+
+        start, end = byte_range[len('bytes='):].split('-')
+        body = self.data[int(start):int(end) + 1]
+
+        return MockResponse(httplib.PARTIAL_CONTENT, body, {},
+                            httplib.responses[httplib.PARTIAL_CONTENT])
+
+
+class IterableMockResponse(MockResponse):
+    def next(self):
+        data = self.read(64)
+
+        if not data:
+            raise StopIteration
+
+        return data
+
+    def __next__(self):
+        return self.next()
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -17,6 +17,7 @@ import os.path                          # pylint: disable-msg=W0404
 import math
 import sys
 import copy
+import threading
 import unittest
 
 import mock
@@ -112,6 +113,49 @@ class CloudFilesTests(unittest.TestCase):
              self.driver.connection.get_endpoint())
         self.driver.connection.cdn_request = False
 
+    def test_cdn_and_storage_requests_from_different_threads(self):
+        connection = self.driver.connection
+        original_connect = connection.connect
+        condition = threading.Condition()
+        waiting = [0]
+        hosts = {}
+        errors = []
+
+        def connect(*args, **kwargs):
+            # Both threads pick an endpoint before either of them connects
+            condition.acquire()
+            try:
+                waiting[0] += 1
+                condition.notifyAll()
+
+                while waiting[0] < 2:
+                    condition.wait(10)
+            finally:
+                condition.release()
+
+            return original_connect(*args, **kwargs)
+
+        def request(cdn_request):
+            try:
+                connection.request('', cdn_request=cdn_request)
+                hosts[cdn_request] = connection.connection.host
+            except Exception:
+                errors.append(sys.exc_info()[1])
+
+        connection.connect = connect
+        threads = [threading.Thread(target=request, args=(cdn_request,))
+                   for cdn_request in (True, False)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(hosts, {True: 'cdn2.clouddrive.com',
+                                 False: 'storage101.ord1.clouddrive.com'})
+
     def test_list_containers(self):
         CloudFilesMockHttp.type = 'EMPTY'
         containers = self.driver.list_containers()
@@ -179,6 +223,14 @@ class CloudFilesTests(unittest.TestCase):
         self.assertEqual(obj.meta_data['foo-bar'], 'test 1')
         self.assertEqual(obj.meta_data['bar-foo'], 'test 2')
 
+    def test_get_object_manifest(self):
+        obj = self.driver.get_object(container_name='test_container',
+                                     object_name='test_manifest')
+        self.assertEqual(obj.size, 555)
+        self.assertEqual(obj.extra['object_manifest'],
+                         'test_container/test_manifest/')
+        self.assertFalse(self.driver._is_content_hash(obj))
+
     def test_get_object_not_found(self):
         try:
             self.driver.get_object(container_name='test_container',
@@ -536,6 +588,156 @@ class CloudFilesTests(unittest.TestCase):
         self.assertEqual(mocked__upload_object_part.call_count, parts)
         self.assertTrue(mocked__upload_object_manifest.call_count, 1)
 
+    def test_ex_multipart_upload_object_parallel(self):
+        _upload_object_part = CloudFilesStorageDriver._upload_object_part
+        _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
+
+        mocked__upload_object_part = mock.Mock(return_value="test_part")
+        mocked__upload_object_manifest = mock.Mock(return_value="test_manifest")
+
+        CloudFilesStorageDriver._upload_object_part = mocked__upload_object_part
+        CloudFilesStorageDriver._upload_object_manifest = mocked__upload_object_manifest
+
+        parts = 5
+        file_path = os.path.abspath(__file__)
+        chunk_size = int(math.ceil(float(os.path.getsize(file_path)) / parts))
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        object_name = 'foo_test_upload'
+        try:
+            self.driver.ex_multipart_upload_object(file_path=file_path,
+                                                   container=container,
+                                                   object_name=object_name,
+                                                   chunk_size=chunk_size,
+                                                   max_workers=3)
+        finally:
+            CloudFilesStorageDriver._upload_object_part = _upload_object_part
+            CloudFilesStorageDriver._upload_object_manifest = _upload_object_manifest
+
+        part_numbers = [call[1]['part_number'] for call in
+                        mocked__upload_object_part.call_args_list]
+        self.assertEqual(sorted(part_numbers), list(range(parts)))
+        self.assertEqual(mocked__upload_object_manifest.call_count, 1)
+
+    def test_ex_multipart_upload_object_uses_driver_chunk_size(self):
+        _upload_object_part = CloudFilesStorageDriver._upload_object_part
+        _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
+
+        mocked__upload_object_part = mock.Mock(return_value="test_part")
+        mocked__upload_object_manifest = mock.Mock(return_value="test_manifest")
+
+        CloudFilesStorageDriver._upload_object_part = mocked__upload_object_part
+        CloudFilesStorageDriver._upload_object_manifest = mocked__upload_object_manifest
+
+        file_path = os.path.abspath(__file__)
+        chunk_size = int(math.ceil(float(os.path.getsize(file_path)) / 2))
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        self.driver.chunk_size = 1024
+        try:
+            self.driver.ex_multipart_upload_object(file_path=file_path,
+                                                   container=container,
+                                                   object_name='foo_test_upload',
+                                                   chunk_size=chunk_size)
+        finally:
+            CloudFilesStorageDriver._upload_object_part = _upload_object_part
+            CloudFilesStorageDriver._upload_object_manifest = _upload_object_manifest
+
+        read_sizes = [call[1]['iterator'].chunk_size for call in
+                      mocked__upload_object_part.call_args_list]
+        self.assertEqual(read_sizes, [1024, 1024])
+
+    def test_ex_multipart_upload_object_retries_failed_segment(self):
+        _upload_object_part = CloudFilesStorageDriver._upload_object_part
+        _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
+
+        mocked__upload_object_part = mock.Mock(
+            side_effect=[LibcloudError('timeout'), 'test_part', 'test_part'])
+        mocked__upload_object_manifest = mock.Mock(return_value="test_manifest")
+
+        CloudFilesStorageDriver._upload_object_part = mocked__upload_object_part
+        CloudFilesStorageDriver._upload_object_manifest = mocked__upload_object_manifest
+
+        file_path = os.path.abspath(__file__)
+        chunk_size = int(math.ceil(float(os.path.getsize(file_path)) / 2))
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        try:
+            self.driver.ex_multipart_upload_object(file_path=file_path,
+                                                   container=container,
+                                                   object_name='foo_test',
+                                                   chunk_size=chunk_size,
+                                                   max_retries=1)
+        finally:
+            CloudFilesStorageDriver._upload_object_part = _upload_object_part
+            CloudFilesStorageDriver._upload_object_manifest = _upload_object_manifest
+
+        self.assertEqual(mocked__upload_object_part.call_count, 3)
+        self.assertEqual(mocked__upload_object_manifest.call_count, 1)
+
+    def test_ex_multipart_upload_object_retries_exhausted(self):
+        _upload_object_part = CloudFilesStorageDriver._upload_object_part
+        _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
+
+        mocked__upload_object_part = mock.Mock(
+            side_effect=LibcloudError('timeout'))
+        mocked__upload_object_manifest = mock.Mock(return_value="test_manifest")
+
+        CloudFilesStorageDriver._upload_object_part = mocked__upload_object_part
+        CloudFilesStorageDriver._upload_object_manifest = mocked__upload_object_manifest
+
+        file_path = os.path.abspath(__file__)
+        chunk_size = int(math.ceil(float(os.path.getsize(file_path)) / 2))
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        try:
+            self.driver.ex_multipart_upload_object(file_path=file_path,
+                                                   container=container,
+                                                   object_name='foo_test',
+                                                   chunk_size=chunk_size,
+                                                   max_retries=1)
+        except LibcloudError:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+        finally:
+            CloudFilesStorageDriver._upload_object_part = _upload_object_part
+            CloudFilesStorageDriver._upload_object_manifest = _upload_object_manifest
+
+        self.assertEqual(mocked__upload_object_part.call_count, 4)
+        self.assertFalse(mocked__upload_object_manifest.called)
+
+    def test_ex_multipart_upload_object_resume(self):
+        _upload_object_part = CloudFilesStorageDriver._upload_object_part
+        _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
+        _get_uploaded_segments = CloudFilesStorageDriver._get_uploaded_segments
+
+        file_path = os.path.abspath(__file__)
+        chunk_size = int(math.ceil(float(os.path.getsize(file_path)) / 3))
+        first_hash = self.driver._get_segment_hash(file_path, 0, chunk_size)
+        uploaded = {'foo_test/00000000': (chunk_size, first_hash),
+                    'foo_test/00000001': (chunk_size, 'outdated')}
+
+        mocked__upload_object_part = mock.Mock(return_value="test_part")
+        mocked__upload_object_manifest = mock.Mock(return_value="test_manifest")
+        mocked__get_uploaded_segments = mock.Mock(return_value=uploaded)
+
+        CloudFilesStorageDriver._upload_object_part = mocked__upload_object_part
+        CloudFilesStorageDriver._upload_object_manifest = mocked__upload_object_manifest
+        CloudFilesStorageDriver._get_uploaded_segments = mocked__get_uploaded_segments
+
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        try:
+            self.driver.ex_multipart_upload_object(file_path=file_path,
+                                                   container=container,
+                                                   object_name='foo_test',
+                                                   chunk_size=chunk_size,
+                                                   resume=True)
+        finally:
+            CloudFilesStorageDriver._upload_object_part = _upload_object_part
+            CloudFilesStorageDriver._upload_object_manifest = _upload_object_manifest
+            CloudFilesStorageDriver._get_uploaded_segments = _get_uploaded_segments
+
+        part_numbers = [call[1]['part_number'] for call in
+                        mocked__upload_object_part.call_args_list]
+        self.assertEqual(part_numbers, [1, 2])
+
     def test__upload_object_part(self):
         _put_object = CloudFilesStorageDriver._put_object
         mocked__put_object = mock.Mock(return_value="test")
@@ -757,6 +959,21 @@ class CloudFilesMockHttp(StorageMockHttp):
                              'content-type': 'application/zip'})
         return (status_code, body, headers, httplib.responses[httplib.OK])
 
+    def _v1_MossoCloudFS_test_container_test_manifest(
+        self, method, url, body, headers):
+        headers = copy.deepcopy(self.base_headers)
+        if method == 'HEAD':
+            # get_object of a segmented object
+            body = self.fixtures.load('list_container_objects_empty.json')
+            status_code = httplib.OK
+            headers.update({ 'content-length': 555,
+                             'last-modified': 'Tue, 25 Jan 2011 22:01:49 GMT',
+                             'etag': '"0f343b0931126a20f133d67c2b018a3b"',
+                             'x-object-manifest':
+                                 'test_container/test_manifest/',
+                             'content-type': 'application/zip'})
+        return (status_code, body, headers, httplib.responses[httplib.OK])
+
     def _v1_MossoCloudFS_test_create_container(
         self, method, url, body, headers):
         # test_create_container_success
@@ -17,7 +17,10 @@ import os
 import sys
 import unittest
 
+from hashlib import md5
+
 from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import b
 
 from libcloud.common.types import InvalidCredsError
 from libcloud.common.types import LibcloudError
@@ -27,6 +30,7 @@ from libcloud.storage.types import ContainerIsNotEmptyError
 from libcloud.storage.types import InvalidContainerNameError
 from libcloud.storage.types import ObjectDoesNotExistError
 from libcloud.storage.types import ObjectHashMismatchError
+from libcloud.storage.drivers.s3 import S3Connection
 from libcloud.storage.drivers.s3 import S3StorageDriver, S3USWestStorageDriver
 from libcloud.storage.drivers.s3 import S3EUWestStorageDriver
 from libcloud.storage.drivers.s3 import S3APSEStorageDriver
@@ -42,6 +46,7 @@ class S3MockHttp(StorageMockHttp):
 
     fixtures = StorageFileFixtures('s3')
     base_headers = {}
+    multipart_requests = []
 
     def _UNAUTHORIZED(self, method, url, body, headers):
         return (httplib.UNAUTHORIZED,
@@ -179,6 +184,41 @@ class S3MockHttp(StorageMockHttp):
                 headers,
                 httplib.responses[httplib.OK])
 
+    def _foo_bar_container_foo_test_multipart(self, method, url, body,
+                                              headers):
+        # test_upload_object_via_stream_multipart
+        self.multipart_requests.append((method, url.split('?')[1], body))
+
+        if method == 'POST' and url.find('uploads=') != -1:
+            body = self.fixtures.load('initiate_multipart.xml')
+            return (httplib.OK,
+                    body,
+                    self.base_headers,
+                    httplib.responses[httplib.OK])
+        elif method == 'PUT':
+            headers = {'etag': '"%s"' % (md5(b(body)).hexdigest())}
+            return (httplib.OK,
+                    '',
+                    headers,
+                    httplib.responses[httplib.OK])
+        elif method == 'POST':
+            if self.type == 'COMPLETE_ERROR':
+                body = self.fixtures.load('complete_multipart_error.xml')
+            else:
+                body = self.fixtures.load('complete_multipart.xml')
+            return (httplib.OK,
+                    body,
+                    self.base_headers,
+                    httplib.responses[httplib.OK])
+
+        return (httplib.NO_CONTENT,
+                '',
+                self.base_headers,
+                httplib.responses[httplib.NO_CONTENT])
+
+    _foo_bar_container_foo_test_multipart_COMPLETE_ERROR = \
+            _foo_bar_container_foo_test_multipart
+
 
 class S3MockRawResponse(MockRawResponse):
 
@@ -460,6 +500,33 @@ class S3Tests(unittest.TestCase):
                                              delete_on_failure=True)
         self.assertTrue(result)
 
+    def test_download_object_ranges(self):
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object', size=1000, hash=None, extra={},
+                     container=container, meta_data=None,
+                     driver=S3StorageDriver)
+        destination_path = os.path.abspath(__file__) + '.temp'
+        calls = []
+
+        def mock_save_object_ranges(**kwargs):
+            calls.append(kwargs)
+            return True
+
+        self.driver._save_object_ranges = mock_save_object_ranges
+
+        result = self.driver.download_object(obj=obj,
+                                             destination_path=destination_path,
+                                             overwrite_existing=True,
+                                             ex_max_workers=4,
+                                             ex_range_size=100)
+        self.assertTrue(result)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0]['request_path'],
+                         '/foo_bar_container/foo_bar_object')
+        self.assertEqual(calls[0]['range_size'], 100)
+        self.assertEqual(calls[0]['max_workers'], 4)
+
     def test_download_object_invalid_file_size(self):
         self.mock_raw_response_klass.type = 'INVALID_SIZE'
         container = Container(name='foo_bar_container', extra={},
@@ -612,6 +679,117 @@ class S3Tests(unittest.TestCase):
         self.assertEqual(obj.name, object_name)
         self.assertEqual(obj.size, 3)
 
+    def test_upload_object_via_stream_multipart(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.multipart_requests = []
+        self.driver.multipart_chunk_size = 5
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        iterator = DummyIterator(data=['ab', 'cdefgh', 'ijkl'])
+        extra = {'content_type': 'text/plain',
+                 'meta_data': {'some-value': 'foobar'}}
+        obj = self.driver.upload_object_via_stream(
+            container=container, object_name='foo_test_multipart',
+            iterator=iterator, extra=extra)
+
+        self.assertEqual(obj.name, 'foo_test_multipart')
+        self.assertEqual(obj.size, 12)
+        self.assertEqual(obj.hash, '3858f62230ac3c915f300c664312c11f-3')
+        self.assertTrue('some-value' in obj.meta_data)
+
+        requests = self.mock_response_klass.multipart_requests
+        self.assertEqual([request[0] for request in requests],
+                         ['POST', 'PUT', 'PUT', 'PUT', 'POST'])
+        self.assertEqual([b(request[2]) for request in requests[1:4]],
+                         [b('abcde'), b('fghij'), b('kl')])
+
+        complete_body = requests[4][2]
+        for part in ['abcde', 'fghij', 'kl']:
+            self.assertTrue(complete_body.find(md5(b(part)).hexdigest()) != -1)
+
+    def test_upload_object_via_stream_multipart_single_part(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.multipart_requests = []
+        self.driver.multipart_chunk_size = 5
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        iterator = DummyIterator(data=['2', '3', '5'])
+        extra = {'content_type': 'text/plain'}
+        obj = self.driver.upload_object_via_stream(
+            container=container, object_name='foo_test_stream_data',
+            iterator=iterator, extra=extra)
+
+        self.assertEqual(obj.size, 3)
+        self.assertEqual(self.mock_response_klass.multipart_requests, [])
+
+    def test_upload_object_multipart_complete_error_aborts(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'COMPLETE_ERROR'
+        self.mock_response_klass.multipart_requests = []
+        self.driver.multipart_chunk_size = 5
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        iterator = DummyIterator(data=['abcdefghijkl'])
+        extra = {'content_type': 'text/plain'}
+
+        try:
+            self.driver.upload_object_via_stream(
+                container=container, object_name='foo_test_multipart',
+                iterator=iterator, extra=extra)
+        except LibcloudError:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+        requests = self.mock_response_klass.multipart_requests
+        self.assertEqual(requests[-1][0], 'DELETE')
+
+    def test_upload_object_multipart_above_threshold(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.multipart_requests = []
+        self.driver.multipart_chunk_size = 5
+        self.driver.multipart_upload_threshold = 10
+
+        file_path = os.path.abspath(__file__) + '.temp'
+        fp = open(file_path, 'wb')
+        fp.write(b('abcdefghijkl'))
+        fp.close()
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = self.driver.upload_object(file_path=file_path,
+                                        container=container,
+                                        object_name='foo_test_multipart',
+                                        extra={'content_type': 'text/plain'},
+                                        verify_hash=True)
+
+        self.assertEqual(obj.size, 12)
+        requests = self.mock_response_klass.multipart_requests
+        self.assertEqual(len(requests), 5)
+
+    def test_signed_path_includes_sub_resources(self):
+        connection = S3Connection('key', 'secret')
+        connection.action = '/bucket/object'
+
+        self.assertEqual(connection._get_signed_path({'Expires': '1'}),
+                         '/bucket/object')
+        self.assertEqual(connection._get_signed_path({'uploads': ''}),
+                         '/bucket/object?uploads')
+        params = {'uploadId': 'foo', 'partNumber': 2, 'Expires': '1'}
+        self.assertEqual(connection._get_signed_path(params),
+                         '/bucket/object?partNumber=2&uploadId=foo')
+
     def test_delete_object_not_found(self):
         self.mock_response_klass.type = 'NOT_FOUND'
         container = Container(name='foo_bar_container', extra={},
@@ -18,7 +18,29 @@ import unittest
 import os.path
 
 import libcloud.security
+import libcloud.httplib_ssl
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
+from libcloud.httplib_ssl import get_ssl_context, clear_ssl_caches
+
+
+class FakeSession(object):
+    has_ticket = True
+
+
+class FakeSSLSocket(object):
+    def __init__(self, session, session_reused):
+        self.session = session
+        self.session_reused = session_reused
+
+
+class FakeSSLContext(object):
+    def __init__(self):
+        self.calls = []
+
+    def wrap_socket(self, sock, **kwargs):
+        self.calls.append(kwargs)
+        return FakeSSLSocket(session=FakeSession(),
+                             session_reused='session' in kwargs)
 
 class TestHttpLibSSLTests(unittest.TestCase):
 
@@ -169,5 +191,69 @@ class TestHttpLibSSLTests(unittest.TestCase):
         self.assertFalse(self.httplib_object.ca_cert)
         self.assertFalse(self.httplib_object.verify)
 
+    def test_verify_hostname_is_cached(self):
+        clear_ssl_caches()
+        cert = {'subject': ((('commonName', '*.python.org'),),)}
+
+        self.assertTrue(self.httplib_object._verify_hostname(
+                        hostname='www.python.org', cert=cert))
+        self.assertFalse(self.httplib_object._verify_hostname(
+                         hostname='www.python.com', cert=cert))
+
+        cache = libcloud.httplib_ssl._verified_hostnames
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(self.httplib_object._verify_hostname(
+                        hostname='www.python.org', cert=cert))
+        self.assertEqual(len(cache), 2)
+        clear_ssl_caches()
+
+    def test_verify_hostname_without_subject(self):
+        self.assertFalse(self.httplib_object._verify_hostname(
+                         hostname='python.org', cert={}))
+
+    def test_get_ssl_context_is_shared(self):
+        if getattr(libcloud.httplib_ssl.ssl, 'SSLContext', None) is None:
+            return
+
+        clear_ssl_caches()
+        created = []
+        original = libcloud.httplib_ssl._create_ssl_context
+
+        def create_ssl_context(ca_cert, key_file, cert_file):
+            created.append(ca_cert)
+            return FakeSSLContext()
+
+        libcloud.httplib_ssl._create_ssl_context = create_ssl_context
+
+        try:
+            context = get_ssl_context('/ca.pem')
+            self.assertTrue(get_ssl_context('/ca.pem') is context)
+            self.assertFalse(get_ssl_context('/other.pem') is context)
+            self.assertEqual(created, ['/ca.pem', '/other.pem'])
+        finally:
+            libcloud.httplib_ssl._create_ssl_context = original
+            clear_ssl_caches()
+
+    def test_tls_session_is_resumed(self):
+        clear_ssl_caches()
+        context = FakeSSLContext()
+
+        connection1 = LibcloudHTTPSConnection('foo.bar')
+        connection1.sock = connection1._wrap_socket(context, None)
+        self.assertFalse(connection1.tls_session_reused)
+        connection1._store_session()
+
+        connection2 = LibcloudHTTPSConnection('foo.bar')
+        connection2.sock = connection2._wrap_socket(context, None)
+        self.assertTrue(connection2.tls_session_reused)
+        self.assertTrue(context.calls[1]['session'] is
+                        connection1.sock.session)
+
+        # Sessions are not shared between hosts
+        connection3 = LibcloudHTTPSConnection('other.bar')
+        connection3._wrap_socket(context, None)
+        self.assertFalse('session' in context.calls[2])
+        clear_ssl_caches()
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -22,6 +22,7 @@ from mock import Mock
 
 from libcloud.utils.py3 import httplib, b, StringIO, PY3
 from libcloud.common.base import Response, XmlResponse, JsonResponse
+from libcloud.common.base import XmlStreamResponse
 from libcloud.common.types import MalformedResponseError
 
 
@@ -62,6 +63,90 @@ class ResponseClassesTests(unittest.TestCase):
         parsed = response.parse_body()
         self.assertEqual(parsed, '')
 
+    def _get_stream_response(self, data, headers=None):
+        if PY3:
+            from io import BytesIO
+            body = BytesIO(b(data))
+        else:
+            body = StringIO(data)
+
+        self._mock_response.read.side_effect = body.read
+        self._mock_response.isclosed.return_value = True
+        self._mock_response.getheaders.return_value = headers or {}
+
+        return XmlStreamResponse(response=self._mock_response,
+                                 connection=self._mock_connection)
+
+    def test_XmlStreamResponse_class(self):
+        data = ('  <list xmlns="http://example.com/">%s<item><item>nested'
+                '</item></item><next>token</next></list>' %
+                ''.join(['<item><id>%s</id></item>' % (index)
+                         for index in range(100)]))
+        response = self._get_stream_response(data)
+
+        ids = []
+        previous = None
+        for element in response.iterparse('item',
+                                          namespace='http://example.com/'):
+            # Previously yielded element has been cleared and removed
+            if previous is not None:
+                self.assertEqual(len(previous), 0)
+                self.assertFalse(previous in list(response.object))
+
+            ids.append(element.findtext('{http://example.com/}id'))
+            previous = element
+
+        self.assertEqual(ids, [str(index) for index in range(100)] + [None])
+        self.assertEqual(len(response.object), 1)
+        self.assertEqual(response.object.findtext('{http://example.com/}next'),
+                         'token')
+        self.assertEqual(
+            self._mock_connection._release_connection.call_count, 1)
+
+        self.assertRaises(Exception, list, response.iterparse('item'))
+
+    def test_XmlStreamResponse_class_gzip_encoding(self):
+        data = '<list><item>1</item><item>2</item></list>'
+
+        if PY3:
+            from io import BytesIO
+            string_io = BytesIO()
+        else:
+            string_io = StringIO()
+
+        stream = gzip.GzipFile(fileobj=string_io, mode='w')
+        stream.write(b(data))
+        stream.close()
+
+        response = self._get_stream_response(string_io.getvalue(),
+                                             {'Content-Encoding': 'gzip'})
+        self.assertEqual([element.text for element in
+                          response.iterparse('item')], ['1', '2'])
+
+    def test_XmlStreamResponse_class_malformed_response(self):
+        response = self._get_stream_response('<list><item>1</item>')
+
+        try:
+            list(response.iterparse('item'))
+        except MalformedResponseError:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_XmlStreamResponse_class_closed_before_end(self):
+        response = self._get_stream_response(
+            '<list><item>1</item><item>2</item></list>')
+        self._mock_response.isclosed.return_value = False
+
+        elements = response.iterparse('item')
+        self.assertEqual(next(elements).text, '1')
+        elements.close()
+
+        self.assertEqual(
+            self._mock_connection._release_connection.call_count, 0)
+        self.assertEqual(
+            self._mock_connection.connection.close.call_count, 1)
+
     def test_JsonResponse_class_success(self):
         self._mock_response.read.return_value = '{"foo": "bar"}'
         response = JsonResponse(response=self._mock_response,
@@ -16,6 +16,7 @@
 import sys
 import unittest
 
+from libcloud.utils.py3 import next
 from libcloud.common.types import LazyList
 
 
@@ -92,6 +93,72 @@ class TestLazyList(unittest.TestCase):
         self.assertEqual(repr(ll2), '[1, 2, 3, 4, 5]')
         self.assertEqual(repr(ll3), '[1, 2, 3, 4, 5, 6, 7, 8, 9, 10]')
 
+    def test_iterator_streams_pages(self):
+        ll = LazyList(get_more=self._get_more_not_exhausted)
+        iterator = iter(ll)
+
+        self.assertEqual(next(iterator), 1)
+        self.assertEqual(self._get_more_counter, 1)
+
+        self.assertEqual([next(iterator) for _ in range(4)], [2, 3, 4, 5])
+        self.assertEqual(self._get_more_counter, 1)
+
+        self.assertEqual(next(iterator), 6)
+        self.assertEqual(self._get_more_counter, 2)
+
+    def test_indexing_loads_only_needed_pages(self):
+        ll = LazyList(get_more=self._get_more_not_exhausted)
+
+        self.assertEqual(ll[2], 3)
+        self.assertEqual(self._get_more_counter, 1)
+
+    def test_prefetch(self):
+        ll = LazyList(get_more=self._get_more_not_exhausted, prefetch=True)
+        iterator = iter(ll)
+
+        self.assertEqual(next(iterator), 1)
+        # Second page has been requested in the background
+        ll._pending.result()
+        self.assertEqual(self._get_more_counter, 2)
+
+        self.assertEqual(list(iterator), [2, 3, 4, 5, 6, 7, 8, 9, 10])
+        self.assertEqual(self._get_more_counter, 2)
+        self.assertEqual(len(ll), 10)
+
+    def test_prefetch_error_is_propagated(self):
+        ll = LazyList(get_more=self._get_more_error, prefetch=True)
+        iterator = iter(ll)
+
+        self.assertEqual([next(iterator) for _ in range(5)], [1, 2, 3, 4, 5])
+        self.assertRaises(ValueError, next, iterator)
+
+    def test_no_cache(self):
+        ll = LazyList(get_more=self._get_more_not_exhausted, cache=False)
+
+        self.assertEqual(list(ll), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+        self.assertEqual(ll._data, [])
+        self.assertEqual(self._get_more_counter, 2)
+
+        # Every iteration starts from the beginning
+        self.assertEqual(list(ll), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+        self.assertEqual(self._get_more_counter, 4)
+
+        self.assertRaises(TypeError, len, ll)
+        self.assertRaises(TypeError, ll.__getitem__, 0)
+
+    def test_no_cache_prefetch(self):
+        ll = LazyList(get_more=self._get_more_not_exhausted, cache=False,
+                      prefetch=True)
+
+        self.assertEqual(list(ll), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+        self.assertEqual(ll._data, [])
+
+    def _get_more_error(self, last_key, value_dict):
+        if not last_key:
+            return [1, 2, 3, 4, 5], 5, False
+
+        raise ValueError('page retrieval failed')
+
     def _get_more_empty(self, last_key, value_dict):
         return [], None, True
 
@@ -15,6 +15,8 @@
 # limitations under the License.
 
 import sys
+import hashlib
+import subprocess
 import unittest
 import warnings
 import os.path
@@ -24,11 +26,14 @@ warnings.simplefilter('default')
 
 import libcloud.utils.files
 
-from libcloud.utils.misc import get_driver
+from libcloud.utils.misc import get_driver, is_module_available
+from libcloud.utils.parallel import parallel_map, parallel_imap_unordered
+from libcloud.utils.parallel import iterate_in_thread, BackgroundHash
 
 from libcloud.utils.py3 import PY3
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import b
+from libcloud.utils.py3 import LazyModule
 from libcloud.compute.types import Provider
 from libcloud.compute.providers import DRIVERS
 
@@ -140,6 +145,76 @@ class TestUtils(unittest.TestCase):
 
             self.assertEqual(index, 548)
 
+    def test_read_in_chunks_fill_size_uneven_pieces(self):
+        pieces = ['a' * 3, 'b' * 25, 'c', 'd' * 7, 'e' * 10, 'f' * 4]
+        data = b(''.join(pieces))
+
+        chunks = list(libcloud.utils.files.read_in_chunks(iter(pieces),
+                                                          chunk_size=10,
+                                                          fill_size=True))
+
+        self.assertEqual(b('').join(chunks), data)
+        self.assertEqual([len(chunk) for chunk in chunks], [10] * 5)
+
+        chunks = list(libcloud.utils.files.read_in_chunks(iter(pieces[:-1]),
+                                                          chunk_size=10,
+                                                          fill_size=True))
+        self.assertEqual([len(chunk) for chunk in chunks], [10] * 4 + [6])
+
+    def test_read_in_chunks_empty_iterator(self):
+        for fill_size in [True, False]:
+            chunks = list(libcloud.utils.files.read_in_chunks(
+                iter([]), chunk_size=10, fill_size=fill_size))
+            self.assertEqual(chunks, [])
+
+    def test_adaptive_chunk_size(self):
+        sizer = libcloud.utils.files.AdaptiveChunkSize(size=1024,
+                                                       max_size=4096,
+                                                       target_duration=1)
+
+        # Fast transfer - size grows up to max_size
+        self.assertEqual(sizer.update(1024, 0.1), 2048)
+        self.assertEqual(sizer.update(2048, 0.1), 4096)
+        self.assertEqual(sizer.update(4096, 0), 4096)
+
+        # Throughput matches the chunk size
+        self.assertEqual(sizer.update(4096, 1), 4096)
+
+        # Slow transfer - size shrinks down to the initial size
+        self.assertEqual(sizer.update(4096, 10), 2048)
+        self.assertEqual(sizer.update(2048, 10), 1024)
+        self.assertEqual(sizer.update(1024, 10), 1024)
+
+        # Nothing has been transferred
+        self.assertEqual(sizer.update(0, 0), 1024)
+
+    def test_read_in_chunks_adaptive(self):
+        class FakeFile(file):
+            def __init__(self):
+                self.remaining = 100000
+                self.sizes = []
+
+            def read(self, size):
+                self.sizes.append(size)
+                size = min(size, self.remaining)
+                self.remaining -= size
+                return 'b' * size
+
+        fake_file = FakeFile()
+        chunks = list(libcloud.utils.files.read_in_chunks(fake_file,
+                                                          chunk_size=10,
+                                                          adaptive=True))
+
+        self.assertEqual(len(b('').join(chunks)), 100000)
+        self.assertEqual(fake_file.sizes[0], 10)
+        self.assertTrue(fake_file.sizes[-1] > 10)
+
+        fake_file = FakeFile()
+        chunks = list(libcloud.utils.files.read_in_chunks(fake_file,
+                                                          chunk_size=10,
+                                                          adaptive=False))
+        self.assertEqual(len(chunks), 10000)
+
     def test_exhaust_iterator(self):
         def iterator_func():
             for x in range(0, 1000):
@@ -158,12 +233,146 @@ class TestUtils(unittest.TestCase):
         result = libcloud.utils.files.exhaust_iterator(iterator=iterator)
         self.assertEqual(result, b(data))
 
+    def test_parallel_map(self):
+        result = parallel_map(lambda value: value * 2, range(10),
+                              max_workers=4)
+        self.assertEqual(result, [value * 2 for value in range(10)])
+
+        self.assertEqual(parallel_map(lambda value: value, []), [])
+
+    def test_parallel_map_error(self):
+        def func(value):
+            if value in [3, 7]:
+                raise ValueError(str(value))
+            return value
+
+        try:
+            parallel_map(func, range(10), max_workers=4)
+        except ValueError:
+            e = sys.exc_info()[1]
+            self.assertEqual(str(e), '3')
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_parallel_imap_unordered(self):
+        def func(value):
+            if value == 2:
+                raise ValueError()
+            return value
+
+        for max_workers in [1, 3]:
+            results = list(parallel_imap_unordered(func, range(5),
+                                                   max_workers=max_workers))
+            results.sort(key=lambda value: value[0])
+
+            self.assertEqual(len(results), 5)
+            self.assertEqual([value[2] for value in results],
+                             [0, 1, None, 3, 4])
+            self.assertTrue(isinstance(results[2][3], ValueError))
+
+    def test_parallel_imap_unordered_generator(self):
+        def items():
+            for value in range(5):
+                yield value
+
+            raise ValueError('source failed')
+
+        for max_workers in [1, 3]:
+            results = []
+
+            try:
+                for value in parallel_imap_unordered(lambda value: value * 2,
+                                                     items(),
+                                                     max_workers=max_workers):
+                    results.append(value[2])
+            except ValueError:
+                e = sys.exc_info()[1]
+                self.assertEqual(str(e), 'source failed')
+            else:
+                self.fail('Exception was not thrown')
+
+            self.assertEqual(sorted(results), [0, 2, 4, 6, 8])
+
+    def test_iterate_in_thread(self):
+        self.assertEqual(list(iterate_in_thread(iter(range(100)))),
+                         list(range(100)))
+        self.assertEqual(list(iterate_in_thread(iter([]))), [])
+
+    def test_iterate_in_thread_error(self):
+        def iterator():
+            yield 1
+            raise ValueError('fail')
+
+        result = []
+
+        try:
+            for value in iterate_in_thread(iterator()):
+                result.append(value)
+        except ValueError:
+            self.assertEqual(result, [1])
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_iterate_in_thread_close(self):
+        generator = iterate_in_thread(iter(range(1000)), max_pending=1)
+        self.assertEqual(next(generator), 0)
+        generator.close()
+
+    def test_background_hash(self):
+        data = [b('a') * 10000, b('b') * 5, b('c') * 100000]
+        data_hash = BackgroundHash(hashlib.md5())
+
+        for value in data:
+            data_hash.update(value)
+
+        self.assertEqual(data_hash.hexdigest(),
+                         hashlib.md5(b('').join(data)).hexdigest())
+        self.assertEqual(BackgroundHash(hashlib.md5()).hexdigest(),
+                         hashlib.md5().hexdigest())
+
     def test_exhaust_iterator_empty_iterator(self):
         data = ''
         iterator = StringIO(data)
         result = libcloud.utils.files.exhaust_iterator(iterator=iterator)
         self.assertEqual(result, b(data))
 
+    def test_is_module_available(self):
+        self.assertTrue(is_module_available('os'))
+        self.assertTrue(is_module_available('libcloud'))
+        self.assertFalse(is_module_available('libcloud_missing_module'))
+
+    def test_lazy_module(self):
+        module = LazyModule('libcloud.test.missing_module')
+        self.assertEqual(module.__dict__['_module'], None)
+        self.assertRaises(ImportError, getattr, module, 'name')
+
+        module = LazyModule('os.path')
+        self.assertEqual(module.join('a', 'b'), os.path.join('a', 'b'))
+        self.assertTrue(module.__dict__['_module'] is os.path)
+
+    def test_optional_dependencies_are_not_imported(self):
+        # Guards the cold start cost of the storage and compute drivers, see
+        # contrib/benchmark_import_time.py
+        code = ('import sys; '
+                'from libcloud.storage.providers import get_driver; '
+                'from libcloud.storage.types import Provider; '
+                'get_driver(Provider.S3); '
+                'import libcloud.compute.base; '
+                'print(",".join(sorted(sys.modules.keys())))')
+        root = os.path.join(os.path.dirname(__file__), '..', '..')
+        process = subprocess.Popen([sys.executable, '-c', code],
+                                   cwd=os.path.abspath(root),
+                                   stdout=subprocess.PIPE)
+        stdout = process.communicate()[0]
+        modules = stdout.decode('utf-8').strip().split(',')
+
+        self.assertEqual(process.returncode, 0)
+        self.assertTrue('libcloud.storage.drivers.s3' in modules)
+
+        for name in ['paramiko', 'xmlrpclib', 'xmlrpc.client', 'pipes',
+                     'libcloud.compute.deployment']:
+            self.assertFalse(name in modules, name)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -21,7 +21,8 @@ from libcloud.utils.py3 import StringIO
 
 
 __all__ = [
-    'decompress_data'
+    'decompress_data',
+    'DecompressingReader'
 ]
 
 
@@ -40,3 +41,53 @@ def decompress_data(compression_type, data):
     else:
         raise Exception('Invalid or onsupported compression type: %s' %
                         (compression_type))
+
+
+class DecompressingReader(object):
+    """
+    File-like object which decompresses data read from another file-like
+    object incrementally (the whole compressed body is never held in
+    memory).
+    """
+
+    def __init__(self, fileobj, compression_type=None, chunk_size=16 * 1024):
+        """
+        @param fileobj: File-like object with a read(size) method.
+
+        @param compression_type: 'zlib', 'gzip' or None if the data is not
+                                 compressed.
+        @type compression_type: C{str}
+        """
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+
+        if compression_type == 'zlib':
+            self._decompressor = zlib.decompressobj()
+        elif compression_type == 'gzip':
+            # 16 + MAX_WBITS tells zlib to expect a gzip header
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif compression_type is None:
+            self._decompressor = None
+        else:
+            raise Exception('Invalid or onsupported compression type: %s' %
+                            (compression_type))
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.chunk_size
+
+        while True:
+            data = self.fileobj.read(size)
+
+            if self._decompressor is None:
+                return data
+
+            if not data:
+                return self._decompressor.flush()
+
+            data = self._decompressor.decompress(data)
+
+            # Compressed chunk might not contain a full block yet, an empty
+            # result would otherwise signal the end of the stream
+            if data:
+                return data
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import os
+import time
 import mimetypes
 
 from libcloud.utils.py3 import PY3
@@ -23,11 +24,80 @@ from libcloud.utils.py3 import b
 
 CHUNK_SIZE = 8096
 
+# Upper bound for the chunk size when adaptive chunk sizing is used
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
 if PY3:
     from io import FileIO as file
+    from io import BufferedReader
+    FILE_TYPES = (file, BufferedReader, httplib.HTTPResponse)
+else:
+    FILE_TYPES = (file, httplib.HTTPResponse)
+
+
+class AdaptiveChunkSize(object):
+    """
+    Chunk size which adapts to the measured transfer throughput.
+
+    The size is doubled (up to max_size) while the throughput allows more
+    than size bytes to be transferred in target_duration seconds and halved
+    (down to min_size) when it only allows less than a quarter of it. A large
+    transfer which runs at line rate therefore ends up moving roughly
+    throughput * target_duration bytes per Python level iteration.
+    """
+
+    def __init__(self, size=None, min_size=None, max_size=None,
+                 target_duration=0.05):
+        """
+        @type size: C{int}
+        @param size: Initial chunk size (defaults to CHUNK_SIZE).
+
+        @type min_size: C{int}
+        @param min_size: Minimum chunk size (defaults to the initial size).
+
+        @type max_size: C{int}
+        @param max_size: Maximum chunk size (defaults to MAX_CHUNK_SIZE).
+
+        @type target_duration: C{float}
+        @param target_duration: Desired duration of a single chunk transfer in
+                                seconds.
+        """
+        self.size = size or CHUNK_SIZE
+        self.min_size = min_size or self.size
+        self.max_size = max(max_size or MAX_CHUNK_SIZE, self.size)
+        self.target_duration = target_duration
+
+    def update(self, transferred, elapsed):
+        """
+        Adjust the chunk size based on a single measurement.
+
+        @type transferred: C{int}
+        @param transferred: Number of bytes which have been transferred.
+
+        @type elapsed: C{float}
+        @param elapsed: Number of seconds the transfer took.
+
+        @rtype: C{int}
+        @return: New chunk size.
+        """
+        if transferred <= 0:
+            return self.size
+
+        if elapsed <= 0:
+            expected = self.max_size
+        else:
+            expected = (transferred / elapsed) * self.target_duration
 
+        if expected > self.size:
+            self.size = min(self.size * 2, self.max_size)
+        elif expected < self.size / 4:
+            self.size = max(self.size // 2, self.min_size)
 
-def read_in_chunks(iterator, chunk_size=None, fill_size=False):
+        return self.size
+
+
+def read_in_chunks(iterator, chunk_size=None, fill_size=False,
+                   adaptive=False):
     """
     Return a generator which yields data in chunks.
 
@@ -42,42 +112,85 @@ def read_in_chunks(iterator, chunk_size=None, fill_size=False):
     @param fill_size: If True, make sure chunks are chunk_size in length
                       (except for last chunk).
 
-    TODO: At some point in the future we could use byte arrays here if version
-    >= Python 3. This should speed things up a bit and reduce memory usage.
+    @type adaptive: C{bool}
+    @param adaptive: If True, chunk_size is only the initial chunk size which
+                     is adjusted based on the time it takes to read and
+                     consume a chunk (see L{AdaptiveChunkSize}).
     """
     chunk_size = chunk_size or CHUNK_SIZE
 
-    if isinstance(iterator, (file, httplib.HTTPResponse)):
+    is_file = isinstance(iterator, FILE_TYPES)
+
+    if is_file:
         get_data = iterator.read
         args = (chunk_size, )
     else:
         get_data = next
         args = (iterator, )
 
-    data = b('')
-    empty = False
-
-    while not empty or len(data) > 0:
-        if not empty:
-            try:
-                chunk = b(get_data(*args))
-                if len(chunk) > 0:
-                    data += chunk
-                else:
-                    empty = True
-            except StopIteration:
-                empty = True
-
-        if len(data) == 0:
-            raise StopIteration
-
-        if fill_size:
-            if empty or len(data) >= chunk_size:
-                yield data[:chunk_size]
-                data = data[chunk_size:]
+    sizer = None
+
+    if adaptive:
+        sizer = AdaptiveChunkSize(size=chunk_size)
+        last_time = time.time()
+        last_size = 0
+
+    # Data which hasn't been yielded yet. Pieces are only joined once there is
+    # enough of them for at least one chunk so every byte is copied a constant
+    # number of times.
+    pending = []
+    pending_size = 0
+
+    while True:
+        if sizer is not None:
+            # Time between two reads includes the time the consumer spent
+            # with the previous chunk (e.g. sending it over the network)
+            now = time.time()
+            chunk_size = sizer.update(last_size, now - last_time)
+            last_time = now
+
+            if is_file:
+                args = (chunk_size, )
+
+        try:
+            chunk = b(get_data(*args))
+        except StopIteration:
+            break
+
+        if len(chunk) == 0:
+            break
+
+        if sizer is not None:
+            last_size = len(chunk)
+
+        if not fill_size or (not pending and len(chunk) == chunk_size):
+            # File objects usually return chunks of the requested size which
+            # can be passed through as they are
+            yield chunk
+            continue
+
+        pending.append(chunk)
+        pending_size += len(chunk)
+
+        if pending_size < chunk_size:
+            continue
+
+        data = b('').join(pending)
+        offset = 0
+
+        while pending_size - offset >= chunk_size:
+            yield data[offset:offset + chunk_size]
+            offset += chunk_size
+
+        if offset < pending_size:
+            pending = [data[offset:]]
         else:
-            yield data
-            data = b('')
+            pending = []
+
+        pending_size -= offset
+
+    if pending_size > 0:
+        yield b('').join(pending)
 
 
 def exhaust_iterator(iterator):
@@ -91,22 +204,20 @@ def exhaust_iterator(iterator):
     @rtype C{str}
     @return Data returned by the iterator.
     """
-    data = b('')
-
-    try:
-        chunk = b(next(iterator))
-    except StopIteration:
-        chunk = b('')
-
-    while len(chunk) > 0:
-        data += chunk
+    chunks = []
 
+    while True:
         try:
             chunk = b(next(iterator))
         except StopIteration:
-            chunk = b('')
+            break
+
+        if len(chunk) == 0:
+            break
+
+        chunks.append(chunk)
 
-    return data
+    return b('').join(chunks)
 
 
 def guess_file_mime_type(file_path):
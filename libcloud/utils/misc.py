@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
+
 
 def get_driver(drivers, provider):
     """
@@ -189,3 +191,34 @@ def reverse_dict(dictionary):
 
 def lowercase_keys(dictionary):
     return dict(((k.lower(), v) for k, v in dictionary.items()))
+
+
+def is_module_available(name):
+    """
+    Return True if a top level module can be imported, without importing it
+    (importing optional dependencies such as paramiko is slow).
+
+    @param name: Module name.
+    @type name: C{str}
+
+    @rtype: C{bool}
+    """
+    if name in sys.modules:
+        return sys.modules[name] is not None
+
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        import imp
+
+        try:
+            fp, _, _ = imp.find_module(name)
+        except ImportError:
+            return False
+
+        if fp is not None:
+            fp.close()
+
+        return True
+
+    return find_spec(name) is not None
@@ -0,0 +1,294 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for running blocking calls (e.g. API requests) concurrently using a
+bounded number of threads.
+"""
+
+# Backward compatibility for Python 2.5
+from __future__ import with_statement
+
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from libcloud.utils.py3 import next
+
+__all__ = [
+    'parallel_imap_unordered',
+    'parallel_map',
+    'iterate_in_thread',
+    'BackgroundHash'
+]
+
+_SENTINEL = object()
+
+
+def parallel_imap_unordered(func, items, max_workers=4):
+    """
+    Call func for every item using at most max_workers threads and yield
+    results as soon as they are available.
+
+    Exceptions are not propagated, they are yielded instead so the caller can
+    decide what to do with the results of the other calls.
+
+    @type func: C{callable}
+    @param func: Function which is called with a single item.
+
+    @type items: C{iterable}
+    @param items: Items to process. Items are pulled lazily so this can be a
+                  generator which produces them while the calls are running.
+                  Exceptions raised by the generator are re-raised once all
+                  the calls have finished.
+
+    @type max_workers: C{int}
+    @param max_workers: Maximum number of calls which run at the same time.
+
+    @rtype: C{generator}
+    @return: Generator which yields (index, item, result, error) tuples in
+             the order of completion. Either result or error is None.
+    """
+    if hasattr(items, '__len__'):
+        if not len(items):
+            return
+
+        max_workers = min(max_workers, len(items))
+
+    max_workers = max(1, max_workers)
+    items = enumerate(items)
+
+    if max_workers == 1:
+        # No point in starting threads
+        for index, item in items:
+            try:
+                result = func(item)
+            except Exception:
+                yield index, item, None, sys.exc_info()[1]
+            else:
+                yield index, item, result, None
+        return
+
+    lock = threading.Lock()
+    done = queue.Queue()
+    source_errors = []
+
+    def worker():
+        while True:
+            try:
+                with lock:
+                    index, item = next(items)
+            except StopIteration:
+                done.put(_SENTINEL)
+                return
+            except Exception:
+                source_errors.append(sys.exc_info()[1])
+                done.put(_SENTINEL)
+                return
+
+            try:
+                result = func(item)
+            except Exception:
+                done.put((index, item, None, sys.exc_info()[1]))
+            else:
+                done.put((index, item, result, None))
+
+    for _ in range(max_workers):
+        thread = threading.Thread(target=worker)
+        thread.setDaemon(True)
+        thread.start()
+
+    running = max_workers
+    while running:
+        value = done.get()
+
+        if value is _SENTINEL:
+            running -= 1
+            continue
+
+        yield value
+
+    if source_errors:
+        raise source_errors[0]
+
+
+def parallel_map(func, items, max_workers=4):
+    """
+    Call func for every item using at most max_workers threads and return a
+    list of results in the same order as items.
+
+    If any of the calls raises, the exception is re-raised once all the
+    calls have finished.
+
+    @type func: C{callable}
+    @param func: Function which is called with a single item.
+
+    @type items: C{iterable}
+    @param items: Items to process.
+
+    @type max_workers: C{int}
+    @param max_workers: Maximum number of calls which run at the same time.
+
+    @rtype: C{list}
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+
+    for index, _, result, error in parallel_imap_unordered(
+            func, items, max_workers=max_workers):
+        if error is not None:
+            errors.append((index, error))
+        else:
+            results[index] = result
+
+    if errors:
+        # Re-raise the error of the first failed item
+        errors.sort(key=lambda value: value[0])
+        raise errors[0][1]
+
+    return results
+
+
+def iterate_in_thread(iterator, max_pending=2):
+    """
+    Consume an iterator on a background thread.
+
+    Up to max_pending items are produced ahead of the consumer so producing
+    the next item (e.g. reading it from a file) overlaps with processing the
+    current one. Exceptions raised by the iterator are re-raised in the
+    consumer thread.
+
+    @type iterator: C{iterable}
+    @param iterator: Iterator to consume.
+
+    @type max_pending: C{int}
+    @param max_pending: Maximum number of items produced ahead.
+
+    @rtype: C{generator}
+    """
+    items = queue.Queue(max_pending)
+    stop = threading.Event()
+    finished = threading.Event()
+
+    def producer():
+        try:
+            for item in iterator:
+                if stop.isSet():
+                    return
+
+                items.put((item, None))
+        except Exception:
+            items.put((_SENTINEL, sys.exc_info()[1]))
+        else:
+            items.put((_SENTINEL, None))
+        finally:
+            finished.set()
+
+    thread = threading.Thread(target=producer)
+    thread.setDaemon(True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+
+            if error is not None:
+                raise error
+
+            if item is _SENTINEL:
+                return
+
+            yield item
+    finally:
+        # Consumer has stopped early, unblock the producer
+        stop.set()
+
+        while not finished.isSet():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                finished.wait(0.01)
+
+        thread.join()
+
+
+class BackgroundHash(object):
+    """
+    Wrapper around a hashlib object which performs update() on a helper
+    thread.
+
+    hashlib releases the GIL while hashing large buffers so hashing a chunk
+    can run at the same time as the calling thread sends it over the network.
+    Data passed to update() must not be modified afterwards.
+    """
+
+    def __init__(self, hash_object, max_pending=4):
+        """
+        @type hash_object: C{object}
+        @param hash_object: Instantiated hash object (e.g. hashlib.md5()).
+
+        @type max_pending: C{int}
+        @param max_pending: Maximum number of chunks waiting to be hashed.
+        """
+        self.hash_object = hash_object
+        self._pending = queue.Queue(max_pending)
+        self._thread = None
+        self._closed = False
+
+    def update(self, data):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+        self._pending.put(data)
+
+    def digest(self):
+        self._wait()
+        return self.hash_object.digest()
+
+    def hexdigest(self):
+        self._wait()
+        return self.hash_object.hexdigest()
+
+    def close(self):
+        """
+        Stop the helper thread without waiting for pending chunks.
+        """
+        self._closed = True
+        self._wait()
+
+    def _run(self):
+        while True:
+            data = self._pending.get()
+
+            if data is _SENTINEL:
+                return
+
+            if not self._closed:
+                self.hash_object.update(data)
+
+    def _wait(self):
+        if self._thread is None:
+            return
+
+        self._pending.put(_SENTINEL)
+        self._thread.join()
+        self._thread = None
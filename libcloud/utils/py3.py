@@ -34,7 +34,6 @@ if sys.version_info >= (3, 0):
     import urllib
     import urllib as urllib2
     import urllib.parse as urlparse
-    import xmlrpc.client as xmlrpclib
     from urllib.parse import quote as urlquote
     from urllib.parse import unquote as urlunquote
     from urllib.parse import urlencode as urlencode
@@ -66,7 +65,6 @@ else:
     import urllib
     import urllib2
     import urlparse
-    import xmlrpclib
     from urllib import quote as urlquote
     from urllib import unquote as urlunquote
     from urllib import urlencode as urlencode
@@ -86,3 +84,41 @@ else:
 
 if sys.version_info >= (2, 5) and sys.version_info <= (2, 6):
     PY25 = True
+
+
+class LazyModule(object):
+    """
+    Module which is only imported once one of its attributes is accessed.
+
+    Used for the modules which are slow to import and only needed by a few
+    drivers.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+
+        if module is None:
+            __import__(self._name)
+            module = sys.modules[self._name]
+            self.__dict__['_module'] = module
+
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return '<LazyModule: %s>' % (self._name)
+
+
+if PY3:
+    xmlrpclib = LazyModule('xmlrpc.client')
+else:
+    xmlrpclib = LazyModule('xmlrpclib')